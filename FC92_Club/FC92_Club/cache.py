@@ -0,0 +1,202 @@
+# FC92_Club/cache.py
+"""
+Two-tier cache and helpers shared by the apps.
+
+TieredCache keeps a small, short-lived LRU in each worker process in front of
+a shared backend (file, database, Redis, ... configured as another CACHES
+alias). Reads that hit the local tier never leave the process.
+
+The local tier can be up to LOCAL_TIMEOUT seconds behind the shared tier, so
+anything that must be invalidated across workers should use versioned keys:
+`versioned_key()` embeds a namespace version read from the shared tier, and
+`bump_namespace()` moves every key in the namespace to a fresh version. The
+values stored under a versioned key never change, so caching them locally
+is always safe.
+
+`cached()` adds stampede protection: one caller recomputes an expired value
+while the others keep serving the previous one.
+"""
+import threading
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+_MISSING = object()
+_stats_lock = threading.Lock()
+_stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'recomputes': 0, 'stale_hits': 0}
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    """Hit/miss counters for this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+    stats['hit_rate'] = (stats['local_hits'] + stats['shared_hits']) / lookups if lookups else 0.0
+    return stats
+
+
+class TieredCache(BaseCache):
+    """
+    Cache backend: per-process LRU tier in front of a shared tier.
+
+    OPTIONS:
+        SHARED              alias of the shared cache in CACHES (required)
+        LOCAL_TIMEOUT       max seconds a value lives in the local tier (default 5)
+        LOCAL_MAX_ENTRIES   local tier size; least recently used entries go first (default 1000)
+    """
+
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS', {}))
+        self._shared_alias = options.pop('SHARED')
+        self.local_timeout = options.pop('LOCAL_TIMEOUT', 5)
+        local_max_entries = options.pop('LOCAL_MAX_ENTRIES', 1000)
+        super().__init__({**params, 'OPTIONS': options})
+        self.local = LocMemCache(f'tiered-{location or self._shared_alias}', {
+            'TIMEOUT': self.local_timeout,
+            'OPTIONS': {'MAX_ENTRIES': local_max_entries, 'CULL_FREQUENCY': 10},
+        })
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def get(self, key, default=None, version=None):
+        value = self.local.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            _count('local_hits')
+            return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            _count('misses')
+            return default
+        _count('shared_hits')
+        self.local.set(key, value, self.local_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set(key, value, self._local_timeout(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Must be decided by the shared tier so it works as a cross-worker lock
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.local.set(key, value, self._local_timeout(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        return self.local.has_key(key, version=version) or self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+
+# --- Versioned keys ---
+
+def _namespace_key(namespace):
+    return f'ns:{namespace}'
+
+
+def _version_store():
+    # Versions must be read from the shared tier; a stale local copy would
+    # keep serving values from before an invalidation.
+    return getattr(cache, 'shared', cache)
+
+
+def namespace_version(namespace):
+    store = _version_store()
+    version = store.get(_namespace_key(namespace))
+    if version is None:
+        version = int(time.time() * 1000)
+        store.add(_namespace_key(namespace), version, None)
+        version = store.get(_namespace_key(namespace), version)
+    return version
+
+
+def versioned_key(namespace, *parts):
+    """Cache key that changes whenever `bump_namespace(namespace)` is called."""
+    return ':'.join([namespace, f'v{namespace_version(namespace)}', *map(str, parts)])
+
+
+def bump_namespace(namespace):
+    """Invalidate every key built with `versioned_key(namespace, ...)`."""
+    store = _version_store()
+    try:
+        store.incr(_namespace_key(namespace))
+    except ValueError:
+        # Version evicted: restart from the clock so old versions aren't reused
+        store.set(_namespace_key(namespace), int(time.time() * 1000), None)
+
+
+# --- Stampede protection ---
+
+LOCK_TIMEOUT = 10  # Seconds a recompute may hold the lock
+LOCK_WAIT = 0.05  # Poll interval while another worker fills a missing key
+STALE_GRACE = 60  # Seconds an expired value may still be served during a recompute
+
+
+def cached(key, producer, timeout=300, stale_grace=STALE_GRACE):
+    """
+    Return the value under `key`, calling `producer()` to (re)compute it.
+
+    `timeout` is the freshness lifetime in seconds, or a callable taking the
+    computed value and returning one. After it passes, the first caller to
+    take the lock recomputes while everyone else gets the old value for up
+    to `stale_grace` more seconds. On a cold key, callers wait briefly for
+    the lock holder instead of all hitting the database at once.
+    """
+    lock_key = f'lock:{key}'
+    envelope = cache.get(key)
+    if envelope is not None:
+        value, fresh_until = envelope
+        if time.time() < fresh_until:
+            return value
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not locked:
+            _count('stale_hits')
+            return value
+    else:
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        deadline = time.time() + LOCK_TIMEOUT
+        while not locked and time.time() < deadline:
+            time.sleep(LOCK_WAIT)
+            envelope = cache.get(key)
+            if envelope is not None:
+                return envelope[0]
+        # If we still don't hold the lock its holder died or is very slow:
+        # compute without it rather than fail the request
+
+    try:
+        _count('recomputes')
+        value = producer()
+        seconds = timeout(value) if callable(timeout) else timeout
+        cache.set(key, (value, time.time() + seconds), seconds + stale_grace)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
@@ -0,0 +1,71 @@
+# FC92_Club/conditional.py
+"""
+Conditional GET for list pages.
+
+The validator is a single aggregate query (latest `updated_at` plus row count)
+combined with who is asking, so an unchanged page is answered with
+304 Not Modified before the view runs or any template is rendered. While a
+flash message is waiting to be shown the page is rendered and sent no-store
+instead: a 304 would leave the message queued, and a cached copy would keep
+showing it.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+
+def list_etag(request, queryset):
+    """ETag for a list page built from `queryset` as seen by `request.user`."""
+    latest = queryset.aggregate(updated=Max('updated_at'), count=Count('pk'))
+    user = request.user
+    role = getattr(getattr(user, 'profile', None), 'role', '') if user.is_authenticated else ''
+    parts = [
+        latest['updated'].isoformat() if latest['updated'] else '',
+        str(latest['count']),
+        str(user.pk or ''),
+        role,
+        # Pages embed CSRF tokens; a new CSRF cookie must not revive a stale page
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ]
+    return quote_etag(hashlib.sha1('|'.join(parts).encode()).hexdigest())
+
+
+def has_pending_messages(request):
+    """True if a django.contrib.messages message will be shown on this response (without consuming it)."""
+    return len(messages.get_messages(request)) > 0
+
+
+def condition_on_latest(queryset_func):
+    """
+    Decorator: answer GET/HEAD with 304 when nothing in `queryset_func(request)`
+    has changed for this user since their last visit.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrap(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            if has_pending_messages(request):
+                response = view_func(request, *args, **kwargs)
+                patch_cache_control(response, private=True, no_store=True)
+                return response
+
+            etag = list_etag(request, queryset_func(request))
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response['ETag'] = etag
+            # Per-user HTML: browsers may keep it but must revalidate, proxies must not share it
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrap
+    return decorator
@@ -0,0 +1,32 @@
+# FC92_Club/context_processors.py
+import os
+
+from django.conf import settings
+from django.utils import translation
+
+# Changes whenever base.html is redeployed, so cached layout fragments from
+# an older template are never served after a release.
+LAYOUT_VERSION = str(int(os.path.getmtime(os.path.join(settings.BASE_DIR, 'templates', 'base.html'))))
+
+
+def navigation(request):
+    """
+    Role key for the cached navigation fragment in base.html.
+
+    The nav only depends on the role, the superuser flag and the language, so
+    every user sharing those gets the same cached HTML; the role is looked up
+    once here instead of walking user -> profile for every `if` in the nav.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        nav_role = 'anon'
+    else:
+        profile = getattr(user, 'profile', None)
+        nav_role = getattr(profile, 'role', '') or 'none'
+        if user.is_superuser:
+            nav_role += '-su'
+    return {
+        'nav_role': nav_role,
+        'nav_language': translation.get_language(),
+        'layout_version': LAYOUT_VERSION,
+    }
@@ -0,0 +1,133 @@
+# FC92_Club/instrumentation.py
+"""
+Opt-in per-request instrumentation (REQUEST_INSTRUMENTATION = True).
+
+For every request it records the number of SQL queries and the time spent in
+them (through connection.execute_wrapper), template rendering time and total
+latency. The numbers go out as a Server-Timing header, which browser dev tools
+show in the network panel, and as one structured log line per request. Views
+running more queries than REQUEST_QUERY_BUDGET are logged as warnings, which
+is how N+1 regressions show up.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger('FC92_Club.requests')
+
+_current_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Counters for the request currently being handled."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+def current_stats():
+    """Stats of the request being handled in this context, or None."""
+    return _current_stats.get()
+
+
+@contextmanager
+def request_stats():
+    """
+    Yield the stats of the current request, starting collection if no outer
+    middleware has, so several consumers share one set of query wrappers.
+    """
+    stats = _current_stats.get()
+    if stats is not None:
+        yield stats
+        return
+
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _install_template_timer():
+    """Wrap the Django template backend once so render time is attributed to the request."""
+    if getattr(Template.render, 'instrumented', False):
+        return
+    original_render = Template.render
+
+    def render(self, context=None, request=None):
+        stats = _current_stats.get()
+        if stats is None:
+            return original_render(self, context, request)
+        started = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            stats.template_time += time.perf_counter() - started
+
+    render.instrumented = True
+    Template.render = render
+
+
+class RequestInstrumentationMiddleware:
+    """Measure queries, DB time, template time and latency for each request."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.query_budget = getattr(settings, 'REQUEST_QUERY_BUDGET', 30)
+        _install_template_timer()
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with request_stats() as stats:
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': stats.queries,
+            'db_ms': round(stats.db_time * 1000, 1),
+            'template_ms': round(stats.template_time * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+        }
+        logger.info(json.dumps(record), extra={'request_stats': record})
+        if stats.queries > self.query_budget:
+            logger.warning(
+                "Query budget exceeded: %s ran %d queries (budget %d)",
+                view_name or request.path, stats.queries, self.query_budget,
+                extra={'request_stats': record},
+            )
+        return response
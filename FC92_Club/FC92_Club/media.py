@@ -0,0 +1,93 @@
+# FC92_Club/media.py
+"""
+Access-controlled serving of user uploaded media.
+
+Django checks the permissions and answers conditional requests; the bytes
+themselves are handed to the front server when MEDIA_SERVE_MODE says one is
+available:
+
+- 'x-accel'    nginx, with an internal location such as
+                   location /protected-media/ { internal; alias /app/media/; }
+- 'x-sendfile' Apache mod_xsendfile / lighttpd, using the absolute file path
+- 'django'     FileResponse fallback for local runs
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+# Only photo uploads (gallery.models.photo_upload_to) and finished renditions
+# (gallery.renditions.rendition_path) are served; temp files and anything else
+# under MEDIA_ROOT are not found.
+PHOTO_DIR = 'gallery/photos/'
+SERVED_PATH_RE = re.compile(r'^(gallery/photos/[^/]+(?<!\.tmp)|renditions/w\d+/[0-9a-f]{20}\.jpg)$')
+
+# Content-hashed upload names never change contents, optionally with the
+# suffix storage adds when a name is taken.
+HASHED_NAME_RE = re.compile(r'^[0-9a-f]{20}(_[A-Za-z0-9]{7})?\.[A-Za-z0-9]+$')
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def is_content_hashed(path):
+    # Rendition names hash the photo, not the rendered bytes, so only uploads qualify
+    return path.startswith(PHOTO_DIR) and bool(HASHED_NAME_RE.match(os.path.basename(path)))
+
+
+def _file_response(request, path, full_path, content_type):
+    mode = getattr(settings, 'MEDIA_SERVE_MODE', 'django')
+    if mode == 'x-accel':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + quote(path)
+    elif mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    else:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    return response
+
+
+def media_file_response(request, path):
+    """
+    Build the response for `path` (relative to MEDIA_ROOT): conditional GET
+    handling, validators, cache headers and the configured transfer mode.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("Media file not found.")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found.")
+
+    etag = quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        response = _file_response(request, path, full_path, content_type)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    # Private: the files are members-only, so shared caches must not keep them
+    if is_content_hashed(path):
+        patch_cache_control(response, private=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@require_safe
+@login_required
+def serve_media(request, path):
+    """Serve a photo or rendition from MEDIA_ROOT to logged-in members."""
+    if not SERVED_PATH_RE.match(path):
+        raise Http404("Media file not found.")
+    return media_file_response(request, path)
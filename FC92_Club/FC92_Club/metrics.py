@@ -0,0 +1,113 @@
+# FC92_Club/metrics.py
+"""
+Prometheus metrics (METRICS_ENABLED = True), exported at /metrics.
+
+Series are labelled with the resolved URL name (`users:member_list`,
+`gallery:event_detail`, ...) so each hot path can be graphed on its own.
+
+With several gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to a directory
+shared by the workers (and emptied on deploy). Every worker then writes its
+samples there and a scrape of any worker returns the aggregate across all of
+them; gunicorn.conf.py cleans up after workers that exit.
+"""
+import hmac
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+from .cache import cache_stats
+from .instrumentation import request_stats
+
+REQUEST_LATENCY = Histogram(
+    'fc92_request_duration_seconds', 'Request latency by URL name.',
+    ['view', 'method'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    'fc92_request_db_queries', 'SQL queries per request by URL name.',
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+REQUEST_DB_TIME = Counter('fc92_request_db_seconds', 'Time spent in SQL by URL name.', ['view'])
+UPLOAD_BYTES = Counter('fc92_upload_bytes', 'Bytes received in multipart uploads by URL name.', ['view'])
+CACHE_LOOKUPS = Counter('fc92_cache_lookups', 'Cache lookups by result (local_hit, shared_hit, miss).', ['result'])
+WORKER_MEMORY = Gauge(
+    'fc92_worker_resident_memory_bytes', 'Resident memory of each worker process.',
+    multiprocess_mode='liveall',
+)
+
+_CACHE_RESULTS = {'local_hits': 'local_hit', 'shared_hits': 'shared_hit', 'misses': 'miss'}
+_cache_seen = dict.fromkeys(_CACHE_RESULTS, 0)
+_cache_seen_lock = threading.Lock()
+
+
+def _resident_memory():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource  # Not Linux: fall back to peak RSS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _export_cache_stats():
+    # cache_stats() are per-process running totals; export only what's new
+    stats = cache_stats()
+    with _cache_seen_lock:
+        for name, result in _CACHE_RESULTS.items():
+            delta = stats[name] - _cache_seen[name]
+            if delta > 0:
+                CACHE_LOOKUPS.labels(result).inc(delta)
+                _cache_seen[name] = stats[name]
+
+
+class MetricsMiddleware:
+    """Record request, query, upload, cache and memory metrics."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with request_stats() as stats:
+            response = self.get_response(request)
+
+        view = request.resolver_match.view_name if request.resolver_match else '<unresolved>'
+        REQUEST_LATENCY.labels(view, request.method).observe(time.perf_counter() - started)
+        REQUEST_QUERIES.labels(view).observe(stats.queries)
+        REQUEST_DB_TIME.labels(view).inc(stats.db_time)
+        if request.content_type == 'multipart/form-data':
+            UPLOAD_BYTES.labels(view).inc(int(request.META.get('CONTENT_LENGTH') or 0))
+        _export_cache_stats()
+        WORKER_MEMORY.set(_resident_memory())
+        return response
+
+
+def _metrics_allowed(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+            return True
+    return request.user.is_authenticated and request.user.is_superuser
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint: bearer METRICS_TOKEN or a logged-in superuser."""
+    if not _metrics_allowed(request):
+        raise PermissionDenied
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
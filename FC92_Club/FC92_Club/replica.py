@@ -0,0 +1,83 @@
+# FC92_Club/replica.py
+"""
+Read-replica routing for reports and exports.
+
+Nothing is sent to the replica implicitly: only code inside
+`replica_reads()` (or a view decorated with `@read_from_replica`) reads from
+REPLICA_DATABASE; every other read and all writes go to the primary. A user
+who has just submitted a form is pinned to the primary for
+REPLICA_STICKY_SECONDS, so a report opened right after recording a payment
+shows it even if the replica lags behind.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_COOKIE = 'fc92_primary'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Send reads made inside the block to the replica, if one is configured."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def read_from_replica(view_func):
+    """
+    Decorator for read-only views: GET/HEAD requests read from the replica
+    unless the user wrote something within the last REPLICA_STICKY_SECONDS.
+    Put it below the permission decorators so access checks use the primary.
+    """
+    @wraps(view_func)
+    def wrap(request, *args, **kwargs):
+        if (not settings.REPLICA_DATABASE or request.method not in ('GET', 'HEAD')
+                or STICKY_COOKIE in request.COOKIES):
+            return view_func(request, *args, **kwargs)
+        with replica_reads():
+            return view_func(request, *args, **kwargs)
+    return wrap
+
+
+class ReplicaRouter:
+    """Route reads inside `replica_reads()` to the replica; everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if not settings.REPLICA_DATABASE:
+            return None
+        # Explicitly the primary otherwise, or related lookups would follow
+        # an instance that was loaded from the replica
+        return settings.REPLICA_DATABASE if _replica_reads.get() else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Same data on every alias
+
+
+class ReplicaStickinessMiddleware:
+    """Pin a client to the primary for a few seconds after any unsafe request."""
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+            )
+        return response
@@ -50,9 +50,14 @@ INSTALLED_APPS = [
     'pages.apps.PagesConfig',
     'django.contrib.humanize',
     'gallery.apps.GalleryConfig',
+    'diagnostics.apps.DiagnosticsConfig',
 ]
 
 MIDDLEWARE = [
+    # Outermost so it times the whole stack; inactive unless REQUEST_INSTRUMENTATION is on
+    'FC92_Club.instrumentation.RequestInstrumentationMiddleware',
+    'FC92_Club.metrics.MetricsMiddleware',  # Inactive unless METRICS_ENABLED is on
+    'diagnostics.slowlog.SlowQueryMiddleware',  # Inactive unless SLOW_QUERY_MS is set
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -62,8 +67,30 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'FC92_Club.admin_access.AdminAccessMiddleware',  # Add our custom middleware
+    'diagnostics.profiler.ProfilerMiddleware',  # Superusers only: ?_profile=1 or X-Profile: 1
+    'FC92_Club.replica.ReplicaStickinessMiddleware',  # Inactive unless a replica is configured
 ]
 
+# Per-request query/timing instrumentation (Server-Timing header + log lines)
+REQUEST_INSTRUMENTATION = config('REQUEST_INSTRUMENTATION', default=False, cast=bool)
+REQUEST_QUERY_BUDGET = config('REQUEST_QUERY_BUDGET', default=30, cast=int)
+
+# Prometheus metrics at /metrics (see FC92_Club/metrics.py). Scrapers send
+# "Authorization: Bearer <METRICS_TOKEN>"; superusers can view it when logged in.
+METRICS_ENABLED = config('METRICS_ENABLED', default=False, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Slow-query log (see diagnostics/slowlog.py); 0 turns it off. On PostgreSQL a
+# sample of slow SELECTs is re-run under EXPLAIN (ANALYZE, BUFFERS) off the request path.
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=0, cast=int)
+SLOW_QUERY_EXPLAIN_RATE = config('SLOW_QUERY_EXPLAIN_RATE', default=0.1, cast=float)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 10000
+SLOW_QUERY_RETENTION_DAYS = 14
+
+# On-demand cProfile of single requests for superusers (see diagnostics/profiler.py)
+REQUEST_PROFILER = config('REQUEST_PROFILER', default=True, cast=bool)
+REQUEST_PROFILER_KEEP = 50
+
 ROOT_URLCONF = 'FC92_Club.urls'
 
 TEMPLATES = [
@@ -72,13 +99,21 @@ TEMPLATES = [
         'DIRS': [
             os.path.join(BASE_DIR, 'templates'),  # Make sure this points to your templates directory
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'FC92_Club.context_processors.navigation',
+            ],
+            # Compiled templates are kept in memory in every environment;
+            # runserver's autoreloader still resets them when a template changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -90,16 +125,82 @@ WSGI_APPLICATION = 'FC92_Club.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-SQL_DATABASE = config('SQL_DATABASE')
-SQL_USER = config('SQL_USER')
-SQL_PASSWORD = config('SQL_PASSWORD')
-SQL_HOST = config('SQL_HOST')
-SQL_PORT = config('SQL_PORT')
-
-DATABASE_URL = f"postgres://{SQL_USER}:{SQL_PASSWORD}@{SQL_HOST}:{SQL_PORT}/{SQL_DATABASE}"
+# DATABASE_URL wins when set; otherwise the URL is built from the SQL_* variables
+DATABASE_URL = config('DATABASE_URL', default='')
+if not DATABASE_URL:
+    SQL_DATABASE = config('SQL_DATABASE')
+    SQL_USER = config('SQL_USER')
+    SQL_PASSWORD = config('SQL_PASSWORD')
+    SQL_HOST = config('SQL_HOST')
+    SQL_PORT = config('SQL_PORT')
+    DATABASE_URL = f"postgres://{SQL_USER}:{SQL_PASSWORD}@{SQL_HOST}:{SQL_PORT}/{SQL_DATABASE}"
 
 DATABASES = {
-    'default': dj_database_url.config(default=DATABASE_URL, conn_max_age=600)
+    'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600)
+}
+
+# Connection pooling (PostgreSQL with psycopg 3). Each process keeps
+# DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE open connections and hands them to
+# requests instead of every worker holding one persistent connection; a
+# connection is checked before reuse, so a server restart costs no errors.
+# Size the pool by threads per worker: a sync gunicorn worker needs 1-2.
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+if DB_POOL and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # Pooled connections go back to the pool after each request
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),  # Seconds to wait for a free connection
+        'max_idle': 300,
+        'max_lifetime': 1800,
+        'check': ConnectionPool.check_connection,
+    }
+else:
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True  # Drop dead persistent connections instead of failing a request
+
+# Optional read replica (see FC92_Club/replica.py). Only views decorated with
+# @read_from_replica and code inside replica_reads() use it; clients are
+# pinned to the primary for REPLICA_STICKY_SECONDS after submitting a form.
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL, conn_max_age=600)
+    DATABASES['replica']['CONN_HEALTH_CHECKS'] = True
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+REPLICA_DATABASE = 'replica' if DATABASE_REPLICA_URL else None
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+# Calendar years of dues and payments kept row by row and shown by default;
+# earlier years can be folded into per-member totals (manage.py archive_ledgers)
+FINANCE_OPEN_YEARS = config('FINANCE_OPEN_YEARS', default=2, cast=int)
+# Most users the admin's "Download PDF statements" action renders, inside the
+# web request; larger selections go through manage.py export_statements
+STATEMENT_DOWNLOAD_LIMIT = config('STATEMENT_DOWNLOAD_LIMIT', default=25, cast=int)
+DATABASE_ROUTERS = ['FC92_Club.replica.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# 'default' is a per-process LRU in front of the 'shared' cache that all
+# gunicorn workers use (see FC92_Club/cache.py). Point CACHE_BACKEND and
+# CACHE_LOCATION at Redis/Memcached/database cache in production.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'FC92_Club.cache.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_TIMEOUT': config('CACHE_LOCAL_TIMEOUT', default=5, cast=int),
+            'LOCAL_MAX_ENTRIES': 1000,
+        },
+    },
+    'shared': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=os.path.join(BASE_DIR, '.cache')),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
 
 
@@ -150,9 +251,11 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-# Create static directory if it doesn't exist
-os.makedirs(os.path.join(BASE_DIR, 'static'), exist_ok=True)
-os.makedirs(os.path.join(BASE_DIR, 'staticfiles'), exist_ok=True)
+# Media is served by FC92_Club.media.serve_media after a login check.
+# 'x-accel' (nginx) or 'x-sendfile' (Apache/lighttpd) hand the transfer to the
+# front server; 'django' streams the file from Python for local runs.
+MEDIA_SERVE_MODE = config('MEDIA_SERVE_MODE', default='django')
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -172,15 +275,17 @@ LOGIN_URL = 'login'  # URL to redirect to for login
 LOGOUT_REDIRECT_URL = 'pages:home'  # Redirect to home after logout
 
 # Email Configuration
-if DEBUG:
-    EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+if EMAIL_BACKEND != 'django.core.mail.backends.smtp.EmailBackend':
+    # Console/locmem/file backends need no SMTP server
+    DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@fc92club.local')
+elif DEBUG:
     EMAIL_HOST = 'mailhog'  # Service name from docker-compose
     EMAIL_PORT = 1025       # MailHog SMTP port
     EMAIL_USE_TLS = False
     EMAIL_HOST_USER = ''
     EMAIL_HOST_PASSWORD = ''
 else:
-    EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
     EMAIL_HOST = config('EMAIL_HOST')
     EMAIL_PORT = config('EMAIL_PORT', cast=int)
     EMAIL_HOST_USER = config('EMAIL_HOST_USER')
@@ -189,6 +294,24 @@ else:
     DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
 
 
+# Logging
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'FC92_Club': {
+            'handlers': ['console'],
+            'level': config('APP_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
+
+
 # Session settings
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 86400  # 24 hours
@@ -0,0 +1,62 @@
+"""
+Settings for tests, benchmarks and local runs without Postgres, SMTP or secrets.
+
+    DJANGO_SETTINGS_MODULE=FC92_Club.settings_local python manage.py test --parallel
+    DJANGO_SETTINGS_MODULE=FC92_Club.settings_local python manage.py runserver
+
+Everything comes from settings.py except the database (SQLite in WAL mode,
+in memory under the test runner, plus a stand-in replica alias), email (kept in memory), caches (in
+process), password hashing (fast) and secure-cookie flags (plain HTTP).
+Environment variables still override the defaults below.
+"""
+import os
+from pathlib import Path
+
+# Values settings.py requires but that mean nothing locally
+os.environ.setdefault('SECRET_KEY', 'local-only-insecure-key')
+os.environ.setdefault('DEBUG', 'True')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{Path(__file__).resolve().parent.parent / 'db.sqlite3'}")
+os.environ.setdefault('EMAIL_BACKEND', 'django.core.mail.backends.locmem.EmailBackend')
+
+from .settings import *  # noqa: E402,F401,F403
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        # WAL lets the dev server, benchmarks and a shell read while another writes;
+        # synchronous=NORMAL is safe with WAL and skips most fsyncs
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'PRAGMA mmap_size=268435456;'  # 256 MB
+            'PRAGMA cache_size=-65536;'  # 64 MB
+            'PRAGMA temp_store=MEMORY;'
+        ),
+        'transaction_mode': 'IMMEDIATE',  # Take the write lock up front instead of failing on upgrade
+        'timeout': 20,
+    }
+    if 'replica' not in DATABASES:
+        # Stand-in replica: a second connection to the same file locally and a
+        # separate in-memory database under the test runner. Routing stays off
+        # unless REPLICA_DATABASE is set, as the replica tests do.
+        DATABASES['replica'] = {**DATABASES['default'], 'OPTIONS': dict(DATABASES['default']['OPTIONS'])}
+
+# In-process caches: nothing is written to .cache/ and nothing leaks between runs
+CACHES = {
+    'default': {
+        'BACKEND': 'FC92_Club.cache.TieredCache',
+        'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 5, 'LOCAL_MAX_ENTRIES': 1000},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fc92-shared',
+    },
+}
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',  # Fast; never use outside this profile
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+]
+
+SESSION_COOKIE_SECURE = False
+CSRF_COOKIE_SECURE = False
@@ -0,0 +1,194 @@
+# FC92_Club/testing.py
+"""
+Shared fixtures for the query-budget tests in each app's tests.py.
+
+QueryBudgetTestCase seeds a fixed mid-size club (staff, members with dues and
+payments, events with photos, announcements) and provides
+`assertQueryBudget()`, which requests a URL, grows every table, requests it
+again and fails if the query count changed or exceeds the budget. A view
+that picks up an N+1 therefore fails even if it would still fit the budget
+at the fixture's size.
+"""
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from finances.models import Due, Payment
+from gallery.models import Event, Photo
+from pages.models import Announcement
+from users.models import Profile
+
+User = get_user_model()
+
+MEMBERS = 20
+LEDGER_ROWS = 5 # Dues and payments per member
+EVENTS = 12 # More than one page of the event list
+PHOTOS_PER_EVENT = 4
+ANNOUNCEMENTS = 12 # More than one page of the archive
+PHOTO_FILES = ['gallery/photos/budget-a.jpg', 'gallery/photos/budget-b.jpg']
+
+# The production layout (a per-process tier in front of a shared one), kept in memory
+TEST_CACHES = {
+    'default': {'BACKEND': 'FC92_Club.cache.TieredCache', 'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 5}},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-budget-shared'},
+}
+
+
+def _write_photo_files():
+    for i, name in enumerate(PHOTO_FILES):
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            Image.new('RGB', (64, 48), (40 * i, 90, 160)).save(path, 'JPEG')
+
+
+def make_user(username, role='MEM', **fields):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='x', **fields)
+    Profile.objects.filter(user=user).update(role=role)
+    user.refresh_from_db()
+    return user
+
+
+def add_members(count, recorded_by, start=0):
+    """`count` members, each with LEDGER_ROWS dues and payments."""
+    users = [
+        make_user(f'member{i:03d}', first_name=f'First{i}', last_name=f'Last{i}')
+        for i in range(start, start + count)
+    ]
+    profiles = [user.profile for user in users]
+    today = date.today()
+    Due.objects.bulk_create([
+        Due(member=profile, amount_due=Decimal('5000.00'), description=f'Due {n}', due_date=today - timedelta(days=30 * n))
+        for profile in profiles for n in range(LEDGER_ROWS)
+    ])
+    Payment.objects.bulk_create([
+        Payment(member=profile, amount_paid=Decimal('4000.00'), payment_date=today - timedelta(days=30 * n), recorded_by=recorded_by)
+        for profile in profiles for n in range(LEDGER_ROWS)
+    ])
+    return users
+
+
+def add_events(count, created_by, start=0):
+    """`count` published events, each with PHOTOS_PER_EVENT photos."""
+    now = timezone.now()
+    events = [
+        Event.objects.create(
+            title=f'Event {i}', description='Club event.', date=now - timedelta(days=i),
+            location='Lagos', created_by=created_by, is_published=True,
+        )
+        for i in range(start, start + count)
+    ]
+    Photo.objects.bulk_create([
+        Photo(event=event, image=PHOTO_FILES[n % len(PHOTO_FILES)], caption=f'Photo {n}', uploaded_by=created_by)
+        for event in events for n in range(PHOTOS_PER_EVENT)
+    ])
+    return events
+
+
+def add_announcements(count, author, start=0):
+    now = timezone.now()
+    return [
+        Announcement.objects.create(
+            title=f'Announcement {i}', content='Hello **members**.', author=author,
+            publish_date=now - timedelta(hours=i + 1),
+        )
+        for i in range(start, start + count)
+    ]
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class QueryBudgetTestCase(TestCase):
+    """Base class: fixed dataset plus query-budget assertions."""
+
+    @classmethod
+    def setUpClass(cls):
+        # A MEDIA_ROOT per class, removed with it; in place before setUpTestData writes the photos
+        media_root = tempfile.mkdtemp(prefix='fc92-test-media-')
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        cls.addClassCleanup(media_override.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        _write_photo_files()
+        cls.admin = make_user('admin', role='ADM', first_name='Club', last_name='Admin')
+        cls.fs = make_user('treasurer', role='FS', first_name='Club', last_name='Treasurer')
+        cls.superuser = make_user('root', is_superuser=True, is_staff=True)
+        cls.members = add_members(MEMBERS, recorded_by=cls.fs)
+        cls.member = cls.members[0]
+        cls.events = add_events(EVENTS, created_by=cls.admin)
+        cls.event = cls.events[0]
+        cls.photo = cls.event.photos.first()
+        cls.announcements = add_announcements(ANNOUNCEMENTS, author=cls.admin)
+
+    def setUp(self):
+        self.growth = 0
+
+    def grow(self):
+        """Add as many rows again as the fixture has, attached to the objects tests look at."""
+        self.growth += 1
+        add_members(MEMBERS, recorded_by=self.fs, start=MEMBERS * self.growth)
+        today = date.today()
+        Due.objects.bulk_create([
+            Due(member=self.member.profile, amount_due=Decimal('100.00'), description=f'Extra {n}', due_date=today)
+            for n in range(LEDGER_ROWS)
+        ])
+        Payment.objects.bulk_create([
+            Payment(member=self.member.profile, amount_paid=Decimal('100.00'), payment_date=today, recorded_by=self.admin)
+            for n in range(LEDGER_ROWS)
+        ])
+        add_events(EVENTS, created_by=self.admin, start=EVENTS * self.growth)
+        Photo.objects.bulk_create([
+            Photo(event=self.event, image=PHOTO_FILES[n % len(PHOTO_FILES)], caption=f'Extra {n}', uploaded_by=self.fs)
+            for n in range(PHOTOS_PER_EVENT)
+        ])
+        add_announcements(ANNOUNCEMENTS, author=self.fs, start=ANNOUNCEMENTS * self.growth)
+
+    def request(self, url, user=None, method='get', data=None, **extra):
+        """Make a request; return the response and the number of queries it ran."""
+        if user is not None:
+            self.client.force_login(user)
+        else:
+            self.client.logout()
+        for cache in caches.all():
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, **extra)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response, len(queries)
+
+    def assertQueryBudget(self, budget, url, user=None, method='get', data=None, status=200, grow=True, **extra):
+        """
+        Request `url` and assert it runs at most `budget` queries. Unless
+        `grow` is False (for requests that change data), the request is
+        repeated after `grow()` and must run exactly as many queries again.
+        """
+        response, count = self.request(url, user, method, data, **extra)
+        self.assertEqual(response.status_code, status, f"{method.upper()} {url}")
+        self.assertLessEqual(count, budget, f"{method.upper()} {url} ran {count} queries (budget {budget})")
+        if grow:
+            self.grow()
+            response, grown_count = self.request(url, user, method, data, **extra)
+            self.assertEqual(
+                grown_count, count,
+                f"{method.upper()} {url} ran {count} queries, then {grown_count} with more rows: likely an N+1",
+            )
+        return response
@@ -13,7 +13,19 @@ from finances.models import Due, Payment
 
 User = get_user_model()
 
+def update_profile(user, **fields):
+    # The post_save signal already created the profile; fill it in
+    profile = Profile.objects.get(user=user)
+    for name, value in fields.items():
+        setattr(profile, name, value)
+    profile.save()
+    return profile
+
 def create_test_data():
+    if User.objects.filter(username='testadmin').exists():
+        print("Test data already exists. For larger datasets use: python manage.py seed")
+        return
+
     # Create admin user
     admin_user = User.objects.create_user(
         username='testadmin',
@@ -23,14 +35,14 @@ def create_test_data():
         last_name='Admin',
         is_staff=True
     )
-    admin_profile = Profile.objects.create(
-        user=admin_user,
-        role=Profile.Role.ADMIN,
+    update_profile(
+        admin_user,
+        role='ADM',
         status='ACT',
-        phone='1234567890',
+        phone_number='1234567890',
         address='123 Admin Street',
         city='London',
-        country='UK'
+        country='GB'
     )
 
     # Create financial secretary
@@ -42,14 +54,14 @@ def create_test_data():
         last_name='Financial',
         middle_name='Secretary'
     )
-    fs_profile = Profile.objects.create(
-        user=fs_user,
-        role=Profile.Role.FINANCIAL_SECRETARY,
+    update_profile(
+        fs_user,
+        role='FS',
         status='ACT',
-        phone='0987654321',
+        phone_number='0987654321',
         address='456 Finance Street',
         city='London',
-        country='UK'
+        country='GB'
     )
 
     # Create regular members
@@ -64,7 +76,7 @@ def create_test_data():
             'phone': '1112223333',
             'address': '789 Member Street',
             'city': 'London',
-            'country': 'UK'
+            'country': 'GB'
         },
         {
             'username': 'testmember2',
@@ -76,7 +88,7 @@ def create_test_data():
             'phone': '4445556666',
             'address': '321 Member Avenue',
             'city': 'London',
-            'country': 'UK'
+            'country': 'GB'
         }
     ]
 
@@ -89,11 +101,11 @@ def create_test_data():
             middle_name=member_data['middle_name'],
             last_name=member_data['last_name']
         )
-        profile = Profile.objects.create(
-            user=user,
-            role=Profile.Role.MEMBER,
+        profile = update_profile(
+            user,
+            role='MEM',
             status='ACT',
-            phone=member_data['phone'],
+            phone_number=member_data['phone'],
             address=member_data['address'],
             city=member_data['city'],
             country=member_data['country']
@@ -0,0 +1,19 @@
+# diagnostics/admin.py
+from django.contrib import admin
+from .models import RequestProfile, SlowQuery
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'duration_ms', 'view', 'database')
+    list_filter = ('view', 'database')
+    search_fields = ('statement', 'view', 'path')
+    date_hierarchy = 'created_at'
+    readonly_fields = [f.name for f in SlowQuery._meta.fields]
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'view', 'duration_ms', 'queries', 'user')
+    list_filter = ('view',)
+    exclude = ('stats',)
+    readonly_fields = [f.name for f in RequestProfile._meta.fields if f.name != 'stats']
@@ -0,0 +1,125 @@
+# diagnostics/management/commands/bench_db_connections.py
+import copy
+import json
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+from .benchmark import percentile
+
+MODES = ('persistent', 'per-request', 'pool')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare PostgreSQL connection handling under concurrent short requests: persistent "
+        "connections (CONN_MAX_AGE=600), a new connection per request, and a psycopg 3 pool. "
+        "Reports latency percentiles and how many server connections each mode opened."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', choices=MODES, help="Mode to run (repeatable; default: all).")
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent simulated request handlers.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per thread.")
+        parser.add_argument('--pool-min', type=int, default=2)
+        parser.add_argument('--pool-max', type=int, default=4, help="Fewer than --threads makes requests queue for a connection.")
+        parser.add_argument('--output', help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'postgresql':
+            raise CommandError("This benchmark needs PostgreSQL as the default database.")
+        modes = options['mode'] or MODES
+        if 'pool' in modes:
+            from django.db.backends.postgresql.psycopg_any import is_psycopg3
+            if not is_psycopg3:
+                raise CommandError("The pool mode needs psycopg 3 with psycopg_pool: pip install 'psycopg[binary,pool]'.")
+
+        results = {}
+        for mode in modes:
+            alias = self.add_alias(mode, options['pool_min'], options['pool_max'])
+            try:
+                results[mode] = self.run(alias, options['threads'], options['requests'])
+            finally:
+                if mode == 'pool':
+                    connections[alias].close_pool()
+                connections.settings.pop(alias)
+            self.report(mode, results[mode])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'threads': options['threads'], 'requests': options['requests'], 'results': results}, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def add_alias(self, mode, pool_min, pool_max):
+        """Register a copy of the default database configured for `mode`."""
+        alias = f'bench_{mode.replace("-", "_")}'
+        config = copy.deepcopy(connections.settings['default'])
+        config['OPTIONS'].pop('pool', None)
+        if mode == 'persistent':
+            config.update(CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True)
+        else:
+            config['CONN_MAX_AGE'] = 0
+        if mode == 'pool':
+            from psycopg_pool import ConnectionPool
+            config['OPTIONS']['pool'] = {
+                'min_size': pool_min, 'max_size': pool_max, 'timeout': 30,
+                'check': ConnectionPool.check_connection,
+            }
+        connections.settings[alias] = config
+        return alias
+
+    def run(self, alias, threads, requests):
+        timings, backends, errors = [], set(), []
+        lock = threading.Lock()
+
+        def worker():
+            local_timings, local_backends = [], set()
+            try:
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    # The signals close expired connections (or return them to the pool)
+                    # exactly as they do around a real request
+                    request_started.send(sender=self.__class__)
+                    with connections[alias].cursor() as cursor:
+                        cursor.execute("SELECT pg_backend_pid()")
+                        local_backends.add(cursor.fetchone()[0])
+                    request_finished.send(sender=self.__class__)
+                    local_timings.append((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections[alias].close()
+                with lock:
+                    timings.extend(local_timings)
+                    backends.update(local_backends)
+
+        handlers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for handler in handlers:
+            handler.start()
+        for handler in handlers:
+            handler.join()
+        elapsed = time.perf_counter() - started
+        if errors:
+            raise CommandError(f"{len(errors)} thread(s) failed; first error: {errors[0]}")
+
+        timings.sort()
+        return {
+            'requests': len(timings),
+            'connections_opened': len(backends),
+            'requests_per_second': round(len(timings) / elapsed, 1),
+            'median_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+            'max_ms': round(timings[-1], 2),
+        }
+
+    def report(self, mode, result):
+        self.stdout.write(
+            f"{mode:<12}{result['connections_opened']:>7,} connections{result['requests_per_second']:>10.0f} req/s"
+            f"{result['median_ms']:>9.2f} ms median{result['p99_ms']:>9.2f} ms p99{result['max_ms']:>9.2f} ms max"
+        )
@@ -0,0 +1,182 @@
+# diagnostics/management/commands/benchmark.py
+import json
+import os
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from finances.models import Due, Payment
+from gallery.models import Event, Photo
+from users.models import Profile
+
+DEFAULT_OUTPUT_DIR = os.path.join(settings.BASE_DIR, 'benchmarks')
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot views and exports with the test client and write the results as JSON. "
+        "Run `manage.py seed` first; pass --compare to diff against an earlier result file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20, help="Timed requests per page.")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests per page first.")
+        parser.add_argument('--admin', default='seed_admin', help="Admin account for the staff pages.")
+        parser.add_argument('--member', help="Member whose status page is timed (default: the one with the most dues).")
+        parser.add_argument('--only', action='append', help="Only run the named case (repeatable).")
+        parser.add_argument('--output', help=f"Result file (default: {DEFAULT_OUTPUT_DIR}/<timestamp>.json).")
+        parser.add_argument('--compare', help="Earlier result file to compare against.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            admin = User.objects.get(username=options['admin'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['admin']}' does not exist. Run `manage.py seed` first.")
+
+        cases = self.cases(admin, options['member'])
+        if options['only']:
+            unknown = set(options['only']) - {name for name, *_ in cases}
+            if unknown:
+                raise CommandError(f"Unknown case(s): {', '.join(sorted(unknown))}")
+            cases = [case for case in cases if case[0] in options['only']]
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, url, user in cases:
+                results[name] = self.measure(url, user, options['warmup'], options['requests'])
+                self.report(name, results[name])
+
+        payload = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': self.git_commit(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'dataset': {
+                'members': Profile.objects.count(),
+                'dues': Due.objects.count(),
+                'payments': Payment.objects.count(),
+                'events': Event.objects.count(),
+                'photos': Photo.objects.count(),
+            },
+            'results': results,
+        }
+        output = options['output'] or os.path.join(
+            DEFAULT_OUTPUT_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(payload, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def cases(self, admin, member_username):
+        members = Profile.objects.filter(role='MEM')
+        if member_username:
+            member = members.filter(user__username=member_username).select_related('user').first()
+        else:
+            member = members.annotate(due_count=Count('dues')).order_by('-due_count').select_related('user').first()
+        if member is None:
+            raise CommandError("No member to benchmark. Run `manage.py seed` first.")
+        event = Event.objects.annotate(photo_count=Count('photos')).order_by('-photo_count').first()
+
+        cases = [
+            ('home_page', reverse('pages:home'), None),
+            ('member_list', reverse('users:member_list'), admin),
+            ('member_search', reverse('users:member_search') + f'?q={member.user.last_name[:3].lower()}', admin),
+            ('financial_report', reverse('users:financial_report'), admin),
+            ('member_financial_status', reverse('finances:member_financial_status', args=[member.pk]), admin),
+            ('my_financial_status', reverse('finances:my_financial_status'), member.user),
+            ('member_statement', reverse('finances:member_statement', args=[member.pk]), admin),
+            ('member_statement_csv', reverse('finances:member_statement', args=[member.pk]) + '?format=csv', admin),
+            ('event_list', reverse('gallery:event_list'), member.user),
+        ]
+        if event is not None:
+            cases += [
+                ('event_detail', reverse('gallery:event_detail', args=[event.pk]), member.user),
+                ('event_download', reverse('gallery:event_download', args=[event.pk]), member.user),
+            ]
+        return cases
+
+    def measure(self, url, user, warmup, total):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        for _ in range(warmup):
+            self.fetch(client, url)
+
+        with CaptureQueriesContext(connection) as queries:
+            status, size = self.fetch(client, url)
+        query_count = len(queries) # Read now: the query log is reset on every request
+
+        timings = []
+        for _ in range(total):
+            started = time.perf_counter()
+            self.fetch(client, url)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            'url': url,
+            'status': status,
+            'bytes': size,
+            'queries': query_count,
+            'min_ms': round(timings[0], 2),
+            'median_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+        }
+
+    def fetch(self, client, url):
+        response = client.get(url)
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        return response.status_code, size
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<26}{result['status']:>5}{result['queries']:>6} q"
+            f"{result['median_ms']:>10.1f} ms median{result['p95_ms']:>10.1f} ms p95{result['bytes']:>12,} B"
+        )
+
+    def compare(self, path, results):
+        with open(path) as f:
+            previous = json.load(f)
+        self.stdout.write(f"\nCompared with {path} ({previous.get('commit') or 'unknown commit'}):")
+        for name, result in results.items():
+            before = previous['results'].get(name)
+            if before is None:
+                continue
+            change = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100 if before['median_ms'] else 0
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+            self.stdout.write(style(
+                f"{name:<26}{before['median_ms']:>9.1f} -> {result['median_ms']:>7.1f} ms ({change:+.0f}%)"
+                f"{before['queries']:>6} -> {result['queries']} queries"
+            ))
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-19 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40)),
+                ('statement', models.TextField()),
+                ('sql', models.TextField()),
+                ('params', models.TextField(blank=True)),
+                ('duration_ms', models.FloatField()),
+                ('database', models.CharField(default='default', max_length=100)),
+                ('view', models.CharField(blank=True, max_length=200)),
+                ('path', models.CharField(blank=True, max_length=500)),
+                ('stack', models.TextField(blank=True)),
+                ('plan', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['fingerprint', '-created_at'], name='slowquery_fingerprint_idx'), models.Index(fields=['created_at'], name='slowquery_created_idx')],
+            },
+        ),
+    ]
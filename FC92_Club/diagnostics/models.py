@@ -0,0 +1,47 @@
+# diagnostics/models.py
+from django.conf import settings
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """One SQL statement that ran longer than SLOW_QUERY_MS (see slowlog.py)."""
+    fingerprint = models.CharField(max_length=40) # Hash of `statement`
+    statement = models.TextField() # SQL with literals and parameters replaced by ?
+    sql = models.TextField()
+    params = models.TextField(blank=True)
+    duration_ms = models.FloatField()
+    database = models.CharField(max_length=100, default='default')
+    view = models.CharField(max_length=200, blank=True)
+    path = models.CharField(max_length=500, blank=True)
+    stack = models.TextField(blank=True) # Project frames only
+    plan = models.TextField(blank=True) # EXPLAIN (ANALYZE, BUFFERS) when sampled
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f} ms in {self.view or self.path or 'unknown view'}"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['fingerprint', '-created_at'], name='slowquery_fingerprint_idx'),
+            models.Index(fields=['created_at'], name='slowquery_created_idx'),
+        ]
+
+
+class RequestProfile(models.Model):
+    """cProfile run of one request, taken on demand by a superuser (see profiler.py)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    queries = models.PositiveIntegerField(default=0)
+    stats = models.BinaryField() # pstats file contents (marshal), loadable by snakeviz etc.
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+    class Meta:
+        ordering = ['-created_at']
@@ -0,0 +1,137 @@
+# diagnostics/profiler.py
+"""
+On-demand request profiler for superusers (REQUEST_PROFILER = True).
+
+A superuser adds `?_profile=1` to a URL, or sends an `X-Profile: 1` header,
+and that one request runs under cProfile. The result is stored as a
+RequestProfile, listed at /diagnostics/profiles/ and linked from the
+response's X-Profile-URL header. Nobody else can trigger it, so leaving it
+enabled in production costs one flag check per request.
+"""
+import cProfile
+import marshal
+import os
+import pstats
+import sysconfig
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import reverse
+
+from FC92_Club.instrumentation import request_stats
+
+PROFILE_QUERY_FLAG = '_profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+# cProfile can only run once per process at a time
+_profiling = threading.Lock()
+
+
+def profile_requested(request):
+    if request.GET.get(PROFILE_QUERY_FLAG) != '1' and request.META.get(PROFILE_HEADER) != '1':
+        return False
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and user.is_superuser)
+
+
+def load_stats(profile):
+    """pstats.Stats for a stored RequestProfile."""
+    stats = pstats.Stats()
+    stats.stats = marshal.loads(bytes(profile.stats))
+    stats.get_top_level_stats()
+    return stats
+
+
+_PATH_PREFIXES = sorted({
+    str(settings.BASE_DIR) + os.sep,
+    sysconfig.get_paths()['purelib'] + os.sep,
+    sysconfig.get_paths()['stdlib'] + os.sep,
+}, key=len, reverse=True)
+
+
+def _short_filename(filename):
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def top_functions(profile, sort='cumulative', limit=40):
+    """The `limit` costliest functions as dicts, by cumulative or own time."""
+    stats = load_stats(profile)
+    key = 3 if sort == 'cumulative' else 2 # Index of ct / tt in a pstats entry
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][key], reverse=True)[:limit]
+    total = stats.total_tt or 1
+    functions = []
+    for (filename, line, name), (primitive_calls, calls, own_time, cumulative_time, _callers) in rows:
+        functions.append({
+            'function': name,
+            'location': f'{_short_filename(filename)}:{line}' if line else filename,
+            'calls': calls if calls == primitive_calls else f'{calls}/{primitive_calls}',
+            'own_ms': own_time * 1000,
+            'cumulative_ms': cumulative_time * 1000,
+            'percent': cumulative_time / total * 100,
+        })
+    return functions
+
+
+def _prune():
+    from .models import RequestProfile
+
+    keep = getattr(settings, 'REQUEST_PROFILER_KEEP', 50)
+    stale = RequestProfile.objects.values_list('pk', flat=True)[keep:]
+    RequestProfile.objects.filter(pk__in=list(stale)).delete()
+
+
+class ProfilerMiddleware:
+    """Profile requests from superusers that ask for it; must run after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILER', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profile_requested(request):
+            return self.get_response(request)
+        if not _profiling.acquire(blocking=False):
+            response = self.get_response(request)
+            response['X-Profile'] = 'busy' # Another request in this worker is being profiled
+            return response
+        try:
+            return self.profile(request)
+        finally:
+            _profiling.release()
+
+    def profile(self, request):
+        from .models import RequestProfile
+
+        profiler = cProfile.Profile()
+        with request_stats() as stats:
+            queries_before = stats.queries
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            duration = time.perf_counter() - started
+            queries = stats.queries - queries_before
+
+        profiler.create_stats()
+        match = request.resolver_match
+        profile = RequestProfile.objects.create(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            view=match.view_name if match else '',
+            status_code=response.status_code,
+            duration_ms=duration * 1000,
+            queries=queries,
+            stats=marshal.dumps(profiler.stats),
+        )
+        _prune()
+        response['X-Profile-URL'] = reverse('diagnostics:profile_detail', args=[profile.pk])
+        return response
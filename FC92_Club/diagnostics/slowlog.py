@@ -0,0 +1,198 @@
+# diagnostics/slowlog.py
+"""
+Slow-query log (SLOW_QUERY_MS > 0).
+
+Every statement a request runs longer than SLOW_QUERY_MS is logged to
+'FC92_Club.slow_queries' with the view that issued it and the project frames
+of the stack that led there. The record is handed to a background thread that
+stores it as a SlowQuery, so the request pays only for building the record.
+
+On PostgreSQL a sample of slow SELECTs (SLOW_QUERY_EXPLAIN_RATE) is re-run by
+that thread under EXPLAIN (ANALYZE, BUFFERS) inside a rolled-back transaction
+with a statement timeout, and the plan is stored with the record.
+"""
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import traceback
+from contextlib import ExitStack
+from datetime import timedelta
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger('FC92_Club.slow_queries')
+
+MAX_STACK_FRAMES = 12
+MAX_PENDING = 500 # Records waiting for the writer; beyond this they are only logged
+
+_pending = queue.Queue(maxsize=MAX_PENDING)
+_writer = None
+_writer_lock = threading.Lock()
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """SQL with literals and parameters replaced, so one statement shape groups together."""
+    statement = _STRING_RE.sub('?', sql)
+    statement = statement.replace('%s', '?')
+    statement = _NUMBER_RE.sub('?', statement)
+    statement = _LIST_RE.sub('(?, ...)', statement) # IN lists of any length
+    return _SPACE_RE.sub(' ', statement).strip()
+
+
+def fingerprint(statement):
+    return sha1(statement.encode()).hexdigest()
+
+
+def _project_stack():
+    """The current stack trimmed to frames in project code, innermost last."""
+    base_dir = str(settings.BASE_DIR) + os.sep
+    this_file = os.path.abspath(__file__)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(base_dir)
+        and os.path.abspath(frame.filename) != this_file
+        and f'{os.sep}site-packages{os.sep}' not in frame.filename
+    ]
+    return ''.join(traceback.format_list(frames[-MAX_STACK_FRAMES:]))
+
+
+class SlowQueryTracer:
+    """connection.execute_wrapper hook recording statements over the threshold."""
+
+    def __init__(self, request, threshold):
+        self.request = request
+        self.threshold = threshold
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.threshold:
+                self.record(sql, params, many, elapsed, context['connection'])
+
+    def record(self, sql, params, many, elapsed, connection):
+        match = self.request.resolver_match
+        record = {
+            'sql': sql,
+            'params': None if many else tuple(params or ()),
+            'duration_ms': elapsed * 1000,
+            'database': connection.alias,
+            'vendor': connection.vendor,
+            'view': match.view_name if match else '',
+            'path': self.request.path[:500],
+            'stack': _project_stack(),
+        }
+        logger.warning(
+            "Slow query (%.0f ms) in %s: %s\n%s",
+            record['duration_ms'], record['view'] or record['path'], sql, record['stack'],
+        )
+        enqueue(record)
+
+
+def enqueue(record):
+    _start_writer()
+    try:
+        _pending.put_nowait(record)
+    except queue.Full:
+        logger.debug("Slow-query backlog full; record not stored")
+
+
+def _start_writer():
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _writer_lock:
+        # A forked gunicorn worker inherits the object but not the thread
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_write_forever, name='slow-query-writer', daemon=True)
+            _writer.start()
+
+
+def _write_forever():
+    while True:
+        record = _pending.get()
+        try:
+            close_old_connections()
+            store(record)
+        except Exception:
+            logger.exception("Could not store slow query")
+        finally:
+            _pending.task_done()
+
+
+def _should_explain(record):
+    return (
+        record['vendor'] == 'postgresql'
+        and record['params'] is not None
+        and record['sql'].lstrip()[:6].upper() == 'SELECT'
+        and random.random() < getattr(settings, 'SLOW_QUERY_EXPLAIN_RATE', 0.1)
+    )
+
+
+def explain(record):
+    """EXPLAIN (ANALYZE, BUFFERS) the statement without keeping any of its effects."""
+    timeout_ms = getattr(settings, 'SLOW_QUERY_EXPLAIN_TIMEOUT_MS', 10000)
+    try:
+        with transaction.atomic(using=record['database']):
+            with connections[record['database']].cursor() as cursor:
+                cursor.execute('SET LOCAL statement_timeout = %s', [timeout_ms])
+                cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + record['sql'], record['params'])
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+            transaction.set_rollback(True, using=record['database'])
+    except DatabaseError as e:
+        plan = f"EXPLAIN failed: {e}"
+    return plan
+
+
+def store(record):
+    from .models import SlowQuery
+
+    statement = normalize_sql(record['sql'])
+    SlowQuery.objects.create(
+        fingerprint=fingerprint(statement),
+        statement=statement,
+        sql=record['sql'],
+        params=repr(record['params']) if record['params'] else '',
+        duration_ms=record['duration_ms'],
+        database=record['database'],
+        view=record['view'][:200],
+        path=record['path'],
+        stack=record['stack'],
+        plan=explain(record) if _should_explain(record) else '',
+    )
+    if random.random() < 0.01:
+        retention = getattr(settings, 'SLOW_QUERY_RETENTION_DAYS', 14)
+        SlowQuery.objects.filter(created_at__lt=timezone.now() - timedelta(days=retention)).delete()
+
+
+class SlowQueryMiddleware:
+    """Trace statements slower than SLOW_QUERY_MS on every database connection."""
+
+    def __init__(self, get_response):
+        threshold_ms = getattr(settings, 'SLOW_QUERY_MS', 0)
+        if not threshold_ms:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = threshold_ms / 1000
+
+    def __call__(self, request):
+        tracer = SlowQueryTracer(request, self.threshold)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(tracer))
+            return self.get_response(request)
@@ -0,0 +1,169 @@
+import re
+from unittest import mock
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from FC92_Club.metrics import REQUEST_QUERIES
+from FC92_Club.testing import make_user
+from .models import RequestProfile, SlowQuery
+from .slowlog import SlowQueryMiddleware, SlowQueryTracer, fingerprint, normalize_sql, store
+
+
+def slow_record(sql, vendor='postgresql', params=(1,)):
+    return {
+        'sql': sql, 'params': params, 'duration_ms': 250.0, 'database': 'default', 'vendor': vendor,
+        'view': 'pages:home', 'path': '/', 'stack': '',
+    }
+
+
+class NormalizeSqlTests(TestCase):
+    def test_literals_and_parameters_are_replaced(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE name = 'O''Brien' AND id = 42 AND x > %s"),
+            "SELECT * FROM t WHERE name = ? AND id = ? AND x > ?",
+        )
+        self.assertEqual(normalize_sql("SELECT  a\n FROM t_2 WHERE a = 1.5"), "SELECT a FROM t_2 WHERE a = ?")
+
+    def test_in_lists_of_any_length_share_a_fingerprint(self):
+        short = normalize_sql("SELECT * FROM t WHERE id IN (%s, %s)")
+        long = normalize_sql("SELECT * FROM t WHERE id IN (1, 2, 3, 4)")
+        self.assertEqual(short, "SELECT * FROM t WHERE id IN (?, ...)")
+        self.assertEqual(fingerprint(short), fingerprint(long))
+
+
+class SlowQueryLogTests(TestCase):
+    def trace(self, threshold):
+        request = RequestFactory().get('/somewhere/')
+        with mock.patch('diagnostics.slowlog.enqueue') as enqueue, mock.patch('diagnostics.slowlog.logger') as logger:
+            with connection.execute_wrapper(SlowQueryTracer(request, threshold)):
+                list(SlowQuery.objects.all())
+        self.assertEqual(logger.warning.call_count, enqueue.call_count)
+        return [call.args[0] for call in enqueue.call_args_list]
+
+    def test_only_statements_over_the_threshold_are_recorded(self):
+        self.assertEqual(self.trace(threshold=60), [])
+        records = self.trace(threshold=0)
+        self.assertEqual(len(records), 1)
+        self.assertIn('diagnostics_slowquery', records[0]['sql'])
+        self.assertEqual(records[0]['path'], '/somewhere/')
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_middleware_is_off_without_a_threshold(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            SlowQueryMiddleware(lambda request: HttpResponse())
+
+    @override_settings(SLOW_QUERY_EXPLAIN_RATE=1)
+    def test_sampled_explain_runs_only_for_selects(self):
+        with mock.patch('diagnostics.slowlog.explain', return_value='Seq Scan') as explain:
+            store(slow_record("SELECT * FROM finances_due WHERE id = %s"))
+            store(slow_record("UPDATE finances_due SET amount_due = 0 WHERE id = %s"))
+            store(slow_record("SELECT 1", params=None)) # executemany: no single parameter set to re-run
+            store(slow_record("SELECT 1", vendor='sqlite'))
+        self.assertEqual(explain.call_count, 1)
+        plans = dict(SlowQuery.objects.values_list('sql', 'plan'))
+        self.assertEqual(plans["SELECT * FROM finances_due WHERE id = %s"], 'Seq Scan')
+        self.assertEqual(plans["UPDATE finances_due SET amount_due = 0 WHERE id = %s"], '')
+
+
+class DiagnosticsAccessTests(TestCase):
+    def setUp(self):
+        self.superuser = make_user('root', is_superuser=True, is_staff=True)
+        self.staff = make_user('admin', role='ADM', is_staff=True)
+        store(slow_record("SELECT * FROM finances_due WHERE id = %s"))
+        self.slow_query = SlowQuery.objects.get()
+
+    def urls(self):
+        self.client.force_login(self.superuser)
+        profile_url = self.client.get(reverse('pages:home'), {'_profile': '1'})['X-Profile-URL']
+        self.client.logout()
+        profile = RequestProfile.objects.get()
+        return [
+            reverse('diagnostics:slow_query_list'),
+            reverse('diagnostics:slow_query_detail', args=[self.slow_query.fingerprint]),
+            reverse('diagnostics:profile_list'),
+            profile_url,
+            reverse('diagnostics:profile_download', args=[profile.pk]),
+        ]
+
+    def test_only_superusers_see_diagnostics(self):
+        urls = self.urls()
+        for user in (None, self.staff):
+            if user:
+                self.client.force_login(user)
+            for url in urls:
+                self.assertEqual(self.client.get(url).status_code, 302, url)
+
+        self.client.force_login(self.superuser)
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+        self.assertEqual(self.client.get(reverse('diagnostics:slow_query_detail', args=['0' * 40])).status_code, 404)
+
+    def test_only_superusers_can_profile_a_request(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('pages:home'), {'_profile': '1'})
+        self.assertNotIn('X-Profile-URL', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+        self.client.force_login(self.superuser)
+        response = self.client.get(reverse('pages:home'), HTTP_X_PROFILE='1')
+        profile = RequestProfile.objects.get()
+        self.assertEqual((profile.user, profile.view, profile.status_code), (self.superuser, 'pages:home', 200))
+        download = self.client.get(reverse('diagnostics:profile_download', args=[profile.pk]))
+        self.assertEqual(download.content, bytes(profile.stats))
+
+
+@override_settings(REQUEST_INSTRUMENTATION=True, REQUEST_QUERY_BUDGET=100)
+class RequestInstrumentationTests(TestCase):
+    SERVER_TIMING = re.compile(r'db;dur=\d+\.\d;desc="(\d+) queries", tpl;dur=\d+\.\d, total;dur=\d+\.\d')
+
+    def setUp(self):
+        self.client.force_login(make_user('member'))
+
+    def test_server_timing_counts_the_queries(self):
+        with CaptureQueriesContext(connection) as queries, self.assertNoLogs('FC92_Club.requests', 'WARNING'):
+            response = self.client.get(reverse('pages:home'))
+        match = self.SERVER_TIMING.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(match, response['Server-Timing'])
+        self.assertEqual(int(match[1]), len(queries))
+
+    def test_views_over_the_query_budget_are_logged(self):
+        with override_settings(REQUEST_QUERY_BUDGET=0), self.assertLogs('FC92_Club.requests', 'WARNING') as logs:
+            self.client.get(reverse('pages:home'))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('Query budget exceeded: pages:home', logs.output[0])
+        self.assertEqual(logs.records[0].request_stats['view'], 'pages:home')
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN='scrape-token')
+class MetricsTests(TestCase):
+    def requests_counted(self, view):
+        return REGISTRY.get_sample_value('fc92_request_db_queries_count', {'view': view}) or 0
+
+    def views_seen(self):
+        return {sample.labels['view'] for metric in REQUEST_QUERIES.collect() for sample in metric.samples}
+
+    def test_only_the_token_or_superusers_can_scrape(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer scrape-token').status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(make_user('admin', role='ADM', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(make_user('root', is_superuser=True, is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'fc92_request_duration_seconds', response.content)
+
+    def test_requests_are_labelled_by_url_name(self):
+        before = {view: self.requests_counted(view) for view in ('pages:home', '<unresolved>')}
+        self.client.get(reverse('pages:home'))
+        self.assertEqual(self.client.get('/no/such/page/').status_code, 404)
+        self.assertEqual(self.requests_counted('pages:home'), before['pages:home'] + 1)
+        self.assertEqual(self.requests_counted('<unresolved>'), before['<unresolved>'] + 1)
+        self.assertFalse([view for view in self.views_seen() if view.startswith('/')])
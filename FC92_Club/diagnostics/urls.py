@@ -0,0 +1,13 @@
+# diagnostics/urls.py
+from django.urls import path
+from . import views
+
+app_name = 'diagnostics'
+
+urlpatterns = [
+    path('slow-queries/', views.slow_query_list, name='slow_query_list'),
+    path('slow-queries/<str:fingerprint>/', views.slow_query_detail, name='slow_query_detail'),
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<int:profile_id>/', views.profile_detail, name='profile_detail'),
+    path('profiles/<int:profile_id>/download/', views.profile_download, name='profile_download'),
+]
@@ -0,0 +1,76 @@
+# diagnostics/views.py
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404, render
+
+from .models import RequestProfile, SlowQuery
+from .profiler import top_functions
+
+SLOW_QUERY_GROUPS = 100
+SLOW_QUERY_SAMPLES = 25
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def slow_query_list(request):
+    """Slow statements grouped by shape, costliest (total time) first."""
+    groups = SlowQuery.objects.values('fingerprint').annotate(
+        statement=Min('statement'),
+        count=Count('id'),
+        total_ms=Sum('duration_ms'),
+        avg_ms=Avg('duration_ms'),
+        max_ms=Max('duration_ms'),
+        last_seen=Max('created_at'),
+        views=Count('view', distinct=True),
+    ).order_by('-total_ms')[:SLOW_QUERY_GROUPS]
+    return render(request, 'diagnostics/slow_query_list.html', {'groups': groups})
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def slow_query_detail(request, fingerprint):
+    """Recent samples of one statement, with where they came from and any captured plans."""
+    samples = list(SlowQuery.objects.filter(fingerprint=fingerprint)[:SLOW_QUERY_SAMPLES])
+    if not samples:
+        raise Http404("No slow queries recorded for this statement.")
+    by_view = SlowQuery.objects.filter(fingerprint=fingerprint) \
+        .values('view') \
+        .annotate(count=Count('id'), avg_ms=Avg('duration_ms')) \
+        .order_by('-count')
+    return render(request, 'diagnostics/slow_query_detail.html', {
+        'statement': samples[0].statement,
+        'samples': samples,
+        'by_view': by_view,
+    })
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def profile_list(request):
+    """Recently profiled requests. Add ?_profile=1 to any URL to record one."""
+    profiles = RequestProfile.objects.select_related('user').defer('stats')
+    return render(request, 'diagnostics/profile_list.html', {'profiles': profiles})
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def profile_detail(request, profile_id):
+    """Top functions of one profiled request, by cumulative or own time."""
+    profile = get_object_or_404(RequestProfile, id=profile_id)
+    sort = 'own' if request.GET.get('sort') == 'own' else 'cumulative'
+    return render(request, 'diagnostics/profile_detail.html', {
+        'profile': profile,
+        'functions': top_functions(profile, sort=sort),
+        'sort': sort,
+    })
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def profile_download(request, profile_id):
+    """The raw pstats file, for flame graphs in snakeviz, speedscope or similar."""
+    profile = get_object_or_404(RequestProfile, id=profile_id)
+    response = HttpResponse(bytes(profile.stats), content_type='application/octet-stream')
+    response['Content-Disposition'] = f'attachment; filename="request-{profile.pk}.prof"'
+    return response
@@ -1,7 +1,7 @@
 # Register your models here.
 # finances/admin.py
 from django.contrib import admin
-from .models import Due, Payment
+from .models import Due, LedgerArchive, Payment
 
 @admin.register(Due)
 class DueAdmin(admin.ModelAdmin):
@@ -36,3 +36,12 @@ class PaymentAdmin(admin.ModelAdmin):
         if not obj.pk: # Only set on creation
              obj.recorded_by = request.user
         super().save_model(request, obj, form, change)
+
+
+@admin.register(LedgerArchive)
+class LedgerArchiveAdmin(admin.ModelAdmin):
+    list_display = ('member', 'year', 'total_dues', 'total_payments', 'dues_count', 'payments_count', 'archived_at')
+    list_filter = ('year',)
+    search_fields = ('member__user__username', 'member__user__last_name')
+    list_select_related = ('member__user',)
+    readonly_fields = [f.name for f in LedgerArchive._meta.fields] # Written only by archive_ledgers
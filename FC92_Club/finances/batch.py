@@ -0,0 +1,75 @@
+# finances/batch.py
+"""
+PDF statements for many members at once, written into one ZIP archive.
+
+Member ids are split into chunks and rendered by a pool of worker processes
+(reportlab is pure Python, so threads would queue on the GIL). Workers are
+started with `spawn`: each sets up Django from scratch and opens its own
+database connection instead of inheriting the parent's socket. Finished
+chunks come back as (name, bytes) pairs and the parent alone writes the
+archive. `workers=0` renders in the calling process, which is what the
+tests use (their in-memory database is invisible to other processes).
+"""
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+
+
+def statement_filename(profile, year=None):
+    return f"statements-{year or 'all'}/{profile.user.username}.pdf"
+
+
+def chunked(ids, size):
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+def _init_worker(settings_module):
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    django.setup()
+
+
+def render_chunk(profile_ids, year=None):
+    """Render the statements for `profile_ids`; returns [(archive name, PDF bytes)]."""
+    # Imported here: a spawned worker loads this module before _init_worker sets up Django
+    from users.models import Profile
+    from .pdf import render_statement_pdf
+
+    profiles = Profile.objects.filter(pk__in=profile_ids).select_related('user')
+    return [(statement_filename(profile, year), render_statement_pdf(profile, year)) for profile in profiles]
+
+
+def generate_statements(profile_ids, archive, year=None, workers=4, chunk_size=50, progress=None):
+    """
+    Write a statement per member in `profile_ids` into `archive` (a path or a
+    writable binary file) and return how many were written. `progress` is
+    called with (done, total) after each chunk.
+    """
+    profile_ids = list(profile_ids)
+    chunks = chunked(profile_ids, chunk_size)
+    done = 0
+    with zipfile.ZipFile(archive, mode='w', compression=zipfile.ZIP_STORED) as output: # PDF streams are already compressed
+        def write(statements):
+            nonlocal done
+            for name, content in statements:
+                output.writestr(name, content)
+            done += len(statements)
+            if progress:
+                progress(done, len(profile_ids))
+
+        if not workers:
+            for chunk in chunks:
+                write(render_chunk(chunk, year))
+            return done
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)) or 1,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(os.environ['DJANGO_SETTINGS_MODULE'],),
+        ) as pool:
+            for future in as_completed([pool.submit(render_chunk, chunk, year) for chunk in chunks]):
+                write(future.result())
+    return done
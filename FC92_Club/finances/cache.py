@@ -0,0 +1,54 @@
+# finances/cache.py
+"""
+Cached statement artifacts: the rendered financial status fragment and the
+PDF statement of each member.
+
+Both are stored under the member's ledger version (finances/ledger.py), which
+changes whenever one of their dues or payments is saved or deleted, and for
+everyone after bulk operations that skip signals. A cached artifact never
+goes stale: a new version simply misses and renders once. The version also
+makes a strong ETag, so a browser re-opening an unchanged statement gets a
+304 without anything being rendered.
+"""
+import zlib
+
+from django.template.loader import render_to_string
+
+from FC92_Club.cache import cached
+from .ledger import ledger_version, member_totals
+from .models import Due, LedgerArchive, Payment
+from .pdf import render_statement_pdf
+
+ARTIFACT_TIMEOUT = 24 * 60 * 60  # Entries never change under a version; this only frees space
+
+
+def artifact_etag(profile, *variant):
+    # The name is printed on the statement but isn't part of the ledger version
+    name = zlib.crc32(f'{profile.user.username}|{profile.user.get_full_name()}'.encode())
+    return '-'.join(map(str, (profile.pk, ledger_version(profile.pk), f'{name:x}', *variant)))
+
+
+def _artifact(kind, etag, producer):
+    return cached(f'statement:{kind}:{etag}', producer, timeout=ARTIFACT_TIMEOUT, stale_grace=0)
+
+
+def status_fragment(profile, since, etag):
+    """Totals and ledger tables of member_financial_status as HTML."""
+    def render():
+        dues = Due.objects.filter(member=profile).order_by('-due_date', '-created_at')
+        payments = Payment.objects.filter(member=profile).order_by('-payment_date', '-recorded_at')
+        if since:
+            dues = dues.filter(due_date__gte=since)
+            payments = payments.filter(payment_date__gte=since)
+        return render_to_string('finances/financial_status_fragment.html', {
+            'dues': dues,
+            'payments': payments,
+            **member_totals(profile, since), # dues_total, payments_total, brought_forward, balance
+            'since': since,
+            'archives': None if since else LedgerArchive.objects.filter(member=profile),
+        })
+    return _artifact('status', etag, render)
+
+
+def statement_pdf(profile, year, etag):
+    return _artifact('pdf', etag, lambda: render_statement_pdf(profile, year))
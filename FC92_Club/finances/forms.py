@@ -2,11 +2,14 @@
 from django import forms
 from .models import Payment, Due
 from users.models import Profile # To populate member choices
+from users.widgets import MemberAutocomplete
 
 class PaymentForm(forms.ModelForm):
-    # If FS needs to select member when recording payment
+    # If FS needs to select member when recording payment.
+    # The widget searches as you type; validation only looks up the submitted id
     member = forms.ModelChoiceField(
-        queryset=Profile.objects.filter(status='ACT').select_related('user').order_by('user__username'),
+        queryset=Profile.objects.filter(status='ACT').select_related('user'),
+        widget=MemberAutocomplete,
         label="Member"
     )
 
@@ -21,7 +24,8 @@ class DueForm(forms.ModelForm):
     # Allow selecting multiple members to apply a due to? More complex.
     # Single member selection for now:
     member = forms.ModelChoiceField(
-        queryset=Profile.objects.filter(status='ACT').select_related('user').order_by('user__username'),
+        queryset=Profile.objects.filter(status='ACT').select_related('user'),
+        widget=MemberAutocomplete,
         label="Member",
         required=True
     )
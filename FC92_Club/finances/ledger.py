@@ -0,0 +1,142 @@
+# finances/ledger.py
+"""
+Open and archived ledger years.
+
+The last FINANCE_OPEN_YEARS calendar years are open: their dues and payments
+are kept row by row and shown by default. Earlier years can be archived,
+which folds each member's rows for the year into one LedgerArchive row and
+removes them (on PostgreSQL by dropping the year's partition). Balances
+always include archived years, so archiving never changes what anyone owes.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from FC92_Club.cache import bump_namespace, cached, namespace_version
+from . import partitioning
+from .models import Due, LedgerArchive, Payment
+
+ALL_LEDGERS = 'ledgers'
+
+BROUGHT_FORWARD_TIMEOUT = 24 * 60 * 60 # Never stale under a version; this only frees space
+
+# model, date field, amount field
+LEDGER_FIELDS = [
+    (Due, 'due_date', 'amount_due'),
+    (Payment, 'payment_date', 'amount_paid'),
+]
+
+
+def first_open_year(today=None):
+    return (today or date.today()).year - settings.FINANCE_OPEN_YEARS + 1
+
+
+def open_period_start(today=None):
+    return date(first_open_year(today), 1, 1)
+
+
+def ledger_version(profile_id):
+    """Changes whenever the member's dues or payments do; keys the cached statements (finances/cache.py)."""
+    return f'{namespace_version(ALL_LEDGERS)}.{namespace_version(f"ledger:{profile_id}")}'
+
+
+def bump_ledger(profile_id):
+    """A due or payment of this member was saved or deleted (see finances.signals)."""
+    bump_namespace(f'ledger:{profile_id}')
+
+
+def closed_ledger_version(profile_id):
+    """Changes whenever the member's rows before the open years (or archived years) may have."""
+    return f'{namespace_version(ALL_LEDGERS)}.{namespace_version(f"closed:{profile_id}")}'
+
+
+def bump_closed_ledger(profile_id):
+    bump_namespace(f'closed:{profile_id}')
+
+
+def bump_all_ledgers():
+    """Ledger rows changed without signals: bulk_create, archiving."""
+    bump_namespace(ALL_LEDGERS)
+
+
+def member_totals(profile, since=None):
+    """
+    Totals for `profile`: dues and payments dated from `since` (or all of
+    them), and the balance brought forward from everything before, archived
+    years included. Only the rows from `since` are summed on every call (the
+    open partitions on PostgreSQL); the balance brought forward is cached
+    under the member's closed ledger version.
+    """
+    totals = {}
+    for model, date_field, amount_field in LEDGER_FIELDS:
+        rows = model.objects.filter(member=profile)
+        if since:
+            rows = rows.filter(**{f'{date_field}__gte': since})
+        totals[model] = rows.aggregate(total=Sum(amount_field))['total'] or Decimal('0.00')
+
+    if since:
+        key = f'brought-forward:{profile.pk}:{since}:{closed_ledger_version(profile.pk)}'
+        brought_forward = cached(key, lambda: balance_before(profile, since), timeout=BROUGHT_FORWARD_TIMEOUT, stale_grace=0)
+    else:
+        brought_forward = balance_before(profile)
+    return {
+        'dues_total': totals[Due],
+        'payments_total': totals[Payment],
+        'brought_forward': brought_forward,
+        'balance': brought_forward + totals[Due] - totals[Payment],
+    }
+
+
+def balance_before(profile, since=None):
+    """The member's archived years plus, with `since`, the dues less payments dated before it."""
+    archived = LedgerArchive.objects.filter(member=profile).aggregate(dues=Sum('total_dues'), payments=Sum('total_payments'))
+    balance = (archived['dues'] or Decimal('0.00')) - (archived['payments'] or Decimal('0.00'))
+    if since:
+        for model, date_field, amount_field in LEDGER_FIELDS:
+            total = model.objects.filter(member=profile, **{f'{date_field}__lt': since}).aggregate(total=Sum(amount_field))['total']
+            balance += (total or 0) if model is Due else -(total or 0)
+    return balance
+
+
+@transaction.atomic
+def archive_year(year):
+    """Fold `year` into LedgerArchive rows and remove its ledger rows; returns the number of rows removed."""
+    if year >= first_open_year():
+        raise ValueError(f"{year} is still open; only years before {first_open_year()} can be archived.")
+
+    archives = {archive.member_id: archive for archive in LedgerArchive.objects.filter(year=year)}
+    removed = 0
+    for model, date_field, amount_field in LEDGER_FIELDS:
+        rows = model.objects.filter(**{f'{date_field}__gte': date(year, 1, 1), f'{date_field}__lt': date(year + 1, 1, 1)})
+        totals = rows.values('member').annotate(total=Sum(amount_field), count=Count('id')).order_by()
+        for row in totals:
+            archive = archives.setdefault(row['member'], LedgerArchive(member_id=row['member'], year=year))
+            # A year archived before may have had late entries added since
+            if model is Due:
+                archive.total_dues += row['total']
+                archive.dues_count += row['count']
+            else:
+                archive.total_payments += row['total']
+                archive.payments_count += row['count']
+            removed += row['count']
+
+        table = model._meta.db_table
+        if partitioning.is_partitioned(connection, table) and year in partitioning.partition_years(connection, table):
+            partitioning.drop_partition(connection, table, year)
+        # Rows dated in a year whose partition was already dropped live in the DEFAULT partition.
+        # One DELETE without signals: nothing references ledger rows, and bump_all_ledgers below
+        # stands in for the per-row bumps in finances.signals.
+        rows._raw_delete(rows.db)
+
+    now = timezone.now()
+    for archive in archives.values():
+        archive.archived_at = now
+    existing = [a for a in archives.values() if a.pk is not None]
+    LedgerArchive.objects.bulk_create([a for a in archives.values() if a.pk is None])
+    LedgerArchive.objects.bulk_update(existing, ['total_dues', 'total_payments', 'dues_count', 'payments_count', 'archived_at'])
+    transaction.on_commit(bump_all_ledgers) # Statements now show the year as one archived entry
+    return removed
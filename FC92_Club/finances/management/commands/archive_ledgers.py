@@ -0,0 +1,34 @@
+# finances/management/commands/archive_ledgers.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+
+from finances.ledger import LEDGER_FIELDS, archive_year, first_open_year
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold closed years of dues and payments into one archive row per member and year, "
+        "removing the ledger rows. Balances are unchanged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--through', type=int, help="Last year to archive (default: the year before the first open year).")
+        parser.add_argument('--dry-run', action='store_true', help="Only list the years that would be archived.")
+
+    def handle(self, *args, **options):
+        through = options['through'] or first_open_year() - 1
+        if through >= first_open_year():
+            raise CommandError(f"Years from {first_open_year()} on are open (FINANCE_OPEN_YEARS); archive {first_open_year() - 1} or earlier.")
+
+        first_dates = [model.objects.aggregate(first=Min(date_field))['first'] for model, date_field, _ in LEDGER_FIELDS]
+        first_dates = [d for d in first_dates if d is not None]
+        if not first_dates or min(first_dates).year > through:
+            self.stdout.write(f"Nothing to archive through {through}.")
+            return
+
+        for year in range(min(first_dates).year, through + 1):
+            if options['dry_run']:
+                self.stdout.write(f"Would archive {year}")
+                continue
+            removed = archive_year(year)
+            self.stdout.write(self.style.SUCCESS(f"Archived {year}: {removed:,} ledger rows folded into member totals."))
@@ -0,0 +1,74 @@
+# finances/management/commands/export_statements.py
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finances.batch import generate_statements
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Render a PDF statement for every member into one ZIP archive, spread over worker processes. "
+        "With --benchmark, time the same run at several worker counts instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help="Statement for one calendar year, with the balance brought forward (default: all years).")
+        parser.add_argument('--output', help="Archive path (default: statements-<year>.zip).")
+        parser.add_argument('--status', default='ACT', help="Profile status to include, or 'all' (default ACT).")
+        parser.add_argument('--members', type=int, nargs='+', help="Only these profile ids.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes; 0 renders in this process.")
+        parser.add_argument('--chunk-size', type=int, default=50, help="Members per task sent to a worker.")
+        parser.add_argument('--benchmark', help="Comma-separated worker counts to time (e.g. 0,1,2,4); no archive is kept.")
+        parser.add_argument('--limit', type=int, help="Only the first N members (useful with --benchmark).")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        profiles = Profile.objects.order_by('pk')
+        if options['members']:
+            profiles = profiles.filter(pk__in=options['members'])
+        elif options['status'] != 'all':
+            profiles = profiles.filter(status=options['status'])
+        profile_ids = list(profiles.values_list('pk', flat=True)[:options['limit']])
+        if not profile_ids:
+            raise CommandError("No members match.")
+
+        if options['benchmark']:
+            self.benchmark(profile_ids, options)
+            return
+
+        output = options['output'] or f"statements-{options['year'] or 'all'}.zip"
+        started = time.perf_counter()
+        count = generate_statements(
+            profile_ids, output, year=options['year'], workers=options['workers'],
+            chunk_size=options['chunk_size'], progress=self.progress,
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{count:,} statements written to {output} in {elapsed:.1f}s ({count / elapsed:.1f} statements/s)."
+        ))
+
+    def benchmark(self, profile_ids, options):
+        try:
+            worker_counts = [int(value) for value in options['benchmark'].split(',')]
+        except ValueError:
+            raise CommandError("--benchmark takes comma-separated worker counts, e.g. 0,1,2,4.")
+
+        self.stdout.write(f"{len(profile_ids):,} statements, chunks of {options['chunk_size']}")
+        self.stdout.write(f"{'workers':>8} {'seconds':>9} {'statements/s':>13} {'archive MB':>11}")
+        for workers in worker_counts:
+            with tempfile.TemporaryFile() as archive:
+                started = time.perf_counter()
+                count = generate_statements(
+                    profile_ids, archive, year=options['year'], workers=workers, chunk_size=options['chunk_size'],
+                )
+                elapsed = time.perf_counter() - started # Includes starting the workers, as a real run would
+                size = archive.seek(0, os.SEEK_END)
+            self.stdout.write(f"{workers:>8} {elapsed:>9.2f} {count / elapsed:>13.1f} {size / 1e6:>11.1f}")
+
+    def progress(self, done, total):
+        if self.verbosity >= 1:
+            self.stdout.write(f"statements: {done:,}/{total:,}")
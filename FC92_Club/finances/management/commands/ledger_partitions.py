@@ -0,0 +1,31 @@
+# finances/management/commands/ledger_partitions.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from finances import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the yearly ledger partitions for the coming years (PostgreSQL). Run it yearly, "
+        "before January: rows for a year without a partition land in the DEFAULT partition."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=1, help="Years after the current one to create.")
+
+    def handle(self, *args, **options):
+        if not any(partitioning.is_partitioned(connection, table) for table in partitioning.LEDGERS):
+            raise CommandError("The ledgers are not partitioned; this only applies to PostgreSQL.")
+
+        this_year = date.today().year
+        for table in partitioning.LEDGERS:
+            for year in range(this_year, this_year + options['ahead'] + 1):
+                partitioning.create_partition(connection, table, year)
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM {table}_default")
+                stray = cursor.fetchone()[0]
+            years = partitioning.partition_years(connection, table)
+            self.stdout.write(f"{table}: partitions {years[0]}-{years[-1]}, {stray:,} rows in the default partition")
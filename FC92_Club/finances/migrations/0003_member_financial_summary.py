@@ -0,0 +1,76 @@
+# Generated by Django 5.2 on 2026-10-19 07:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of finances.summary as of this migration (before archived years)
+SUMMARY_SELECT = """
+    SELECT p.id AS member_id,
+           COALESCE(d.total, 0) AS total_dues,
+           COALESCE(pay.total, 0) AS total_payments,
+           (COALESCE(d.total, 0)) - (COALESCE(pay.total, 0)) AS balance,
+           now() AS refreshed_at
+    FROM users_profile p
+    LEFT JOIN (SELECT member_id, SUM(amount_due) AS total FROM finances_due GROUP BY member_id) d
+        ON d.member_id = p.id
+    LEFT JOIN (SELECT member_id, SUM(amount_paid) AS total FROM finances_payment GROUP BY member_id) pay
+        ON pay.member_id = p.id
+"""
+
+CREATE = {
+    'postgresql': [
+        f"CREATE MATERIALIZED VIEW finances_member_summary AS {SUMMARY_SELECT}",
+        # REFRESH ... CONCURRENTLY needs a unique index
+        "CREATE UNIQUE INDEX finances_member_summary_member_idx ON finances_member_summary (member_id)",
+    ],
+    'other': [
+        "CREATE TABLE finances_member_summary (member_id integer NOT NULL PRIMARY KEY, total_dues decimal NOT NULL, "
+        "total_payments decimal NOT NULL, balance decimal NOT NULL, refreshed_at datetime NOT NULL)",
+    ],
+}
+
+DROP = {
+    'postgresql': ["DROP MATERIALIZED VIEW IF EXISTS finances_member_summary"],
+    'other': ["DROP TABLE IF EXISTS finances_member_summary"],
+}
+
+
+def run(statements, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for statement in statements.get(vendor, statements['other']):
+        schema_editor.execute(statement)
+
+
+def create(apps, schema_editor):
+    run(CREATE, schema_editor)
+
+
+def drop(apps, schema_editor):
+    run(DROP, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0002_initial'),
+        ('users', '0003_rename_phone_profile_phone_number_alter_profile_role'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberFinancialSummary',
+            fields=[
+                ('member', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='financial_summary', serialize=False, to='users.profile')),
+                ('total_dues', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('total_payments', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'finances_member_summary',
+                'managed': False,
+            },
+        ),
+        # The model is unmanaged: the view (or table) is created here instead
+        migrations.RunPython(create, drop),
+    ]
@@ -0,0 +1,155 @@
+# Generated by Django 5.2 on 2026-10-19 07:15
+
+import django.db.models.deletion
+from datetime import date
+from decimal import Decimal
+from django.db import migrations, models
+
+# Frozen copies of finances.partitioning and finances.summary as of this migration
+
+# table: (partition key, {foreign key column: referenced table})
+LEDGERS = {
+    'finances_due': ('due_date', {'member_id': 'users_profile'}),
+    'finances_payment': ('payment_date', {'member_id': 'users_profile', 'recorded_by_id': 'users_user'}),
+}
+
+SUMMARY = 'finances_member_summary'
+
+SUMMARY_SELECT = {
+    False: """
+    SELECT p.id AS member_id,
+           COALESCE(d.total, 0) AS total_dues,
+           COALESCE(pay.total, 0) AS total_payments,
+           (COALESCE(d.total, 0)) - (COALESCE(pay.total, 0)) AS balance,
+           now() AS refreshed_at
+    FROM users_profile p
+    LEFT JOIN (SELECT member_id, SUM(amount_due) AS total FROM finances_due GROUP BY member_id) d
+        ON d.member_id = p.id
+    LEFT JOIN (SELECT member_id, SUM(amount_paid) AS total FROM finances_payment GROUP BY member_id) pay
+        ON pay.member_id = p.id
+""",
+    True: """
+    SELECT p.id AS member_id,
+           COALESCE(d.total, 0) + COALESCE(a.total_dues, 0) AS total_dues,
+           COALESCE(pay.total, 0) + COALESCE(a.total_payments, 0) AS total_payments,
+           (COALESCE(d.total, 0) + COALESCE(a.total_dues, 0)) - (COALESCE(pay.total, 0) + COALESCE(a.total_payments, 0)) AS balance,
+           now() AS refreshed_at
+    FROM users_profile p
+    LEFT JOIN (SELECT member_id, SUM(amount_due) AS total FROM finances_due GROUP BY member_id) d
+        ON d.member_id = p.id
+    LEFT JOIN (SELECT member_id, SUM(amount_paid) AS total FROM finances_payment GROUP BY member_id) pay
+        ON pay.member_id = p.id
+    LEFT JOIN (SELECT member_id, SUM(total_dues) AS total_dues, SUM(total_payments) AS total_payments
+               FROM finances_ledgerarchive GROUP BY member_id) a
+        ON a.member_id = p.id
+""",
+}
+
+
+def create_summary(cursor, archives):
+    cursor.execute(f"CREATE MATERIALIZED VIEW {SUMMARY} AS {SUMMARY_SELECT[archives]}")
+    cursor.execute(f"CREATE UNIQUE INDEX {SUMMARY}_member_idx ON {SUMMARY} (member_id)")
+
+
+def partition(cursor, table, years_ahead=1):
+    """Rebuild `table` partitioned by year, keeping its rows and ids."""
+    date_column, foreign_keys = LEDGERS[table]
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_flat")
+    # LIKE copies columns and NOT NULLs but not the identity, which
+    # partitioned tables before PostgreSQL 17 cannot have
+    cursor.execute(f"CREATE TABLE {table} (LIKE {table}_flat INCLUDING DEFAULTS) PARTITION BY RANGE ({date_column})")
+    cursor.execute(f"CREATE SEQUENCE {table}_part_id_seq OWNED BY {table}.id")
+    cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_part_id_seq')")
+    cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey_part PRIMARY KEY (id, {date_column})")
+    for column, target in foreign_keys.items():
+        cursor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fk_part FOREIGN KEY ({column}) "
+            f"REFERENCES {target} (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        if column != 'member_id':
+            cursor.execute(f"CREATE INDEX {table}_{column}_part_idx ON {table} ({column})")
+    cursor.execute(f"CREATE INDEX {table}_member_date_idx ON {table} (member_id, {date_column})")
+
+    cursor.execute(f"SELECT EXTRACT(YEAR FROM MIN({date_column}))::int FROM {table}_flat")
+    this_year = date.today().year
+    first_year = cursor.fetchone()[0] or this_year
+    for year in range(min(first_year, this_year), this_year + years_ahead + 1):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table}_y{year} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+    cursor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    cursor.execute(f"INSERT INTO {table} SELECT * FROM {table}_flat")
+    cursor.execute(f"SELECT setval('{table}_part_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM {table}")
+    cursor.execute(f"DROP TABLE {table}_flat")
+    cursor.execute(f"ALTER SEQUENCE {table}_part_id_seq RENAME TO {table}_id_seq")
+
+
+def unpartition(cursor, table):
+    foreign_keys = LEDGERS[table][1]
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_parts")
+    cursor.execute(f"CREATE TABLE {table} (LIKE {table}_parts INCLUDING DEFAULTS)")
+    cursor.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id)")
+    for column, target in foreign_keys.items():
+        cursor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fk FOREIGN KEY ({column}) "
+            f"REFERENCES {target} (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        cursor.execute(f"CREATE INDEX {table}_{column}_idx ON {table} ({column})")
+    cursor.execute(f"INSERT INTO {table} SELECT * FROM {table}_parts")
+    cursor.execute(f"DROP TABLE {table}_parts")
+
+
+def partition_ledgers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        # The materialized view depends on the tables being rebuilt; it comes
+        # back including archived years
+        cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {SUMMARY}")
+        for table in LEDGERS:
+            partition(cursor, table)
+        create_summary(cursor, archives=True)
+
+
+def unpartition_ledgers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {SUMMARY}")
+        for table in LEDGERS:
+            unpartition(cursor, table)
+        create_summary(cursor, archives=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0003_member_financial_summary'),
+        ('users', '0003_rename_phone_profile_phone_number_alter_profile_role'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('total_dues', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('total_payments', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('dues_count', models.PositiveIntegerField(default=0)),
+                ('payments_count', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_archives', to='users.profile')),
+            ],
+            options={
+                'ordering': ['-year'],
+                'constraints': [models.UniqueConstraint(fields=('member', 'year'), name='ledgerarchive_member_year_uniq')],
+            },
+        ),
+        migrations.RunPython(partition_ledgers, unpartition_ledgers),
+    ]
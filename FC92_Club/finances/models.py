@@ -25,3 +25,46 @@ class Payment(models.Model):
 
     def __str__(self):
         return f"Payment of {self.amount_paid} by {self.member.user.username} on {self.payment_date}"
+
+class LedgerArchive(models.Model):
+    """One member's dues and payments for an archived year, folded into totals (see finances/ledger.py)."""
+    member = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='ledger_archives')
+    year = models.PositiveSmallIntegerField()
+    total_dues = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    total_payments = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    dues_count = models.PositiveIntegerField(default=0)
+    payments_count = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-year']
+        constraints = [
+            models.UniqueConstraint(fields=['member', 'year'], name='ledgerarchive_member_year_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.year} totals for {self.member_id}"
+
+    @property
+    def balance(self):
+        return self.total_dues - self.total_payments
+
+class MemberFinancialSummary(models.Model):
+    """
+    Read-only per-member totals: a materialized view on PostgreSQL, a table
+    elsewhere. Created by migration and refreshed by finances/summary.py.
+    """
+    member = models.OneToOneField(
+        Profile, on_delete=models.DO_NOTHING, primary_key=True, db_constraint=False, related_name='financial_summary'
+    )
+    total_dues = models.DecimalField(max_digits=12, decimal_places=2)
+    total_payments = models.DecimalField(max_digits=12, decimal_places=2)
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'finances_member_summary'
+
+    def __str__(self):
+        return f"Summary for {self.member_id} as of {self.refreshed_at}"
@@ -0,0 +1,62 @@
+# finances/partitioning.py
+"""
+Yearly range partitions for the ledgers on PostgreSQL.
+
+finances_due and finances_payment are partitioned by due_date/payment_date:
+one partition per calendar year plus a DEFAULT partition for anything
+outside them, so queries bounded by date only scan the years they need and
+archiving a year is a DROP of its partition (see finances/ledger.py).
+Migration 0004 converts the tables; this module manages their partitions.
+
+PostgreSQL wants the partition key in the primary key, so the database key
+is (id, <date>). Ids still come from a single sequence and stay unique, and
+the ORM keeps treating `id` as the primary key. Other databases keep plain
+tables; check `is_partitioned()` before calling anything else here.
+"""
+# table: (partition key, {foreign key column: referenced table})
+LEDGERS = {
+    'finances_due': ('due_date', {'member_id': 'users_profile'}),
+    'finances_payment': ('payment_date', {'member_id': 'users_profile', 'recorded_by_id': 'users_user'}),
+}
+
+
+def partition_name(table, year):
+    return f'{table}_y{year}'
+
+
+def is_partitioned(connection, table):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [table])
+        return cursor.fetchone() is not None
+
+
+def partition_years(connection, table):
+    """Years that have their own partition."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [table],
+        )
+        prefix = f'{table}_y'
+        return sorted(int(name[len(prefix):]) for (name,) in cursor.fetchall() if name.startswith(prefix))
+
+
+def create_partition(connection, table, year):
+    """
+    Add the partition for `year`. Fails if the DEFAULT partition already
+    holds rows for that year, so create partitions ahead of time.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table, year)} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+
+
+def drop_partition(connection, table, year):
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {partition_name(table, year)}")
+        cursor.execute(f"DROP TABLE {partition_name(table, year)}")
@@ -0,0 +1,78 @@
+# finances/pdf.py
+"""
+A member's statement as a PDF (reportlab), built from the same entries as the
+statement page. Amounts are labelled NGN: the standard PDF fonts have no
+naira sign, and embedding a font would triple the size of every file.
+"""
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+
+from django.utils.html import escape
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .statement import iter_statement
+
+STYLES = getSampleStyleSheet()
+
+TABLE_STYLE = TableStyle([
+    ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+    ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f2f2f2')]),
+])
+
+
+def statement_entries(profile, year=None):
+    """(opening balance, entries) for the whole history or one calendar year."""
+    opening, entries = Decimal('0.00'), []
+    for entry in iter_statement(profile):
+        if year and entry.entry_date.year < year:
+            opening = entry.balance
+        elif not year or entry.entry_date.year == year:
+            entries.append(entry)
+        else:
+            break
+    return opening, entries
+
+
+def render_statement_pdf(profile, year=None):
+    """The statement for `profile` (all of it, or one year) as PDF bytes."""
+    opening, entries = statement_entries(profile, year)
+    closing = entries[-1].balance if entries else opening
+    user = profile.user
+
+    rows = [['Date', 'Description', 'Charge (NGN)', 'Payment (NGN)', 'Balance (NGN)']]
+    if year:
+        rows.append([date(year, 1, 1).isoformat(), 'Balance brought forward', '', '', f'{opening:,}'])
+    for entry in entries:
+        rows.append([
+            entry.entry_date.isoformat(),
+            Paragraph(escape(entry.description), STYLES['BodyText']), # Wraps long descriptions
+            f'{entry.charge:,}' if entry.charge else '',
+            f'{entry.payment:,}' if entry.payment else '',
+            f'{entry.balance:,}',
+        ])
+    table = Table(rows, colWidths=[24 * mm, 76 * mm, 25 * mm, 25 * mm, 25 * mm], repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+
+    buffer = BytesIO()
+    document = SimpleDocTemplate(
+        buffer, pagesize=A4, title=f"Statement - {user.username}",
+        leftMargin=15 * mm, rightMargin=15 * mm, topMargin=15 * mm, bottomMargin=15 * mm,
+    )
+    document.build([
+        Paragraph("FC92 Club - Member Statement", STYLES['Title']),
+        Paragraph(escape(f"{user.get_full_name() or user.username} ({user.username})"), STYLES['Heading3']),
+        Paragraph(f"Period: {year or 'all years'}, generated {date.today().isoformat()}", STYLES['Normal']),
+        Spacer(1, 6 * mm),
+        table,
+        Spacer(1, 4 * mm),
+        Paragraph(f"<b>Balance{' at year end' if year else ''}: NGN {closing:,}</b>", STYLES['Normal']),
+    ])
+    return buffer.getvalue()
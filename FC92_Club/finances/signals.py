@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .ledger import LEDGER_FIELDS, bump_closed_ledger, bump_ledger, open_period_start
+from .models import Due, Payment
+
+DATE_FIELDS = {model: date_field for model, date_field, amount_field in LEDGER_FIELDS}
+
+
+@receiver(post_init, sender=Due)
+@receiver(post_init, sender=Payment)
+def remember_member(sender, instance, **kwargs):
+    # The member the row was loaded with (unless deferred), so moving it to another member bumps both
+    instance._ledger_member_id = instance.__dict__.get('member_id')
+
+
+@receiver(post_save, sender=Due)
+@receiver(post_delete, sender=Due)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def bump_member_ledger(sender, instance, created=None, **kwargs):
+    member_ids = {instance.member_id, instance._ledger_member_id} - {None}
+    instance._ledger_member_id = instance.member_id
+    # An edit may have moved the row out of a closed year, so only new and deleted rows are placed by their date
+    closed = created is False or getattr(instance, DATE_FIELDS[sender]) < open_period_start()
+
+    def bump():
+        for member_id in member_ids:
+            bump_ledger(member_id)
+            if closed:
+                bump_closed_ledger(member_id)
+
+    # After commit, so no request can cache the old rows under the new version
+    transaction.on_commit(bump)
@@ -0,0 +1,179 @@
+# finances/statement.py
+"""
+A member's statement: dues, payments and archived years merged into one
+chronological list with the balance after every entry.
+
+The merge (UNION ALL) happens in the database and pages are fetched by
+keyset (date, kind, id) rather than OFFSET. A page reads only its own rows
+plus one aggregate, the balance brought forward from everything before its
+first row (indexed per-member sums), and the running balance is added in
+Python; the full export streams the whole history with a SUM window
+instead. Works on PostgreSQL and SQLite.
+"""
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db import connection
+
+CENT = Decimal('0.01')
+
+# Kinds sort in this order on the same date
+ARCHIVED, DUE, PAYMENT = 'A', 'D', 'P'
+
+Entry = namedtuple('Entry', 'entry_date kind entry_id description charge payment balance')
+
+ENTRIES_SQL = """
+    WITH entries AS (
+        SELECT due_date AS entry_date, 'D' AS kind, id AS entry_id, description,
+               amount_due AS charge, 0 AS payment
+        FROM finances_due WHERE member_id = %(member)s
+        UNION ALL
+        SELECT payment_date, 'P', id, COALESCE(notes, ''), 0, amount_paid
+        FROM finances_payment WHERE member_id = %(member)s
+        UNION ALL
+        SELECT {year_end}, 'A', id, '', total_dues, total_payments
+        FROM finances_ledgerarchive WHERE member_id = %(member)s
+    )
+"""
+
+# Every entry with its running balance, for the streamed export
+STATEMENT_SQL = ENTRIES_SQL + """
+    SELECT entry_date, kind, entry_id, description, charge, payment,
+           SUM(charge - payment) OVER (
+               ORDER BY entry_date, kind, entry_id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+           ) AS balance
+    FROM entries
+    ORDER BY entry_date, kind, entry_id
+"""
+
+# One page of entries after or before a key, without balances
+PAGE_SQL = ENTRIES_SQL + """
+    SELECT entry_date, kind, entry_id, description, charge, payment
+    FROM entries
+    {where}
+    ORDER BY entry_date {direction}, kind {direction}, entry_id {direction}
+    LIMIT %(limit)s
+"""
+
+# Balance of every entry sorting before the key (date, kind, id)
+BEFORE_KEY = "({date} < %(date)s OR ({date} = %(date)s AND ('{kind}' < %(kind)s OR ('{kind}' = %(kind)s AND id < %(id)s))))"
+BROUGHT_FORWARD_SQL = """
+    SELECT
+        (SELECT COALESCE(SUM(amount_due), 0) FROM finances_due
+         WHERE member_id = %(member)s AND {due})
+      - (SELECT COALESCE(SUM(amount_paid), 0) FROM finances_payment
+         WHERE member_id = %(member)s AND {payment})
+      + (SELECT COALESCE(SUM(total_dues - total_payments), 0) FROM finances_ledgerarchive
+         WHERE member_id = %(member)s AND {archive})
+"""
+
+# Archived years are shown as one entry on 31 December
+YEAR_END = {
+    'postgresql': "make_date(year, 12, 31)",
+    'sqlite': "printf('%%04d-12-31', year)",
+}
+
+
+def _year_end():
+    return YEAR_END[connection.vendor]
+
+
+def _entry(row):
+    entry_date, kind, entry_id, description, charge, payment, balance = row
+    if not isinstance(entry_date, date):
+        entry_date = date.fromisoformat(entry_date) # SQLite returns text for computed columns
+    if kind == ARCHIVED:
+        description = f"Archived year {entry_date.year}"
+    elif kind == PAYMENT:
+        description = f"Payment{' - ' + description if description else ''}"
+    return Entry(
+        entry_date, kind, entry_id, description,
+        *(Decimal(str(value)).quantize(CENT) for value in (charge, payment, balance)),
+    )
+
+
+def encode_key(entry):
+    return f"{entry.entry_date.isoformat()}.{entry.kind}.{entry.entry_id}"
+
+
+def decode_key(value):
+    """Parse a cursor from a URL; None if it is missing or malformed."""
+    try:
+        entry_date, kind, entry_id = value.split('.')
+        if kind not in (ARCHIVED, DUE, PAYMENT):
+            return None
+        return date.fromisoformat(entry_date), kind, int(entry_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def brought_forward(profile, key):
+    """The member's balance from every entry sorting before `key` (date, kind, id)."""
+    sql = BROUGHT_FORWARD_SQL.format(
+        due=BEFORE_KEY.format(date='due_date', kind=DUE),
+        payment=BEFORE_KEY.format(date='payment_date', kind=PAYMENT),
+        archive=BEFORE_KEY.format(date=_year_end(), kind=ARCHIVED),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'member': profile.pk, 'date': key[0], 'kind': key[1], 'id': key[2]})
+        return Decimal(str(cursor.fetchone()[0]))
+
+
+def statement_page(profile, after=None, before=None, size=50):
+    """
+    Up to `size` entries in date order: the first ones after the `after`
+    key, the last ones before the `before` key, or the latest ones.
+    Returns (entries, has_earlier, has_later).
+    """
+    params = {'member': profile.pk, 'limit': size + 1}
+    if after:
+        where = "WHERE (entry_date, kind, entry_id) > (%(date)s, %(kind)s, %(id)s)"
+        params.update(date=after[0], kind=after[1], id=after[2])
+    elif before:
+        where = "WHERE (entry_date, kind, entry_id) < (%(date)s, %(kind)s, %(id)s)"
+        params.update(date=before[0], kind=before[1], id=before[2])
+    else:
+        where = ''
+    descending = not after # Walk backwards from the key (or the end) and flip the page afterwards
+    sql = PAGE_SQL.format(year_end=_year_end(), where=where, direction='DESC' if descending else 'ASC')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    more = len(rows) > size
+    rows = rows[:size]
+    if descending:
+        rows.reverse()
+    entries = _with_balances(profile, rows)
+    if descending:
+        return entries, more, before is not None
+    return entries, after is not None, more
+
+
+def _with_balances(profile, rows):
+    """Entries for consecutive statement rows, running on from the balance before the first."""
+    if not rows:
+        return []
+    entry_date, kind, entry_id = rows[0][:3]
+    if not isinstance(entry_date, date):
+        entry_date = date.fromisoformat(entry_date)
+    balances = accumulate(
+        (Decimal(str(charge)) - Decimal(str(payment)) for *_, charge, payment in rows),
+        initial=brought_forward(profile, (entry_date, kind, entry_id)),
+    )
+    next(balances) # The brought-forward balance itself
+    return [_entry((*row, balance)) for row, balance in zip(rows, balances)]
+
+
+def iter_statement(profile, chunk_size=2000):
+    """Every entry in date order, fetched in chunks (a server-side cursor on PostgreSQL)."""
+    cursor = connection.chunked_cursor()
+    try:
+        cursor.execute(STATEMENT_SQL.format(year_end=_year_end()), {'member': profile.pk})
+        while rows := cursor.fetchmany(chunk_size):
+            for row in rows:
+                yield _entry(row)
+    finally:
+        cursor.close()
@@ -0,0 +1,88 @@
+# finances/summary.py
+"""
+Precomputed per-member totals for the financial report.
+
+On PostgreSQL the summary is a materialized view refreshed with
+REFRESH MATERIALIZED VIEW CONCURRENTLY, so the report keeps reading the old
+rows while a refresh runs. Other databases get a plain table rebuilt in one
+transaction. Either way it is read through the unmanaged
+`MemberFinancialSummary` model and refreshed by `manage.py
+refresh_financial_summary` (schedule it) or after bulk finance operations.
+"""
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.db.models import DecimalField, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Due, LedgerArchive, MemberFinancialSummary, Payment
+
+TABLE = MemberFinancialSummary._meta.db_table
+
+
+def summary_select(now):
+    """
+    The per-member totals query. Dues, payments and archived years are
+    summed separately so none multiplies the others. The view (or table) it
+    fills is created by the finances migrations.
+    """
+    return f"""
+    SELECT p.id AS member_id,
+           COALESCE(d.total, 0) + COALESCE(a.total_dues, 0) AS total_dues,
+           COALESCE(pay.total, 0) + COALESCE(a.total_payments, 0) AS total_payments,
+           (COALESCE(d.total, 0) + COALESCE(a.total_dues, 0)) - (COALESCE(pay.total, 0) + COALESCE(a.total_payments, 0)) AS balance,
+           {now} AS refreshed_at
+    FROM users_profile p
+    LEFT JOIN (SELECT member_id, SUM(amount_due) AS total FROM finances_due GROUP BY member_id) d
+        ON d.member_id = p.id
+    LEFT JOIN (SELECT member_id, SUM(amount_paid) AS total FROM finances_payment GROUP BY member_id) pay
+        ON pay.member_id = p.id
+    LEFT JOIN (SELECT member_id, SUM(total_dues) AS total_dues, SUM(total_payments) AS total_payments
+               FROM finances_ledgerarchive GROUP BY member_id) a
+        ON a.member_id = p.id
+"""
+
+
+def refresh_summary(using='default'):
+    """Recompute every member's totals."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {TABLE}")
+        else:
+            with transaction.atomic(using=using):
+                cursor.execute(f"DELETE FROM {TABLE}")
+                cursor.execute(
+                    f"INSERT INTO {TABLE} (member_id, total_dues, total_payments, balance, refreshed_at) "
+                    + summary_select('%s'),
+                    [timezone.now()],
+                )
+
+
+def summary_as_of():
+    """When the summary was last refreshed, or None if it never has been."""
+    return MemberFinancialSummary.objects.aggregate(as_of=Max('refreshed_at'))['as_of']
+
+
+def with_totals(profiles, live=False):
+    """
+    Annotate `profiles` with total_dues, total_payments and balance, from the
+    summary or, with `live`, from the ledgers and archived years (correlated
+    sums, one per source).
+    """
+    if live:
+        def member_sum(queryset, field):
+            sums = queryset.filter(member=OuterRef('pk')).values('member').annotate(total=Sum(field)).values('total')
+            return Coalesce(Subquery(sums), Decimal('0.00'), output_field=DecimalField())
+
+        archives = LedgerArchive.objects.all()
+        total_dues = member_sum(Due.objects.all(), 'amount_due') + member_sum(archives, 'total_dues')
+        total_payments = member_sum(Payment.objects.all(), 'amount_paid') + member_sum(archives, 'total_payments')
+    else:
+        # Members added since the last refresh have no row yet and show zero
+        total_dues, total_payments = F('financial_summary__total_dues'), F('financial_summary__total_payments')
+    return profiles.annotate(
+        total_dues=Coalesce(total_dues, Decimal('0.00'), output_field=DecimalField()),
+        total_payments=Coalesce(total_payments, Decimal('0.00'), output_field=DecimalField()),
+    ).annotate(balance=F('total_dues') - F('total_payments'))
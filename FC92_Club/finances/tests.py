@@ -1,3 +1,370 @@
-from django.test import TestCase
+import zipfile
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.messages import constants
+from django.contrib.messages.storage.base import Message
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpRequest
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from FC92_Club.testing import QueryBudgetTestCase, make_user
+from users.models import Profile
+from .batch import generate_statements
+from .pdf import statement_entries
+from .statement import decode_key, encode_key, iter_statement, statement_page
+from .ledger import archive_year, first_open_year, ledger_version, member_totals, open_period_start
+from .models import Due, LedgerArchive, Payment
+from .summary import refresh_summary, summary_as_of, with_totals
+
+
+class FinancesQueryBudgetTests(QueryBudgetTestCase):
+    def test_financial_dashboard(self):
+        self.assertQueryBudget(6, reverse('finances:financial_dashboard'), self.fs)
+
+    def test_record_payment(self):
+        url = reverse('finances:record_payment')
+        self.assertQueryBudget(7, url, self.fs)
+        self.assertQueryBudget(9, url, self.fs, method='post', status=302, grow=False, data={
+            'member': self.member.profile.pk, 'amount_paid': '2500.00', 'payment_date': date.today(), 'notes': '',
+        })
+
+    def test_manage_dues(self):
+        url = reverse('finances:manage_dues')
+        self.assertQueryBudget(8, url, self.fs)
+        self.assertQueryBudget(9, url, self.fs, method='post', status=302, grow=False, data={
+            'submit_individual': '1', 'individual-member': self.member.profile.pk,
+            'individual-amount_due': '1000.00', 'individual-description': 'Levy', 'individual-due_date': date.today(),
+        })
+
+    def test_manage_dues_bulk(self):
+        # Includes rebuilding the financial summary
+        self.assertQueryBudget(12, reverse('finances:manage_dues'), self.fs, method='post', status=302, data={
+            'submit_bulk': '1', 'bulk-amount_due': '1000.00', 'bulk-description': 'Annual levy', 'bulk-due_date': date.today(),
+        })
+
+    def test_my_financial_status(self):
+        # Cold cache: includes the balance brought forward, summed once per closed ledger version
+        self.assertQueryBudget(14, reverse('finances:my_financial_status'), self.member)
+
+    def test_statement(self):
+        # Includes the balance brought forward to the page
+        self.assertQueryBudget(9, reverse('finances:my_statement'), self.member)
+        url = reverse('finances:member_statement', args=[self.member.profile.pk])
+        self.assertQueryBudget(9, url, self.fs)
+        self.assertQueryBudget(8, url + '?format=csv', self.fs)
+        self.assertQueryBudget(8, url + '?format=pdf', self.fs)
+        self.assertQueryBudget(6, url, self.member, status=403, grow=False)
+
+    def test_member_financial_status(self):
+        self.assertQueryBudget(14, reverse('finances:member_financial_status', args=[self.member.profile.pk]), self.fs)
+        self.assertQueryBudget(13, reverse('finances:member_financial_status', args=[self.member.profile.pk]) + '?history=all', self.fs)
+
+
+class FinancialSummaryTests(TestCase):
+    def test_refresh_matches_ledgers(self):
+        member, other = make_user('member'), make_user('other')
+        today = date.today()
+        # Equal amounts must each count
+        Due.objects.bulk_create([Due(member=member.profile, amount_due=Decimal('5000.00'), description='Fee', due_date=today)] * 2)
+        Payment.objects.create(member=member.profile, amount_paid=Decimal('5000.00'), payment_date=today)
+        self.assertIsNone(summary_as_of())
+
+        refresh_summary()
+        self.assertIsNotNone(summary_as_of())
+        totals = {p.pk: (p.total_dues, p.total_payments, p.balance) for p in with_totals(Profile.objects.all())}
+        self.assertEqual(totals[member.profile.pk], (Decimal('10000'), Decimal('5000'), Decimal('5000')))
+        self.assertEqual(totals[other.profile.pk], (0, 0, 0))
+        live = {p.pk: (p.total_dues, p.total_payments, p.balance) for p in with_totals(Profile.objects.all(), live=True)}
+        self.assertEqual(live, totals)
+
+
+class LedgerArchiveTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.member = make_user('member')
+        self.profile = self.member.profile
+        self.closed = first_open_year() - 1
+
+    def add(self, year, due, paid):
+        Due.objects.create(member=self.profile, amount_due=Decimal(due), description='Fee', due_date=date(year, 6, 1))
+        Payment.objects.create(member=self.profile, amount_paid=Decimal(paid), payment_date=date(year, 6, 2))
+
+    def test_archiving_keeps_balances(self):
+        self.add(self.closed, '5000.00', '3000.00')
+        self.add(date.today().year, '1000.00', '0.00')
+        before = member_totals(self.profile)
+
+        self.assertEqual(archive_year(self.closed), 2)
+        self.assertEqual(Due.objects.count() + Payment.objects.count(), 2)
+        self.assertEqual(member_totals(self.profile)['balance'], before['balance'])
+        refresh_summary()
+        self.assertEqual(with_totals(Profile.objects.filter(pk=self.profile.pk)).get().balance, Decimal('3000'))
+
+        # A late entry in an archived year is merged into the same archive row
+        self.add(self.closed, '100.00', '0.00')
+        archive_year(self.closed)
+        archive = LedgerArchive.objects.get(member=self.profile, year=self.closed)
+        self.assertEqual((archive.total_dues, archive.dues_count, archive.payments_count), (Decimal('5100.00'), 2, 2))
+
+    def test_archiving_deletes_in_bulk(self):
+        Due.objects.bulk_create([
+            Due(member=self.profile, amount_due=Decimal('10.00'), description='Fee', due_date=date(self.closed, 1, 1 + i % 28))
+            for i in range(300)
+        ])
+        Payment.objects.bulk_create([
+            Payment(member=self.profile, amount_paid=Decimal('10.00'), payment_date=date(self.closed, 2, 1 + i % 28))
+            for i in range(300)
+        ])
+        # Savepoint, existing archives, per model the totals and one DELETE, the new archive row
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(8):
+            self.assertEqual(archive_year(self.closed), 600)
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(Due.objects.exists() or Payment.objects.exists())
+
+    def test_brought_forward_cached_until_a_closed_year_changes(self):
+        since = open_period_start()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add(self.closed, '700.00', '200.00')
+        self.assertEqual(member_totals(self.profile, since)['brought_forward'], Decimal('500.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add(date.today().year, '1000.00', '0.00')
+        with self.assertNumQueries(2): # Open-year dues and payments only
+            totals = member_totals(self.profile, since)
+        self.assertEqual((totals['brought_forward'], totals['balance']), (Decimal('500.00'), Decimal('1500.00')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(member=self.profile, amount_paid=Decimal('100.00'), payment_date=date(self.closed, 12, 1))
+        self.assertEqual(member_totals(self.profile, since)['brought_forward'], Decimal('400.00'))
+
+    def test_open_years_cannot_be_archived(self):
+        with self.assertRaises(ValueError):
+            archive_year(first_open_year())
+
+    def test_status_page_carries_earlier_years_forward(self):
+        self.add(self.closed - 1, '700.00', '0.00')
+        self.add(date.today().year, '1000.00', '250.00')
+        archive_year(self.closed - 1)
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('finances:my_financial_status'))
+        self.assertEqual(response.context['brought_forward'], Decimal('700.00'))
+        self.assertEqual(response.context['balance'], Decimal('1450.00'))
+        self.assertIsNone(response.context['archives'])
+        response = self.client.get(reverse('finances:my_financial_status') + '?history=all')
+        self.assertEqual(response.context['balance'], Decimal('1450.00'))
+        self.assertEqual(len(response.context['archives']), 1)
+
+
+class StatementTests(TestCase):
+    def setUp(self):
+        self.member = make_user('member')
+        self.profile = self.member.profile
+        # Same date: the due sorts before the payment
+        for day in range(1, 8):
+            Due.objects.create(member=self.profile, amount_due=Decimal('100.00'), description=f'Fee {day}', due_date=date(2026, 1, day))
+            Payment.objects.create(member=self.profile, amount_paid=Decimal('60.00'), payment_date=date(2026, 1, day))
+
+    def test_running_balance_and_keyset_pages(self):
+        latest, has_earlier, has_later = statement_page(self.profile, size=4)
+        self.assertEqual((has_earlier, has_later), (True, False))
+        self.assertEqual(latest[-1].balance, Decimal('280.00'))
+        self.assertEqual([e.kind for e in latest], ['D', 'P', 'D', 'P'])
+
+        pages = [latest]
+        while has_earlier:
+            page, has_earlier, has_later = statement_page(self.profile, before=decode_key(encode_key(pages[0][0])), size=4)
+            self.assertTrue(has_later)
+            pages.insert(0, page)
+        entries = [entry for page in pages for entry in page]
+        self.assertEqual(len(entries), 14)
+        self.assertEqual([e.balance for e in entries[:4]], [Decimal('100.00'), Decimal('40.00'), Decimal('140.00'), Decimal('80.00')])
+
+        following, has_earlier, has_later = statement_page(self.profile, after=decode_key(encode_key(entries[3])), size=4)
+        self.assertEqual(following, entries[4:8])
+        self.assertEqual((has_earlier, has_later), (True, True))
+
+    def test_pages_bring_archived_years_forward(self):
+        # Sorts before the due on the same date
+        LedgerArchive.objects.create(member=self.profile, year=2025, total_dues=Decimal('500.00'), total_payments=Decimal('200.00'))
+        Due.objects.create(member=self.profile, amount_due=Decimal('50.00'), description='Late fee', due_date=date(2025, 12, 31))
+        everything = list(iter_statement(self.profile))
+        self.assertEqual([e.kind for e in everything[:2]], ['A', 'D'])
+
+        pages, has_earlier = statement_page(self.profile, size=3)[:2]
+        while has_earlier:
+            page, has_earlier, has_later = statement_page(self.profile, before=decode_key(encode_key(pages[0])), size=3)
+            pages[:0] = page
+        self.assertEqual(pages, everything)
+        self.assertEqual(pages[-1].balance, Decimal('630.00'))
+
+        following = statement_page(self.profile, after=decode_key(encode_key(everything[0])), size=3)[0]
+        self.assertEqual(following, everything[1:4])
+
+    def test_csv_streams_every_entry(self):
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('finances:my_statement') + '?format=csv')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 15)
+        self.assertEqual(lines[-1], '2026-01-07,Payment,0.00,60.00,280.00')
+
+    def test_bad_cursor_shows_latest_page(self):
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('finances:my_statement') + '?before=nonsense')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['entries']), 14)
+
+
+class StatementExportTests(TestCase):
+    def setUp(self):
+        self.members = [make_user(f'member{i}').profile for i in range(3)]
+        for profile in self.members:
+            Due.objects.create(member=profile, amount_due=Decimal('100.00'), description='Annual Levy', due_date=date(2025, 3, 1))
+            Due.objects.create(member=profile, amount_due=Decimal('50.00'), description='Fee <b>', due_date=date(2026, 3, 1))
+            Payment.objects.create(member=profile, amount_paid=Decimal('30.00'), payment_date=date(2026, 4, 1))
+
+    def test_year_brings_balance_forward(self):
+        opening, entries = statement_entries(self.members[0], 2026)
+        self.assertEqual(opening, Decimal('100.00'))
+        self.assertEqual([e.balance for e in entries], [Decimal('150.00'), Decimal('120.00')])
+
+    def test_archive_has_a_pdf_per_member(self):
+        archive, progress = BytesIO(), []
+        count = generate_statements(
+            [p.pk for p in self.members], archive, year=2026, workers=0, chunk_size=2,
+            progress=lambda done, total: progress.append((done, total)),
+        )
+        self.assertEqual(count, 3)
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+        with zipfile.ZipFile(archive) as output:
+            self.assertEqual(sorted(output.namelist()), [f'statements-2026/member{i}.pdf' for i in range(3)])
+            self.assertTrue(output.read('statements-2026/member0.pdf').startswith(b'%PDF'))
+
+    def test_admin_action_downloads_archive(self):
+        admin = make_user('boss', is_superuser=True, is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:users_user_changelist'), {
+            'action': 'download_statements',
+            '_selected_action': [p.user.pk for p in self.members[:2]],
+        })
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as output:
+            self.assertEqual(len(output.namelist()), 2)
+
+    @override_settings(STATEMENT_DOWNLOAD_LIMIT=2)
+    def test_admin_action_refuses_large_selections(self):
+        admin = make_user('boss', is_superuser=True, is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:users_user_changelist'), {
+            'action': 'download_statements',
+            '_selected_action': [p.user.pk for p in self.members],
+        }, follow=True)
+        self.assertNotEqual(response.get('Content-Type'), 'application/zip')
+        self.assertIn('export_statements', str(list(response.context['messages'])[0]))
+
+
+class StatementCacheTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.member = make_user('member')
+        self.profile = self.member.profile
+        Due.objects.create(member=self.profile, amount_due=Decimal('100.00'), description='Levy', due_date=date.today())
+        self.client.force_login(self.member)
+
+    def get(self, url, **headers):
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, headers=headers)
+        return response, len(queries)
+
+    def test_status_page_served_from_cache_and_revalidated(self):
+        url = reverse('finances:my_financial_status')
+        first, cold = self.get(url)
+        second, warm = self.get(url)
+        self.assertEqual(first.context['status_fragment'], second.context['status_fragment'])
+        self.assertLess(warm, cold) # No ledger queries on a hit
+        # The first response set the CSRF cookie, which the ETag includes
+        not_modified, _ = self.get(url, if_none_match=second['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(member=self.profile, amount_paid=Decimal('40.00'), payment_date=date.today())
+        changed, _ = self.get(url, if_none_match=second['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], second['ETag'])
+        self.assertContains(changed, '₦60.00')
+
+    def test_status_page_etag_covers_csrf_token_and_messages(self):
+        url = reverse('finances:my_financial_status')
+        self.get(url) # Sets the CSRF cookie
+        etag = self.get(url)[0]['ETag']
+        self.assertEqual(self.get(url, if_none_match=etag)[0].status_code, 304)
+
+        # Logging in again rotates the token the page's forms carry
+        self.client.logout()
+        self.client.force_login(self.member)
+        self.get(url)
+        self.assertEqual(self.get(url, if_none_match=etag)[0].status_code, 200)
+
+        etag = self.get(url)[0]['ETag']
+        self.client.cookies['messages'] = CookieStorage(HttpRequest())._encode([Message(constants.SUCCESS, 'Payment recorded.')])
+        response, _ = self.get(url, if_none_match=etag)
+        self.assertContains(response, 'Payment recorded.')
+        self.assertIn('no-store', response['Cache-Control'])
+
+    def test_moving_a_row_bumps_both_members(self):
+        other = make_user('other').profile
+        closed = Due.objects.create(member=self.profile, amount_due=Decimal('30.00'), description='Old levy', due_date=date(first_open_year() - 1, 3, 1))
+        since = open_period_start()
+        self.assertEqual(member_totals(self.profile, since)['brought_forward'], Decimal('30.00'))
+        versions = (ledger_version(self.profile.pk), ledger_version(other.pk))
+
+        due = Due.objects.get(pk=closed.pk)
+        due.member = other
+        with self.captureOnCommitCallbacks(execute=True):
+            due.save()
+        self.assertNotEqual(ledger_version(self.profile.pk), versions[0])
+        self.assertNotEqual(ledger_version(other.pk), versions[1])
+        self.assertEqual(member_totals(self.profile, since)['brought_forward'], Decimal('0.00'))
+        self.assertEqual(member_totals(other, since)['brought_forward'], Decimal('30.00'))
+
+    def test_pdf_version_follows_ledger(self):
+        url = reverse('finances:my_statement') + '?format=pdf'
+        first, _ = self.get(url)
+        self.assertEqual(first['Content-Type'], 'application/pdf')
+        self.assertTrue(first.content.startswith(b'%PDF'))
+        self.assertEqual(self.get(url, if_none_match=first['ETag'])[0].status_code, 304)
+
+        # Other members' changes leave this member's version alone
+        with self.captureOnCommitCallbacks(execute=True):
+            Due.objects.create(member=make_user('other').profile, amount_due=Decimal('5.00'), description='Fee', due_date=date.today())
+        self.assertEqual(self.get(url, if_none_match=first['ETag'])[0].status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Due.objects.filter(member=self.profile).first().delete()
+        self.assertEqual(self.get(url, if_none_match=first['ETag'])[0].status_code, 200)
+
+    def test_pdf_rejects_years_out_of_range(self):
+        url = reverse('finances:my_statement') + '?format=pdf&year='
+        for year in ('0', '10000', '99999'):
+            self.assertEqual(self.client.get(url + year).status_code, 400, year)
+        self.assertEqual(self.client.get(url + '9999').status_code, 200)
+        self.assertEqual(self.client.get(url + str(date.today().year)).status_code, 200)
+
+    def test_bulk_dues_invalidate_every_member(self):
+        url = reverse('finances:my_financial_status')
+        etag = self.get(url)[0]['ETag']
+        self.client.force_login(make_user('treasurer', role='FS'))
+        self.get(reverse('finances:manage_dues'))
+        self.client.post(reverse('finances:manage_dues'), {
+            'submit_bulk': '1', 'bulk-amount_due': '10.00', 'bulk-description': 'Levy', 'bulk-due_date': date.today(),
+        })
+        self.client.force_login(self.member)
+        self.assertEqual(self.get(url, if_none_match=etag)[0].status_code, 200)
@@ -12,6 +12,8 @@ urlpatterns = [
     # Financial Status Views
     path('my-status/', views.member_financial_status, name='my_financial_status'), # For logged-in user's own status
     path('member-status/<int:profile_id>/', views.member_financial_status, name='member_financial_status'), # For FS/Admin viewing specific member
+    path('my-statement/', views.member_statement, name='my_statement'),
+    path('member-statement/<int:profile_id>/', views.member_statement, name='member_statement'),
 
     # Add paths for editing/deleting payments/dues if needed
 ]
\ No newline at end of file
@@ -3,15 +3,22 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.db.models import Sum, F, DecimalField # Removed Coalesce from here
-from django.db.models.functions import Coalesce # Import Coalesce from here
-from django.http import Http404, HttpResponseForbidden # Import for errors
-from decimal import Decimal # Import Decimal for calculations
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse # Import for errors
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+import csv
+import hashlib
+from datetime import MAXYEAR, MINYEAR
+from .cache import artifact_etag, statement_pdf, status_fragment
 from .forms import PaymentForm, DueForm, BulkDueForm
-from .models import Payment, Due
+from .models import Due
+from .ledger import bump_all_ledgers, open_period_start
+from .statement import decode_key, encode_key, iter_statement, statement_page
+from .summary import refresh_summary
 from users.models import Profile
+from FC92_Club.conditional import has_pending_messages
 from django.utils import timezone
-from django.db.models import DecimalField # Import DecimalField for annotations
 
 # --- Permission Helper ---
 def is_financial_secretary_or_admin(user):
@@ -108,6 +115,8 @@ def manage_dues(request):
                 if dues_to_create:
                     try:
                         Due.objects.bulk_create(dues_to_create)
+                        refresh_summary() # Every member's balance just changed
+                        bump_all_ledgers() # bulk_create sends no post_save
                         messages.success(request, f"Added dues of ₦{amount} to {len(dues_to_create)} active members.")
                         return redirect('finances:manage_dues')
                     except Exception as e:
@@ -142,41 +151,104 @@ def member_financial_status(request, profile_id=None):
         messages.error(request, "Could not determine the member profile.")
         return redirect('pages:home')
 
-    # Fetch the specific profile with annotated financial totals
     try:
-        profile_with_totals = Profile.objects.select_related('user') \
-            .annotate(
-                total_dues=Coalesce(
-                    Sum('dues__amount_due', distinct=True),
-                    Decimal('0.00'),
-                    output_field=DecimalField()
-                ),
-                total_payments=Coalesce(
-                    Sum('payments__amount_paid', distinct=True),
-                    Decimal('0.00'),
-                    output_field=DecimalField()
-                )
-            ) \
-            .annotate(
-                balance=F('total_dues') - F('total_payments') # Dues - Payments
-            ) \
-            .get(pk=target_profile_pk)
+        profile = Profile.objects.select_related('user').get(pk=target_profile_pk)
     except Profile.DoesNotExist:
         messages.error(request, "Member profile not found.")
-        return redirect('users:member_list_admin' if can_view_others else 'pages:home')
+        return redirect('users:member_list' if can_view_others else 'pages:home')
+
+    # Open years only (the newest partitions on PostgreSQL) unless the full history is asked for
+    since = None if request.GET.get('history') == 'all' else open_period_start()
+    # The page's links depend on who is looking, the cached fragment doesn't
+    etag = artifact_etag(profile, 'status', since or 'all')
+
+    def page():
+        context = {
+            'target_profile': profile,
+            'status_fragment': status_fragment(profile, since, etag), # Totals and tables, from cache unless the ledger changed
+            'since': since,
+            'can_view_others': can_view_others,
+        }
+        return render(request, 'finances/member_financial_status.html', context)
+
+    return artifact_response(request, etag, page, page=True)
+
+
+def artifact_response(request, etag, build, page=False):
+    """
+    304 if the client already holds this version of a statement artifact, else
+    `build()`. A full `page` also embeds who is looking, their CSRF token and
+    any flash messages: the ETag covers the first two, and with messages
+    pending the page is rendered and sent no-store instead.
+    """
+    if page:
+        if has_pending_messages(request):
+            response = build()
+            patch_cache_control(response, private=True, no_store=True)
+            return response
+        etag = '|'.join([etag, str(request.user.pk), request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')])
+        etag = hashlib.sha1(etag.encode()).hexdigest()
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag) or build()
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True) # Revalidate every time; a 304 is cheap
+    if page:
+        patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+# --- Statement View ---
+
+class Echo:
+    """File-like object for csv.writer that hands each line back instead of buffering it."""
+    def write(self, value):
+        return value
 
-    # Fetch detailed dues and payments separately for display
-    dues = Due.objects.filter(member=profile_with_totals).order_by('-due_date', '-created_at')
-    payments = Payment.objects.filter(member=profile_with_totals).order_by('-payment_date', '-recorded_at')
 
+@login_required
+def member_statement(request, profile_id=None):
+    """
+    Dues, payments and archived years in date order with the running balance;
+    ?format=csv streams all of it, ?format=pdf (optionally &year=) is the cached PDF.
+    """
+    can_view_others = request.user.profile.is_financial_secretary or request.user.profile.is_admin
+    if profile_id and not can_view_others:
+        return HttpResponseForbidden("You do not have permission to view this member's statement.")
+    profile = get_object_or_404(Profile.objects.select_related('user'), pk=profile_id or request.user.profile.pk)
+
+    if request.GET.get('format') == 'csv':
+        writer = csv.writer(Echo())
+        rows = (
+            writer.writerow([entry.entry_date.isoformat(), entry.description, entry.charge, entry.payment, entry.balance])
+            for entry in iter_statement(profile)
+        )
+        header = writer.writerow(['Date', 'Description', 'Charge (₦)', 'Payment (₦)', 'Balance (₦)'])
+        response = StreamingHttpResponse((line for part in ([header], rows) for line in part), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="statement-{profile.user.username}.csv"'
+        return response
+
+    if request.GET.get('format') == 'pdf':
+        year = request.GET.get('year')
+        year = int(year) if year and year.isdigit() else None
+        if year is not None and not MINYEAR <= year <= MAXYEAR:
+            return HttpResponseBadRequest("Unknown statement year.")
+        etag = artifact_etag(profile, 'pdf', year or 'all')
+
+        def download():
+            response = HttpResponse(statement_pdf(profile, year, etag), content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="statement-{profile.user.username}-{year or "all"}.pdf"'
+            return response
+
+        return artifact_response(request, etag, download)
+
+    entries, has_earlier, has_later = statement_page(
+        profile, after=decode_key(request.GET.get('after')), before=decode_key(request.GET.get('before')),
+    )
     context = {
-        'target_profile': profile_with_totals, # Profile now includes annotated totals
-        'dues': dues, # Detailed list for display
-        'payments': payments, # Detailed list for display
-        'dues_total': profile_with_totals.total_dues, # From annotation
-        'payments_total': profile_with_totals.total_payments, # From annotation
-        'balance': profile_with_totals.balance, # From annotation
+        'target_profile': profile,
+        'entries': entries,
+        'earlier_key': encode_key(entries[0]) if entries and has_earlier else None,
+        'later_key': encode_key(entries[-1]) if entries and has_later else None,
         'can_view_others': can_view_others,
     }
-
-    return render(request, 'finances/member_financial_status.html', context)
+    return render(request, 'finances/statement.html', context)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class GalleryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gallery'
+
+    def ready(self):
+        import gallery.signals # Import signals here
+        from .imagehash import max_duplicate_distance
+        max_duplicate_distance() # Refuse to start with a threshold the band index can't serve
@@ -28,6 +28,11 @@ class PhotoUploadForm(forms.Form):
         label='Captions (one per line, matching photo order)',
         help_text="Enter one caption per line. They will be matched to the uploaded photos in order."
     )
+    allow_duplicates = forms.BooleanField(
+        required=False,
+        label='Upload photos that look like duplicates',
+        help_text="By default, photos that match one already in this event are skipped."
+    )
 
     def __init__(self, *args, **kwargs):
         event_instance = kwargs.pop('event_instance', None)
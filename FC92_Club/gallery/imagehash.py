@@ -0,0 +1,69 @@
+# gallery/imagehash.py
+# Perceptual (difference) hashing used to spot near-duplicate photo uploads.
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from PIL import Image
+
+HASH_SIZE = 8  # 8x8 comparisons -> 64-bit hash
+BAND_COUNT = 4  # 4 bands of 16 bits each
+BAND_BITS = (HASH_SIZE * HASH_SIZE) // BAND_COUNT
+
+# Two hashes within this Hamming distance share at least one band exactly
+# (pigeonhole), so band lookups never miss a match inside the threshold.
+# Anything looser needs more, narrower bands (and a migration for them).
+MAX_INDEXED_DISTANCE = BAND_COUNT - 1
+
+
+def check_distance(distance, name='max_distance'):
+    if not isinstance(distance, int) or not 0 <= distance <= MAX_INDEXED_DISTANCE:
+        raise ValueError(
+            f"{name} must be an integer from 0 to {MAX_INDEXED_DISTANCE}: with {BAND_COUNT} hash bands, "
+            f"photos further apart need not share a band and would be missed, not matched."
+        )
+    return distance
+
+
+def max_duplicate_distance():
+    """GALLERY_DUPLICATE_MAX_DISTANCE (default MAX_INDEXED_DISTANCE, also its upper limit)."""
+    distance = getattr(settings, 'GALLERY_DUPLICATE_MAX_DISTANCE', MAX_INDEXED_DISTANCE)
+    try:
+        return check_distance(distance, 'GALLERY_DUPLICATE_MAX_DISTANCE')
+    except ValueError as e:
+        raise ImproperlyConfigured(str(e))
+
+
+def compute_dhash(image_file):
+    """
+    Return the 64-bit dHash of an image file as a 16 character hex string.
+
+    The file position is restored afterwards so the upload can still be saved.
+    """
+    position = image_file.tell() if hasattr(image_file, 'tell') else None
+    try:
+        with Image.open(image_file) as img:
+            # Let the JPEG decoder downscale while decoding instead of
+            # inflating full resolution pixels we are about to throw away.
+            img.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+            small = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+            pixels = list(small.getdata())
+    finally:
+        if position is not None:
+            image_file.seek(position)
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f'{value:016x}'
+
+
+def hash_bands(phash):
+    """Split a hex hash into BAND_COUNT integers used as indexed lookup keys."""
+    width = BAND_BITS // 4
+    return [int(phash[i * width:(i + 1) * width], 16) for i in range(BAND_COUNT)]
+
+
+def hamming_distance(hash_a, hash_b):
+    """Number of differing bits between two hex hashes."""
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count('1')
@@ -0,0 +1,83 @@
+# gallery/management/commands/dedupe_photos.py
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from gallery.imagehash import compute_dhash, hash_bands, hamming_distance, max_duplicate_distance
+from gallery.models import Photo
+
+
+class Command(BaseCommand):
+    help = "Backfill perceptual hashes and remove near-duplicate photos within each event (oldest copy is kept)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report duplicates without computing hashes or deleting anything.")
+        parser.add_argument('--event', type=int, help="Only process the event with this id.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows fetched/deleted per query.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        photos = Photo.objects.all()
+        if options['event']:
+            photos = photos.filter(event_id=options['event'])
+
+        if dry_run:
+            unhashed = photos.filter(phash='').count()
+            self.stdout.write(f"{unhashed} photo(s) have no hash yet and are skipped (dry run, nothing written).")
+        else:
+            hashed = self.backfill_hashes(photos.filter(phash=''), batch_size)
+            self.stdout.write(f"Computed hashes for {hashed} photo(s).")
+
+        duplicate_ids = self.find_duplicates(photos.exclude(phash=''), batch_size)
+        if not duplicate_ids:
+            self.stdout.write(self.style.SUCCESS("No duplicate photos found."))
+            return
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"Found {len(duplicate_ids)} duplicate photo(s) (dry run, nothing deleted)."))
+            return
+
+        deleted = 0
+        for start in range(0, len(duplicate_ids), batch_size):
+            count, _ = Photo.objects.filter(pk__in=duplicate_ids[start:start + batch_size]).delete()
+            deleted += count
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} duplicate photo(s)."))
+
+    def backfill_hashes(self, photos, batch_size):
+        hashed = 0
+        for photo in photos.iterator(chunk_size=batch_size):
+            try:
+                photo.phash = compute_dhash(photo.image)
+            except (OSError, ValueError) as e:
+                self.stderr.write(f"Could not hash photo {photo.pk} ({photo.image.name}): {e}")
+                continue
+            finally:
+                photo.image.close()
+            photo.save(update_fields=['phash', 'phash_band0', 'phash_band1', 'phash_band2', 'phash_band3'])
+            hashed += 1
+        return hashed
+
+    def find_duplicates(self, photos, batch_size):
+        """
+        Stream photos event by event, oldest first, keeping an in-memory banded
+        bucket index of the photos kept so far in the current event.
+        """
+        max_distance = max_duplicate_distance()
+        rows = photos.order_by('event_id', 'uploaded_at', 'pk').values_list('pk', 'event_id', 'phash')
+
+        duplicate_ids = []
+        current_event = None
+        buckets = defaultdict(list)
+        for pk, event_id, phash in rows.iterator(chunk_size=batch_size):
+            if event_id != current_event:
+                current_event = event_id
+                buckets = defaultdict(list)
+
+            bands = list(enumerate(hash_bands(phash)))
+            if any(hamming_distance(phash, kept) <= max_distance for key in bands for kept in buckets[key]):
+                duplicate_ids.append(pk)
+                continue
+            for key in bands:
+                buckets[key].append(phash)
+        return duplicate_ids
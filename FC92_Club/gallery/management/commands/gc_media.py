@@ -0,0 +1,83 @@
+# gallery/management/commands/gc_media.py
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from gallery.models import Photo
+
+PHOTO_DIR = os.path.join('gallery', 'photos')
+
+
+def iter_files(directory):
+    """Yield (path, stat) for every file below `directory` without listing it all up front."""
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path, entry.stat()
+
+
+class Command(BaseCommand):
+    help = "Delete files under MEDIA_ROOT/gallery/photos/ that no Photo references anymore."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be deleted without deleting it.")
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help="Leave files younger than this alone; they may belong to an upload still in progress.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="File names checked per database query.")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        dry_run = options['dry_run']
+        cutoff = time.time() - options['grace_hours'] * 3600
+        batch_size = options['batch_size']
+
+        scanned = orphaned = reclaimed = 0
+        batch = {}
+        for path, stat in iter_files(os.path.join(settings.MEDIA_ROOT, PHOTO_DIR)):
+            scanned += 1
+            if stat.st_mtime > cutoff:
+                continue
+            name = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            batch[name] = (path, stat.st_size)
+            if len(batch) >= batch_size:
+                count, size = self.collect(batch, dry_run)
+                orphaned += count
+                reclaimed += size
+                batch = {}
+        if batch:
+            count, size = self.collect(batch, dry_run)
+            orphaned += count
+            reclaimed += size
+
+        summary = f"Scanned {scanned} file(s); {orphaned} orphaned, {filesizeformat(reclaimed)}"
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"{summary} reclaimable (dry run, nothing deleted)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{summary} reclaimed."))
+
+    def collect(self, batch, dry_run):
+        """Delete the files in `batch` that no Photo row references."""
+        referenced = set(Photo.objects.filter(image__in=batch.keys()).values_list('image', flat=True))
+        count = size = 0
+        for name, (path, file_size) in batch.items():
+            if name in referenced:
+                continue
+            if self.verbosity >= 2:
+                self.stdout.write(f"{'Would delete' if dry_run else 'Deleting'} {name} ({filesizeformat(file_size)})")
+            if not dry_run:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    continue
+            count += 1
+            size += file_size
+        return count, size
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 06:42
+
+import gallery.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0002_photo_phash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='photo',
+            name='image',
+            field=models.ImageField(upload_to=gallery.models.photo_upload_to),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 07:41
+
+import gallery.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0003_photo_content_hashed_upload_to'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='photo',
+            name='image',
+            field=models.ImageField(db_index=True, upload_to=gallery.models.photo_upload_to),
+        ),
+    ]
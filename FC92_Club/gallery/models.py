@@ -1,7 +1,12 @@
+import hashlib
+import os
+
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from .imagehash import BAND_COUNT, check_distance, compute_dhash, hash_bands, hamming_distance, max_duplicate_distance
 
 User = get_user_model()
 
@@ -26,18 +31,74 @@ class Event(models.Model):
     def get_absolute_url(self):
         return reverse('gallery:event_detail', kwargs={'pk': self.pk})
 
+def photo_upload_to(instance, filename):
+    """Name photos after a hash of their contents so their URLs can be cached as immutable."""
+    digest = hashlib.sha256()
+    for chunk in instance.image.chunks():
+        digest.update(chunk)
+    extension = os.path.splitext(filename)[1].lower()
+    return f'gallery/photos/{digest.hexdigest()[:20]}{extension}'
+
 class Photo(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='photos')
-    image = models.ImageField(upload_to='gallery/photos/')
+    image = models.ImageField(upload_to=photo_upload_to, db_index=True) # Looked up by name before a file is deleted
     caption = models.CharField(max_length=200, blank=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='uploaded_photos')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     is_featured = models.BooleanField(default=False)
+    # Perceptual hash (dHash, hex) plus its bands, used for duplicate lookups
+    phash = models.CharField(max_length=16, blank=True, editable=False)
+    phash_band0 = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    phash_band1 = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    phash_band2 = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    phash_band3 = models.PositiveIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['-uploaded_at']
         verbose_name = 'Photo'
         verbose_name_plural = 'Photos'
+        indexes = [
+            models.Index(fields=['event', 'phash_band0'], name='photo_event_band0_idx'),
+            models.Index(fields=['event', 'phash_band1'], name='photo_event_band1_idx'),
+            models.Index(fields=['event', 'phash_band2'], name='photo_event_band2_idx'),
+            models.Index(fields=['event', 'phash_band3'], name='photo_event_band3_idx'),
+        ]
 
     def __str__(self):
         return f"Photo for {self.event.title} - {self.caption or 'No caption'}"
+
+    def save(self, *args, **kwargs):
+        if self.image and not self.phash:
+            try:
+                self.phash = compute_dhash(self.image)
+            except (OSError, ValueError):
+                self.phash = ''  # Unreadable image; skip duplicate tracking
+        self.set_hash_bands()
+        super().save(*args, **kwargs)
+
+    def set_hash_bands(self):
+        bands = hash_bands(self.phash) if self.phash else [None] * BAND_COUNT
+        for i, band in enumerate(bands):
+            setattr(self, f'phash_band{i}', band)
+
+    @classmethod
+    def find_near_duplicates(cls, event, phash, max_distance=None, exclude_pk=None):
+        """
+        Return photos in `event` whose hash is within `max_distance` bits of `phash`.
+
+        Candidates come from the indexed band columns, so the lookup cost depends
+        on the number of similar photos rather than the size of the event, and
+        `max_distance` can be at most MAX_INDEXED_DISTANCE.
+        """
+        if max_distance is None:
+            max_distance = max_duplicate_distance()
+        check_distance(max_distance)
+
+        band_filter = Q()
+        for i, band in enumerate(hash_bands(phash)):
+            band_filter |= Q(**{f'phash_band{i}': band})
+
+        candidates = cls.objects.filter(band_filter, event=event).only('id', 'phash', 'image', 'uploaded_at')
+        if exclude_pk is not None:
+            candidates = candidates.exclude(pk=exclude_pk)
+        return [photo for photo in candidates if hamming_distance(photo.phash, phash) <= max_distance]
@@ -0,0 +1,187 @@
+# gallery/renditions.py
+# Resized copies of photos, generated on first request and kept in a
+# size-capped disk cache under MEDIA_ROOT with least-recently-used eviction.
+# Each process keeps a running estimate of the cache size and only walks the
+# directory when that estimate passes the cap or is SCAN_INTERVAL old (other
+# workers add renditions too), not on every miss. Render locks live outside
+# MEDIA_ROOT (GALLERY_RENDITION_LOCK_DIR) so they are never served.
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a per-process lock
+    fcntl = None
+
+DEFAULT_WIDTHS = (320, 640, 1024, 1600)
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RENDITION_DIR = 'renditions'
+LOCK_STRIPES = 64  # Bounded number of lock files shared by all variants
+TOUCH_INTERVAL = 60 * 60  # Only refresh a hit's recency once an hour
+EVICT_TO_RATIO = 0.9  # Evict to a little below the cap so the next misses fit without evicting again
+SCAN_INTERVAL = 5 * 60  # Max age of a process's size estimate before the directory is walked again
+
+_process_lock = threading.Lock()
+_usage_lock = threading.Lock()
+_usage = {}  # cache root -> (estimated bytes, time of the last full scan)
+
+
+def rendition_widths():
+    return tuple(getattr(settings, 'GALLERY_RENDITION_WIDTHS', DEFAULT_WIDTHS))
+
+
+def _cache_root():
+    return os.path.join(settings.MEDIA_ROOT, RENDITION_DIR)
+
+
+def _lock_dir():
+    # Shared by the workers of one host, like the flock() calls on it
+    return getattr(settings, 'GALLERY_RENDITION_LOCK_DIR', os.path.join(tempfile.gettempdir(), 'fc92-rendition-locks'))
+
+
+def rendition_path(photo, width):
+    """Path of a photo's rendition relative to MEDIA_ROOT."""
+    key = hashlib.sha1(f'{photo.pk}:{photo.image.name}'.encode()).hexdigest()[:20]
+    return os.path.join(RENDITION_DIR, f'w{width}', f'{key}.jpg')
+
+
+def rendition_paths(photo):
+    return [rendition_path(photo, width) for width in rendition_widths()]
+
+
+@contextmanager
+def _variant_lock(relative_path):
+    """Exclusive lock shared across worker processes for one variant's stripe."""
+    stripe = int(hashlib.sha1(relative_path.encode()).hexdigest(), 16) % LOCK_STRIPES
+    lock_dir = _lock_dir()
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(os.path.join(lock_dir, f'{stripe}.lock'), 'a+b') as lock_file:
+        if fcntl is None:
+            with _process_lock:
+                yield
+            return
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _touch(full_path, stat):
+    # Recency lives in atime so mtime (and the ETag built from it) stays stable
+    now = time.time()
+    if now - stat.st_atime > TOUCH_INTERVAL:
+        try:
+            os.utime(full_path, (now, stat.st_mtime))
+        except OSError:
+            pass
+
+
+def _render(photo, width, full_path):
+    with photo.image.open('rb') as source, Image.open(source) as img:
+        # JPEG can decode straight to a smaller scale, which is much cheaper
+        img.draft('RGB', (width, width))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        # Write to a temp file and rename so readers never see a partial image
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                img.save(out, 'JPEG', quality=85, optimize=True, progressive=True)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _cache_max_bytes():
+    return getattr(settings, 'GALLERY_RENDITION_CACHE_MAX_BYTES', DEFAULT_CACHE_MAX_BYTES)
+
+
+def _note_rendition(size, keep):
+    """Add a new rendition to this process's estimate; scan and evict only if it may be over budget."""
+    root = _cache_root()
+    max_bytes = _cache_max_bytes()
+    with _usage_lock:
+        estimate, scanned_at = _usage.get(root, (None, 0))
+        if estimate is not None and time.time() - scanned_at < SCAN_INTERVAL and estimate + size <= max_bytes:
+            _usage[root] = (estimate + size, scanned_at)
+            return 0
+    return enforce_cache_budget(max_bytes, keep=keep)
+
+
+def enforce_cache_budget(max_bytes=None, keep=None):
+    """Delete least recently used renditions until the cache fits its budget."""
+    if max_bytes is None:
+        max_bytes = _cache_max_bytes()
+
+    entries = []
+    total = 0
+    root = _cache_root()
+    scanned_at = time.time()
+    for width_dir in os.scandir(root):
+        if not width_dir.is_dir():
+            continue
+        for entry in os.scandir(width_dir.path):
+            if entry.is_file() and entry.name.endswith('.jpg'):
+                stat = entry.stat()
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+                total += stat.st_size
+
+    freed = 0
+    if total > max_bytes:
+        target = total - int(max_bytes * EVICT_TO_RATIO)
+        for _, size, path in sorted(entries):
+            if freed >= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+                freed += size
+            except FileNotFoundError:
+                pass  # Another worker evicted it first
+    with _usage_lock:
+        _usage[root] = (total - freed, scanned_at)
+    return freed
+
+
+def discard_renditions(paths):
+    """Remove cached renditions (MEDIA_ROOT-relative paths), e.g. of a deleted photo."""
+    for path in paths:
+        try:
+            os.unlink(os.path.join(settings.MEDIA_ROOT, path))
+        except FileNotFoundError:
+            pass
+
+
+def get_rendition(photo, width):
+    """
+    Return the MEDIA_ROOT-relative path of `photo` resized to `width`,
+    rendering it first if it is not cached yet.
+    """
+    relative_path = rendition_path(photo, width)
+    full_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    try:
+        _touch(full_path, os.stat(full_path))
+        return relative_path
+    except FileNotFoundError:
+        pass
+
+    with _variant_lock(relative_path):
+        # Another request may have rendered it while we waited for the lock
+        if not os.path.exists(full_path):
+            _render(photo, width, full_path)
+            _note_rendition(os.path.getsize(full_path), keep=full_path)
+    return relative_path
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Event, Photo
+from .renditions import discard_renditions, rendition_paths
+
+
+@receiver(post_save, sender=Photo)
+@receiver(post_delete, sender=Photo)
+def touch_event(sender, instance, **kwargs):
+    """Bump the event's updated_at so list page validators notice photo changes."""
+    Event.objects.filter(pk=instance.event_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Photo)
+def delete_photo_files(sender, instance, **kwargs):
+    """
+    Remove a deleted photo's image and cached renditions from storage.
+
+    Deletion waits for the transaction to commit so a rollback never leaves a
+    row pointing at a missing file. The image is kept while other rows still
+    use it (seeded photos share a small pool of files).
+    """
+    if not instance.image:
+        return
+    storage = instance.image.storage
+    name = instance.image.name
+    renditions = rendition_paths(instance)  # pk is cleared once the delete finishes
+
+    def delete_files():
+        if not Photo.objects.filter(image=name).exists():
+            storage.delete(name)
+        discard_renditions(renditions)
+
+    transaction.on_commit(delete_files)
@@ -1,3 +1,353 @@
-from django.test import TestCase
+import io
+import os
+import random
+import shutil
+import tempfile
+import time
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from FC92_Club.testing import QueryBudgetTestCase, make_user
+from .imagehash import MAX_INDEXED_DISTANCE, compute_dhash, hamming_distance, hash_bands, max_duplicate_distance
+from .models import Event, Photo
+from .renditions import enforce_cache_budget, get_rendition
+from .zipstream import photo_archive_name
+
+
+def jpeg_upload(name, color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), color).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+def noise_upload(name, seed, quality=90):
+    """A blocky random picture; the same seed at another quality is a near-duplicate."""
+    pixels = random.Random(seed).randbytes(9 * 8)
+    image = Image.frombytes('L', (9, 8), pixels).resize((90, 80), Image.Resampling.NEAREST).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class GalleryQueryBudgetTests(QueryBudgetTestCase):
+    def test_event_list(self):
+        self.assertQueryBudget(9, reverse('gallery:event_list'), self.member)
+        self.assertQueryBudget(9, reverse('gallery:event_list') + '?page=2', self.admin)
+
+    def test_event_detail(self):
+        self.assertQueryBudget(8, reverse('gallery:event_detail', args=[self.event.pk]), self.member)
+        self.assertQueryBudget(8, reverse('gallery:event_detail', args=[self.event.pk]), self.admin)
+
+    def test_event_download(self):
+        self.assertQueryBudget(9, reverse('gallery:event_download', args=[self.event.pk]), self.member)
+
+    def test_photo_rendition(self):
+        self.assertQueryBudget(6, reverse('gallery:photo_rendition', args=[self.photo.pk, 320]), self.member)
+
+    def test_event_create(self):
+        url = reverse('gallery:event_create')
+        self.assertQueryBudget(6, url, self.admin)
+        self.assertQueryBudget(7, url, self.admin, method='post', status=302, grow=False, data={
+            'title': 'AGM', 'description': 'Annual meeting', 'date': '2025-06-01',
+        })
+
+    def test_event_edit(self):
+        url = reverse('gallery:event_edit', args=[self.event.pk])
+        self.assertQueryBudget(7, url, self.admin)
+        self.assertQueryBudget(8, url, self.admin, method='post', status=302, grow=False, data={
+            'title': 'Renamed', 'description': 'Club event.', 'date': '2025-06-01',
+        })
+
+    def test_event_delete(self):
+        url = reverse('gallery:event_delete', args=[self.event.pk])
+        self.assertQueryBudget(7, url, self.admin)
+        self.assertQueryBudget(18, url, self.admin, method='post', status=302, grow=False)
+
+    def test_photo_upload(self):
+        url = reverse('gallery:photo_upload', args=[self.event.pk])
+        self.assertQueryBudget(7, url, self.admin)
+        self.assertQueryBudget(12, url, self.admin, method='post', status=302, grow=False, data={
+            'event': self.event.pk,
+            'images': [jpeg_upload('a.jpg', (255, 0, 0)), jpeg_upload('b.jpg', (0, 0, 255))],
+            'allow_duplicates': 'on',
+        })
+
+    def test_photo_edit(self):
+        url = reverse('gallery:photo_edit', args=[self.photo.pk])
+        self.assertQueryBudget(9, url, self.admin)
+
+    def test_photo_delete(self):
+        url = reverse('gallery:photo_delete', args=[self.photo.pk])
+        self.assertQueryBudget(8, url, self.admin)
+        self.assertQueryBudget(10, url, self.admin, method='post', status=302, grow=False)
+
+
+class MediaTestCase(TestCase):
+    """A throwaway MEDIA_ROOT per test, plus an event to attach photos to."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='fc92-gallery-test-')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.admin = make_user('admin', role='ADM')
+        self.event = Event.objects.create(
+            title='AGM', description='Annual meeting', date=timezone.now(), location='Lagos',
+            created_by=self.admin, is_published=True,
+        )
+
+    def add_photo(self, color=(255, 0, 0), name='a.jpg'):
+        return Photo.objects.create(event=self.event, image=jpeg_upload(name, color), uploaded_by=self.admin)
+
+
+class PhotoFileTests(MediaTestCase):
+    def test_shared_file_kept_until_its_last_photo_is_deleted(self):
+        photo = self.add_photo()
+        # Seeded photos point at a shared pool of files
+        twin = Photo.objects.create(event=self.event, image=photo.image.name, uploaded_by=self.admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            photo.delete()
+        self.assertTrue(default_storage.exists(twin.image.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            twin.delete()
+        self.assertFalse(default_storage.exists(twin.image.name))
+
+
+class ImageHashTests(TestCase):
+    def test_near_duplicates_hash_close_and_others_far(self):
+        original = noise_upload('a.jpg', seed=1)
+        original.seek(10)
+        phash = compute_dhash(original)
+        self.assertEqual(original.tell(), 10) # The upload can still be saved
+        self.assertRegex(phash, r'^[0-9a-f]{16}$')
+        self.assertLessEqual(hamming_distance(phash, compute_dhash(noise_upload('b.jpg', seed=1, quality=30))), 2)
+        self.assertGreater(hamming_distance(phash, compute_dhash(noise_upload('c.jpg', seed=2))), MAX_INDEXED_DISTANCE)
+
+    def test_bands_split_the_hash_in_order(self):
+        self.assertEqual(hash_bands('0123456789abcdef'), [0x0123, 0x4567, 0x89ab, 0xcdef])
+        self.assertEqual(hamming_distance('0000000000000000', '8000000000000003'), 3)
+
+    def test_threshold_beyond_the_band_index_is_refused(self):
+        self.assertEqual(max_duplicate_distance(), MAX_INDEXED_DISTANCE)
+        with override_settings(GALLERY_DUPLICATE_MAX_DISTANCE=MAX_INDEXED_DISTANCE + 1):
+            with self.assertRaises(ImproperlyConfigured):
+                max_duplicate_distance()
+        with self.assertRaises(ValueError):
+            Photo.find_near_duplicates(None, '0' * 16, max_distance=MAX_INDEXED_DISTANCE + 1)
+
+
+class NearDuplicateTests(MediaTestCase):
+    def add_noise_photo(self, seed, quality=90, event=None):
+        return Photo.objects.create(
+            event=event or self.event, image=noise_upload(f'{seed}-{quality}.jpg', seed, quality), uploaded_by=self.admin,
+        )
+
+    def test_find_near_duplicates_uses_the_bands(self):
+        original = self.add_noise_photo(seed=1)
+        self.add_noise_photo(seed=2)
+        copy = noise_upload('copy.jpg', seed=1, quality=30)
+        self.assertEqual(Photo.find_near_duplicates(self.event, compute_dhash(copy)), [original])
+        self.assertEqual(Photo.find_near_duplicates(self.event, original.phash, exclude_pk=original.pk), [])
+
+    def test_dedupe_keeps_the_oldest_copy_per_event(self):
+        other_event = Event.objects.create(
+            title='Picnic', description='', date=timezone.now(), location='Abuja', created_by=self.admin,
+        )
+        original = self.add_noise_photo(seed=1)
+        copy = self.add_noise_photo(seed=1, quality=30)
+        unrelated = self.add_noise_photo(seed=2)
+        elsewhere = self.add_noise_photo(seed=1, event=other_event)
+        unhashed = self.add_noise_photo(seed=3)
+        Photo.objects.filter(pk=unhashed.pk).update(phash='', phash_band0=None, phash_band1=None, phash_band2=None, phash_band3=None)
+
+        before = list(Photo.objects.order_by('pk').values())
+        out = io.StringIO()
+        call_command('dedupe_photos', '--dry-run', stdout=out)
+        self.assertIn('1 photo(s) have no hash yet', out.getvalue())
+        self.assertIn('Found 1 duplicate', out.getvalue())
+        self.assertEqual(list(Photo.objects.order_by('pk').values()), before)
+
+        call_command('dedupe_photos', stdout=io.StringIO())
+        self.assertEqual(
+            set(Photo.objects.values_list('pk', flat=True)),
+            {original.pk, unrelated.pk, elsewhere.pk, unhashed.pk},
+        )
+        self.assertFalse(Photo.objects.filter(pk=copy.pk).exists())
+        self.assertNotEqual(Photo.objects.get(pk=unhashed.pk).phash, '') # Backfilled
+
+
+class EventDownloadTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+        self.url = reverse('gallery:event_download', args=[self.event.pk])
+
+    def test_zip_streams_every_photo(self):
+        first, second = self.add_photo((255, 0, 0), 'red.jpg'), self.add_photo((0, 0, 255), 'blue.jpg')
+        default_storage.delete(self.add_photo((0, 255, 0), 'gone.jpg').image.name) # Skipped, not fatal
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('agm-photos.zip', response['Content-Disposition'])
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), [photo_archive_name(first), photo_archive_name(second)])
+            self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist()))
+            with first.image.open('rb') as source:
+                self.assertEqual(archive.read(photo_archive_name(first)), source.read())
+
+    def test_unchanged_album_is_not_modified(self):
+        self.add_photo()
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.add_photo((0, 0, 255), 'b.jpg')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_empty_album_redirects(self):
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('gallery:event_detail', args=[self.event.pk]))
+        self.assertNotIn('ETag', response)
+        # Nothing to revalidate, so a conditional request still gets the redirect
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='*').status_code, 302)
+
+
+class ServeMediaTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.photo = self.add_photo()
+        self.url = reverse('media', args=[self.photo.image.name])
+        self.client.force_login(make_user('member'))
+
+    def test_members_only(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+
+    def test_file_served_with_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        with self.photo.image.open('rb') as source:
+            self.assertEqual(b''.join(response.streaming_content), source.read())
+        # Upload names are content hashes, so the browser may keep them for good
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    def test_renditions_are_revalidated(self):
+        path = get_rendition(self.photo, 320)
+        response = self.client.get(reverse('media', args=[path]))
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_only_photos_and_finished_renditions_are_served(self):
+        get_rendition(self.photo, 320)
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, 'renditions', 'locks')))
+        for name in ('documents/minutes.txt', 'renditions/locks/0.lock', 'renditions/w320/tmpab12cd.tmp', 'gallery/photos/tmpab12cd.tmp'):
+            default_storage.save(name, ContentFile(b'private'))
+            self.assertEqual(self.client.get(reverse('media', args=[name])).status_code, 404, name)
+
+    def test_paths_outside_media_root_are_not_found(self):
+        self.assertEqual(self.client.get(reverse('media', args=['../settings.py'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('media', args=['gallery/photos/missing.jpg'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('media', args=['gallery'])).status_code, 404)
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel', MEDIA_ACCEL_PREFIX='/protected-media/')
+    def test_x_accel_hands_the_file_to_nginx(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.photo.image.name}')
+        self.assertEqual(response.content, b'')
+        self.assertIn('ETag', response)
+
+    @override_settings(MEDIA_SERVE_MODE='x-sendfile')
+    def test_x_sendfile_hands_the_file_to_the_server(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.photo.image.path)
+        self.assertEqual(response.content, b'')
+
+
+class PhotoCleanupTests(MediaTestCase):
+    def test_files_removed_only_once_the_delete_commits(self):
+        photo = self.add_photo()
+        rendition = os.path.join(settings.MEDIA_ROOT, get_rendition(photo, 320))
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            photo.delete()
+            raise RuntimeError # Rolled back: the row is back, so the file must stay
+        self.assertTrue(default_storage.exists(photo.image.name))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Photo.objects.get(image=photo.image.name).delete()
+        self.assertTrue(default_storage.exists(photo.image.name))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(default_storage.exists(photo.image.name))
+        self.assertFalse(os.path.exists(rendition))
+
+    def test_gc_media_deletes_old_unreferenced_files(self):
+        kept = self.add_photo()
+        orphan = default_storage.save('gallery/photos/orphan.jpg', ContentFile(b'x' * 100))
+        fresh = default_storage.save('gallery/photos/uploading.jpg', ContentFile(b'x'))
+        other = default_storage.save('documents/minutes.txt', ContentFile(b'x'))
+        day_ago = time.time() - 25 * 3600
+        for name in (kept.image.name, orphan, other):
+            os.utime(default_storage.path(name), (day_ago, day_ago))
+
+        out = io.StringIO()
+        call_command('gc_media', '--dry-run', stdout=out)
+        self.assertIn('1 orphaned, 100', out.getvalue())
+        self.assertTrue(default_storage.exists(orphan))
+
+        call_command('gc_media', '--batch-size', '1', stdout=io.StringIO())
+        self.assertFalse(default_storage.exists(orphan))
+        for name in (kept.image.name, fresh, other):
+            self.assertTrue(default_storage.exists(name), name)
+
+
+class RenditionCacheTests(MediaTestCase):
+    def render(self, *photos):
+        return [os.path.join(settings.MEDIA_ROOT, get_rendition(photo, 320)) for photo in photos]
+
+    def test_least_recently_used_renditions_are_evicted(self):
+        paths = self.render(*(self.add_photo((40 * i, 0, 0), f'{i}.jpg') for i in range(4)))
+        size = os.path.getsize(paths[0])
+        # Oldest use first; the `keep` rendition survives even though it is the oldest
+        for age, path in enumerate(reversed(paths)):
+            os.utime(path, (time.time() - 3600 * (age + 1), os.stat(path).st_mtime))
+
+        freed = enforce_cache_budget(max_bytes=int(size * 2.5), keep=paths[0])
+        self.assertGreater(freed, 0)
+        self.assertEqual([os.path.exists(path) for path in paths], [True, False, False, True])
+
+    def test_directory_is_only_walked_when_the_estimate_needs_it(self):
+        photos = [self.add_photo((40 * i, 0, 0), f'{i}.jpg') for i in range(3)]
+        with mock.patch('gallery.renditions.enforce_cache_budget', wraps=enforce_cache_budget) as scan:
+            first, second = self.render(*photos[:2])
+            self.assertEqual(scan.call_count, 1) # No estimate yet in this process
+            self.render(*photos[:2]) # Hits
+            self.assertEqual(scan.call_count, 1)
+
+            with override_settings(GALLERY_RENDITION_CACHE_MAX_BYTES=os.path.getsize(first) + os.path.getsize(second)):
+                self.render(photos[2])
+            self.assertEqual(scan.call_count, 2) # Over budget: scanned and evicted
+        self.assertFalse(os.path.exists(first))
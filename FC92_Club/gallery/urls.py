@@ -9,7 +9,9 @@ urlpatterns = [
     path('event/create/', views.event_create, name='event_create'),
     path('event/<int:pk>/edit/', views.event_edit, name='event_edit'),
     path('event/<int:pk>/delete/', views.event_delete, name='event_delete'),
+    path('event/<int:pk>/download/', views.event_download, name='event_download'),
     path('event/<int:event_pk>/photos/upload/', views.photo_upload, name='photo_upload'),
+    path('photo/<int:pk>/w<int:width>/', views.photo_rendition, name='photo_rendition'),
     path('photo/<int:pk>/edit/', views.photo_edit, name='photo_edit'),
     path('photo/<int:pk>/delete/', views.photo_delete, name='photo_delete'),
 ] 
\ No newline at end of file
@@ -1,17 +1,31 @@
+import hashlib
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import OuterRef, Q, Subquery
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.text import slugify
+from django.views.decorators.http import condition, require_GET, require_safe
+from FC92_Club.conditional import condition_on_latest
+from FC92_Club.media import media_file_response
 from .models import Event, Photo
 from .forms import EventForm, PhotoForm, PhotoUploadForm
+from .imagehash import compute_dhash, hamming_distance, max_duplicate_distance
+from .renditions import get_rendition, rendition_widths
+from .zipstream import stream_photo_zip
 from users.decorators import admin_required
 
 # Create your views here.
 
 @login_required
+@condition_on_latest(lambda request: Event.objects.all())
 def event_list(request):
-    events = Event.objects.all().order_by('-date')
+    # Newest photo of each event as its cover, fetched in the same query as the events
+    latest_photo = Photo.objects.filter(event=OuterRef('pk')).order_by('-uploaded_at').values('pk')[:1]
+    events = Event.objects.annotate(cover_photo_id=Subquery(latest_photo)).order_by('-date')
     paginator = Paginator(events, 9)  # Show 9 events per page
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
@@ -20,12 +34,55 @@ def event_list(request):
 @login_required
 def event_detail(request, pk):
     event = get_object_or_404(Event, pk=pk)
-    photos = event.photos.all().order_by('-uploaded_at')
+    photos = event.photos.select_related('uploaded_by').order_by('-uploaded_at')
     return render(request, 'gallery/event_detail.html', {
         'event': event,
         'photos': photos
     })
 
+def event_photos_etag(request, pk):
+    """
+    ETag for an event's album: changes whenever a photo is added, removed or
+    replaced. None for an empty album, whose redirect must not be revalidated.
+    """
+    photo_set = Photo.objects.filter(event_id=pk).order_by('pk').values_list('pk', 'image')
+    digest = hashlib.sha1(str(pk).encode())
+    empty = True
+    for photo_pk, image_name in photo_set:
+        digest.update(f'|{photo_pk}:{image_name}'.encode())
+        empty = False
+    return None if empty else digest.hexdigest()
+
+@login_required
+@require_GET
+@condition(etag_func=event_photos_etag)
+def event_download(request, pk):
+    """Stream all of an event's photos as a single ZIP archive."""
+    event = get_object_or_404(Event, pk=pk)
+    photos = event.photos.order_by('uploaded_at', 'pk')
+    if not photos.exists():
+        messages.info(request, 'This event has no photos to download yet.')
+        return redirect('gallery:event_detail', pk=event.pk)
+
+    response = StreamingHttpResponse(stream_photo_zip(photos.iterator()), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{slugify(event.title) or "event"}-photos.zip"'
+    # Members only: browsers may keep a copy but must revalidate the ETag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+@login_required
+@require_safe
+def photo_rendition(request, pk, width):
+    """Serve a photo resized to one of the allowed widths, rendering it on first use."""
+    if width not in rendition_widths():
+        raise Http404("Unsupported image width.")
+    photo = get_object_or_404(Photo.objects.only('pk', 'image'), pk=pk)
+    try:
+        path = get_rendition(photo, width)
+    except (OSError, ValueError):
+        raise Http404("Image could not be resized.")
+    return media_file_response(request, path)
+
 @admin_required
 def event_create(request):
     if request.method == 'POST':
@@ -71,20 +128,41 @@ def photo_upload(request, event_pk):
             images = request.FILES.getlist('images')
             captions_text = form.cleaned_data.get('captions', '')  # Use .get for safety
             captions = captions_text.splitlines()  # splitlines handles different line endings
+            allow_duplicates = form.cleaned_data.get('allow_duplicates')
+            max_distance = max_duplicate_distance()
+            batch_hashes = []  # Catch the same photo selected twice in one upload
+            uploaded_count = 0
 
             for i, image in enumerate(images):
                 caption = captions[i].strip() if i < len(captions) else ''
+                try:
+                    phash = compute_dhash(image)
+                except (OSError, ValueError):
+                    phash = ''  # Let the ImageField report unreadable files
+
+                if phash and not allow_duplicates:
+                    is_duplicate = (
+                        any(hamming_distance(phash, seen) <= max_distance for seen in batch_hashes)
+                        or Photo.find_near_duplicates(event, phash, max_distance)
+                    )
+                    if is_duplicate:
+                        messages.warning(request, f"Skipped '{image.name}': it looks like a duplicate of a photo already in this event.")
+                        continue
+                    batch_hashes.append(phash)
+
                 try:
                     Photo.objects.create(
                         event=event,
                         image=image,
                         caption=caption,
-                        uploaded_by=request.user
+                        uploaded_by=request.user,
+                        phash=phash
                     )
+                    uploaded_count += 1
                 except Exception as e:
                     messages.error(request, f"Error saving photo '{image.name}': {e}")
 
-            messages.success(request, f'{len(images)} photo(s) uploaded successfully!')
+            messages.success(request, f'{uploaded_count} photo(s) uploaded successfully!')
             return redirect('gallery:event_detail', pk=event.pk)
         else:
             messages.error(request, "Please correct the errors below.")
@@ -0,0 +1,10 @@
+# gunicorn.conf.py
+# Picked up automatically when gunicorn is started from this directory.
+import os
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges from the shared Prometheus directory
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,47 @@
+# pages/cache.py
+# Cached announcement block for the home page.
+from django.utils import timezone
+
+from FC92_Club.cache import bump_namespace, cached, versioned_key
+from .models import Announcement
+
+CACHE_NAMESPACE = 'announcements'
+HOME_ANNOUNCEMENTS_LIMIT = 5
+HOME_ANNOUNCEMENTS_TIMEOUT = 60 * 60  # Upper bound; saves and deletes invalidate sooner
+
+
+def _load_home_announcements():
+    now = timezone.now()
+    published = Announcement.objects.filter(is_published=True)
+    announcements = list(
+        published.filter(publish_date__lte=now)
+        .select_related('author')
+        .defer('content')
+        .order_by('-publish_date')[:HOME_ANNOUNCEMENTS_LIMIT]
+    )
+    next_publish = published.filter(publish_date__gt=now).order_by('publish_date') \
+        .values_list('publish_date', flat=True).first()
+    return {'announcements': announcements, 'next_publish': next_publish}
+
+
+def _seconds_until_next_publish(block):
+    if not block['next_publish']:
+        return HOME_ANNOUNCEMENTS_TIMEOUT
+    remaining = (block['next_publish'] - timezone.now()).total_seconds()
+    return max(1, min(HOME_ANNOUNCEMENTS_TIMEOUT, int(remaining) + 1))
+
+
+def get_home_announcements():
+    """
+    Latest published announcements for the home page.
+
+    The list is cached until an Announcement changes (see pages.signals) or
+    the next scheduled announcement goes live, whichever comes first.
+    """
+    block = cached(versioned_key(CACHE_NAMESPACE, 'home'), _load_home_announcements,
+                   timeout=_seconds_until_next_publish, stale_grace=0)
+    return block['announcements']
+
+
+def invalidate_home_announcements():
+    bump_namespace(CACHE_NAMESPACE)
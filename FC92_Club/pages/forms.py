@@ -6,6 +6,6 @@ class AnnouncementForm(forms.ModelForm):
         model = Announcement
         fields = ['title', 'content', 'publish_date', 'is_published']
         widgets = {
-            'content': forms.Textarea(attrs={'rows': 4}),
+            'content': forms.Textarea(attrs={'rows': 8}),
             'publish_date': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
         } 
\ No newline at end of file
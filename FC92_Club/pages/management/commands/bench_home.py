@@ -0,0 +1,45 @@
+# pages/management/commands/bench_home.py
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+def _uncached(key, load, **kwargs):
+    return load()
+
+
+class Command(BaseCommand):
+    help = "Benchmark anonymous home page requests per second with and without the announcement block cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per run.")
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            # Bypass only the announcement block; the navigation and footer fragments stay cached
+            with mock.patch('pages.cache.cached', _uncached):
+                before = self.run(total)
+            after = self.run(total)
+
+        self.stdout.write(f"{'':<10}{'req/s':>10}{'queries/req':>14}")
+        self.stdout.write(f"{'uncached':<10}{before[0]:>10.1f}{before[1]:>14}")
+        self.stdout.write(f"{'cached':<10}{after[0]:>10.1f}{after[1]:>14}")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {after[0] / before[0]:.2f}x"))
+
+    def run(self, total):
+        client = Client()
+        client.get('/')  # Warm up templates, URL resolver and the cache
+        with CaptureQueriesContext(connection) as queries:
+            client.get('/')
+        query_count = len(queries)  # Read now: the query log is reset on every request
+        started = time.perf_counter()
+        for _ in range(total):
+            client.get('/')
+        elapsed = time.perf_counter() - started
+        return total / elapsed, query_count
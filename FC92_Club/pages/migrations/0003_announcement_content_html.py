@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-19 06:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+from pages.rendering import render_markdown
+
+
+def render_existing(apps, schema_editor):
+    Announcement = apps.get_model('pages', 'Announcement')
+    for announcement in Announcement.objects.only('pk', 'content').iterator():
+        Announcement.objects.filter(pk=announcement.pk).update(content_html=render_markdown(announcement.content))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='announcement',
+            name='content',
+            field=models.TextField(help_text='Markdown is supported.'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['-publish_date', '-id'], name='announcement_archive_idx'),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
@@ -5,10 +5,12 @@ from django.db import models
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from .rendering import render_markdown
 
 class Announcement(models.Model):
     title = models.CharField(max_length=200)
-    content = models.TextField()
+    content = models.TextField(help_text="Markdown is supported.")
+    content_html = models.TextField(blank=True, editable=False) # Rendered from content on save
     publish_date = models.DateTimeField(default=timezone.now)
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     is_published = models.BooleanField(default=True, help_text="Untick to hide announcement.")
@@ -18,5 +20,16 @@ class Announcement(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.content_html = render_markdown(self.content)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'content_html'}
+        super().save(*args, **kwargs)
+
     class Meta:
-        ordering = ['-publish_date'] # Show newest first
\ No newline at end of file
+        ordering = ['-publish_date'] # Show newest first
+        indexes = [
+            # Keyset pagination of the archive walks (publish_date, id) newest first
+            models.Index(fields=['-publish_date', '-id'], name='announcement_archive_idx'),
+        ]
\ No newline at end of file
@@ -0,0 +1,25 @@
+# pages/rendering.py
+# Markdown -> sanitized HTML for announcements, done once at save time.
+import markdown
+import nh3
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'blockquote', 'br', 'code', 'em', 'h3', 'h4', 'h5', 'h6', 'hr',
+    'li', 'ol', 'p', 'pre', 'strong', 'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+}
+
+
+def render_markdown(text):
+    """Render announcement Markdown to HTML that is safe to output unescaped."""
+    html = markdown.markdown(text or '', extensions=['extra', 'sane_lists', 'nl2br'])
+    return nh3.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes={'http', 'https', 'mailto'},
+        link_rel='noopener noreferrer nofollow',
+    )
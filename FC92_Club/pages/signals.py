@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_home_announcements
+from .models import Announcement
+
+
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def clear_announcement_cache(sender, instance, **kwargs):
+    invalidate_home_announcements()
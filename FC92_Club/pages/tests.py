@@ -1,3 +1,206 @@
-from django.test import TestCase
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.messages import constants
+from django.contrib.messages.storage.base import Message
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache, caches
+from django.http import HttpRequest
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from FC92_Club.cache import bump_namespace, cache_stats, cached, versioned_key
+from FC92_Club.testing import QueryBudgetTestCase, add_announcements, make_user
+from pages.views import _encode_cursor
+from .models import Announcement
+from .rendering import render_markdown
+
+
+class PagesQueryBudgetTests(QueryBudgetTestCase):
+    def test_home_page(self):
+        self.assertQueryBudget(2, reverse('pages:home'))
+        self.assertQueryBudget(8, reverse('pages:home'), self.member)
+
+    def test_announcement_list(self):
+        self.assertQueryBudget(8, reverse('pages:announcement_list'), self.member)
+
+    def test_announcement_list_older_page(self):
+        cursor = _encode_cursor(self.announcements[5])
+        self.assertQueryBudget(8, reverse('pages:announcement_list') + f'?before={cursor}', self.member)
+
+    def test_create_announcement(self):
+        url = reverse('pages:create_announcement')
+        self.assertQueryBudget(6, url, self.admin)
+        self.assertQueryBudget(7, url, self.admin, method='post', status=302, grow=False, data={
+            'title': 'New', 'content': 'Text', 'publish_date': '2025-01-01 10:00', 'is_published': 'on',
+        })
+
+    def test_toggle_announcement(self):
+        url = reverse('pages:toggle_announcement', args=[self.announcements[0].pk])
+        self.assertQueryBudget(8, url, self.admin, method='post', status=302, grow=False)
+
+
+class HomePageCacheTests(TestCase):
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        self.announcements = add_announcements(3, author=make_user('admin', role='ADM'))
+
+    def test_warm_home_page_runs_no_queries_for_visitors(self):
+        self.client.get(reverse('pages:home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('pages:home'))
+        self.assertContains(response, 'Announcement 0')
+
+        # Saving an announcement moves the cache to a new version
+        self.announcements[0].title = 'AGM moved'
+        self.announcements[0].save()
+        with self.assertNumQueries(2): # Latest published, next scheduled
+            self.assertContains(self.client.get(reverse('pages:home')), 'AGM moved')
+
+
+class ConditionalListTests(TestCase):
+    def setUp(self):
+        add_announcements(3, author=make_user('admin', role='ADM'))
+        self.client.force_login(make_user('member'))
+        self.url = reverse('pages:announcement_list')
+
+    def etag(self):
+        self.client.get(self.url) # Sets the CSRF cookie, which is part of the ETag
+        return self.client.get(self.url)['ETag']
+
+    def queue_message(self, text):
+        # What a view that adds a message and redirects here leaves behind
+        self.client.cookies['messages'] = CookieStorage(HttpRequest())._encode([Message(constants.SUCCESS, text)])
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.etag()
+        self.assertEqual(self.client.get(self.url, headers={'if-none-match': etag}).status_code, 304)
+
+    def test_pending_message_is_rendered_not_304(self):
+        etag = self.etag()
+        self.queue_message('Profile saved.')
+        response = self.client.get(self.url, headers={'if-none-match': etag})
+        self.assertContains(response, 'Profile saved.')
+        self.assertIn('no-store', response['Cache-Control'])
+        self.assertFalse(response.has_header('ETag'))
+        # Shown once; afterwards the page is conditional again
+        self.assertEqual(self.client.get(self.url, headers={'if-none-match': etag}).status_code, 304)
+
+
+class MarkdownRenderingTests(TestCase):
+    def test_markdown_is_rendered(self):
+        html = render_markdown("**Dues** are due.\nPay by *Friday*.\n\n- one\n- two\n\n[Site](https://fc92.example)")
+        self.assertIn('<strong>Dues</strong>', html)
+        self.assertIn('<br>', html) # Single newlines are kept
+        self.assertIn('<li>one</li>', html)
+        self.assertIn('<a href="https://fc92.example" rel="noopener noreferrer nofollow">Site</a>', html)
+
+    def test_scripts_handlers_and_unsafe_links_are_stripped(self):
+        html = render_markdown(
+            "<script>alert(1)</script>\n\n<img src=x onerror=alert(2)>\n\n"
+            "<p onclick=\"steal()\" style=\"color:red\">Hi</p>\n\n"
+            "[bad](javascript:alert(3)) <iframe src=\"https://evil.example\"></iframe>"
+        )
+        for fragment in ('<script', 'alert(1)', '<img', 'onerror', 'onclick', 'style=', 'javascript:', '<iframe'):
+            self.assertNotIn(fragment, html)
+        self.assertIn('Hi', html)
+        self.assertIn('>bad</a>', html)
+        self.assertEqual(render_markdown(None), '')
+
+    def test_announcement_stores_the_sanitised_html(self):
+        author = make_user('admin', role='ADM')
+        announcement = Announcement.objects.create(title='AGM', content='**Soon** <script>x()</script>', author=author)
+        self.assertEqual(announcement.content_html, '<p><strong>Soon</strong> </p>')
+        announcement.content = '_Moved_'
+        announcement.save(update_fields=['content'])
+        announcement.refresh_from_db()
+        self.assertEqual(announcement.content_html, '<p><em>Moved</em></p>')
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'FC92_Club.cache.TieredCache', 'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 5}},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-test-shared'},
+})
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.shared = caches['shared']
+
+    def test_shared_values_are_copied_to_the_local_tier(self):
+        self.shared.set('greeting', 'hello') # As another worker would
+        before = cache_stats()
+        self.assertEqual(cache.get('greeting'), 'hello')
+        self.shared.delete('greeting')
+        self.assertEqual(cache.get('greeting'), 'hello') # Local copy, for up to LOCAL_TIMEOUT
+        after = cache_stats()
+        self.assertEqual((after['shared_hits'] - before['shared_hits'], after['local_hits'] - before['local_hits']), (1, 1))
+
+        cache.delete('greeting')
+        self.assertIsNone(cache.get('greeting'))
+
+    def test_add_is_decided_by_the_shared_tier(self):
+        self.shared.set('lock', 1)
+        self.assertFalse(cache.add('lock', 2))
+        self.assertIsNone(cache.local.get('lock'))
+        self.assertTrue(cache.add('other', 2))
+        self.assertEqual(self.shared.get('other'), 2)
+
+    def test_bumping_a_namespace_changes_its_keys(self):
+        key = versioned_key('things', 'home')
+        cache.set(key, 'old')
+        cache.local.set('ns:things', 0) # A stale local version must not be used
+        bump_namespace('things')
+        self.assertNotEqual(versioned_key('things', 'home'), key)
+        self.assertIsNone(cache.get(versioned_key('things', 'home')))
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'FC92_Club.cache.TieredCache', 'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 5}},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'stampede-test-shared'},
+})
+class CachedStampedeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def producer(self, value='fresh'):
+        def produce():
+            self.calls += 1
+            return value
+        return produce
+
+    def test_fresh_value_is_computed_once(self):
+        self.assertEqual(cached('key', self.producer()), 'fresh')
+        self.assertEqual(cached('key', self.producer()), 'fresh')
+        self.assertEqual(self.calls, 1)
+
+    def test_expired_value_served_while_another_worker_recomputes(self):
+        cached('key', self.producer('old'), timeout=0) # Expired at once, kept for the grace period
+        cache.add('lock:key', 1) # Another worker is recomputing
+        self.assertEqual(cached('key', self.producer('new')), 'old')
+        self.assertEqual(self.calls, 1)
+
+        cache.delete('lock:key')
+        self.assertEqual(cached('key', self.producer('new')), 'new')
+        self.assertEqual(self.calls, 2)
+        self.assertIsNone(cache.get('lock:key'))
+
+    def test_cold_key_waits_for_the_lock_holder(self):
+        cache.add('lock:key', 1)
+
+        def other_worker_finishes(seconds):
+            cache.set('key', ('theirs', time.time() + 60))
+
+        with mock.patch('FC92_Club.cache.time.sleep', side_effect=other_worker_finishes) as sleep:
+            self.assertEqual(cached('key', self.producer()), 'theirs')
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(self.calls, 0)
+
+    def test_lock_released_when_the_producer_fails(self):
+        def fail():
+            raise RuntimeError
+        with self.assertRaises(RuntimeError):
+            cached('key', fail)
+        self.assertIsNone(cache.get('lock:key'))
+        self.assertEqual(cached('key', self.producer()), 'fresh')
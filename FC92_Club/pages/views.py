@@ -3,18 +3,38 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db.models import Q
 from django.utils import timezone
 from .models import Announcement
 from .forms import AnnouncementForm
+from .cache import get_home_announcements
+from FC92_Club.conditional import condition_on_latest
 
-def home_page(request):
-    announcements = Announcement.objects.filter(
+ANNOUNCEMENTS_PER_PAGE = 10
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+def visible_announcements(request=None):
+    return Announcement.objects.filter(
         is_published=True,
-        publish_date__lte=timezone.now() # Only show published and past/current publish date
-    ).order_by('-publish_date')[:5] # Show latest 5
+        publish_date__lte=timezone.now()
+    )
 
+def _encode_cursor(announcement):
+    """Keyset cursor for the archive: publish time in microseconds plus id."""
+    micros = (announcement.publish_date - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}-{announcement.pk}"
+
+def _decode_cursor(cursor):
+    try:
+        micros, pk = cursor.split('-')
+        return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+def home_page(request):
     context = {
-        'announcements': announcements
+        'announcements': get_home_announcements() # Latest 5 published, served from cache
     }
     return render(request, 'pages/home.html', context)
 
@@ -36,16 +56,35 @@ def create_announcement(request):
     return render(request, 'pages/announcement_form.html', {'form': form})
 
 @login_required
+@condition_on_latest(visible_announcements)
 def announcement_list(request):
-    """List all active announcements."""
-    announcements = Announcement.objects.filter(
-        is_published=True,
-        publish_date__lte=timezone.now()
-    ).order_by('-publish_date')
+    """
+    Archive of active announcements, newest first, one page at a time.
+
+    Pages are keyset paginated on (publish_date, id) so each page costs the
+    same no matter how far back the archive goes.
+    """
+    announcements = visible_announcements() \
+        .select_related('author') \
+        .defer('content') \
+        .order_by('-publish_date', '-id')
+
+    cursor = _decode_cursor(request.GET.get('before'))
+    if cursor:
+        publish_date, pk = cursor
+        announcements = announcements.filter(
+            Q(publish_date__lt=publish_date) | Q(publish_date=publish_date, id__lt=pk)
+        )
+
+    page = list(announcements[:ANNOUNCEMENTS_PER_PAGE + 1])
+    has_older = len(page) > ANNOUNCEMENTS_PER_PAGE
+    page = page[:ANNOUNCEMENTS_PER_PAGE]
     is_admin = request.user.profile.role == 'ADM' if hasattr(request.user, 'profile') else False
     
     return render(request, 'pages/announcement_list.html', {
-        'announcements': announcements,
+        'announcements': page,
+        'older_cursor': _encode_cursor(page[-1]) if has_older else None,
+        'is_first_page': cursor is None,
         'is_admin': is_admin
     })
 
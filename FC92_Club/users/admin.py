@@ -1,5 +1,11 @@
-from django.contrib import admin
+import tempfile
+
+from django.conf import settings
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.http import FileResponse
+
+from finances.batch import generate_statements
 from .models import Profile, User
 
 # Define an inline admin descriptor for Profile model
@@ -26,6 +32,24 @@ class CustomUserAdmin(BaseUserAdmin):
         return instance.profile.get_role_display()
     get_role.short_description = 'Role'
 
+    actions = ['download_statements']
+
+    @admin.action(description='Download PDF statements for selected users')
+    def download_statements(self, request, queryset):
+        profile_ids = list(Profile.objects.filter(user__in=queryset).order_by('pk').values_list('pk', flat=True))
+        if len(profile_ids) > settings.STATEMENT_DOWNLOAD_LIMIT:
+            # Rendering is CPU-bound and would hold the web worker for the whole selection
+            self.message_user(request, (
+                f"{len(profile_ids)} users selected; statements can be downloaded for at most "
+                f"{settings.STATEMENT_DOWNLOAD_LIMIT} at a time. For more, run "
+                f"'python manage.py export_statements --members <profile ids>' on the server."
+            ), messages.WARNING)
+            return None
+        archive = tempfile.TemporaryFile() # Closed by FileResponse once sent
+        generate_statements(profile_ids, archive, workers=0)
+        archive.seek(0)
+        return FileResponse(archive, as_attachment=True, filename='statements.zip', content_type='application/zip')
+
     def get_inline_instances(self, request, obj=None):
         if not obj:
             return list()
@@ -0,0 +1,71 @@
+# users/management/commands/bench_templates.py
+import time
+from statistics import mean
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template.backends.django import Template
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+PAGES = [
+    ('member list', 'users:member_list'),
+    ('financial report', 'users:financial_report'),
+]
+
+
+class Command(BaseCommand):
+    help = "Time template rendering of the heaviest pages with layout fragment caching off and on."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help="Admin or financial secretary to render the pages as.")
+        parser.add_argument('--requests', type=int, default=50, help="Requests per page and mode.")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+
+        render_times = []
+        original_render = Template.render
+
+        def timed_render(template, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original_render(template, *args, **kwargs)
+            finally:
+                render_times.append(time.perf_counter() - started)
+
+        Template.render = timed_render
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                client = Client()
+                client.force_login(user)
+                self.stdout.write(f"{'page':<18}{'fragments':<11}{'total ms':>10}{'render ms':>11}{'queries':>9}")
+                for label, url_name in PAGES:
+                    url = reverse(url_name)
+                    with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+                        self.report(label, 'uncached', client, url, options['requests'], render_times)
+                    self.report(label, 'cached', client, url, options['requests'], render_times)
+        finally:
+            Template.render = original_render
+
+    def report(self, label, mode, client, url, count, render_times):
+        client.get(url)  # Warm up the template loader and fragment cache
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        query_count = len(queries)
+
+        totals = []
+        render_times.clear()
+        for _ in range(count):
+            started = time.perf_counter()
+            client.get(url)
+            totals.append(time.perf_counter() - started)
+        self.stdout.write(
+            f"{label:<18}{mode:<11}{mean(totals) * 1000:>10.2f}{mean(render_times) * 1000:>11.2f}{query_count:>9}"
+        )
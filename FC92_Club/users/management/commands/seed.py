@@ -0,0 +1,245 @@
+# users/management/commands/seed.py
+import io
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from finances.models import Due, Payment
+from finances.ledger import bump_all_ledgers
+from finances.summary import refresh_summary
+from gallery.imagehash import compute_dhash
+from gallery.models import Event, Photo
+from pages.cache import invalidate_home_announcements
+from pages.models import Announcement
+from pages.rendering import render_markdown
+from users.models import Profile
+
+User = get_user_model()
+
+FIRST_NAMES = [
+    'Ade', 'Bola', 'Chidi', 'Dayo', 'Emeka', 'Funmi', 'Gbenga', 'Hauwa', 'Ifeanyi', 'Jide',
+    'Kemi', 'Lola', 'Musa', 'Ngozi', 'Obi', 'Segun', 'Tunde', 'Uche', 'Yemi', 'Zainab',
+]
+LAST_NAMES = [
+    'Adeyemi', 'Bello', 'Chukwu', 'Danjuma', 'Eze', 'Fashola', 'Garba', 'Ibrahim', 'Johnson', 'Kalu',
+    'Lawal', 'Mohammed', 'Nwosu', 'Okafor', 'Okonkwo', 'Olawale', 'Sani', 'Usman', 'Williams', 'Yusuf',
+]
+CITIES = ['Lagos', 'Abuja', 'Ibadan', 'Enugu', 'Kano', 'Port Harcourt', 'London', 'Houston']
+DUE_DESCRIPTIONS = ['Monthly Membership Fee', 'Annual Levy', 'Event Contribution', 'Welfare Fund']
+PHOTO_POOL_SIZE = 16
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic members, dues, payments, events, photos and announcements at a configurable scale."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=1000)
+        parser.add_argument('--dues-per-member', type=int, default=12)
+        parser.add_argument('--payments-per-member', type=int, default=10)
+        parser.add_argument('--events', type=int, default=50)
+        parser.add_argument('--photos-per-event', type=int, default=10)
+        parser.add_argument('--announcements', type=int, default=100)
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per INSERT.")
+        parser.add_argument('--prefix', default='seed', help="Username prefix; rerunning with the same prefix adds more members.")
+        parser.add_argument('--random-seed', type=int, default=92, help="Makes runs reproducible.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        self.random = random.Random(options['random_seed'])
+        self.prefix = options['prefix']
+
+        admin, treasurer = self.staff_accounts()
+        profile_ids = self.members(options['members'])
+        self.ledger(Due, profile_ids, options['dues_per_member'], self.due)
+        self.ledger(Payment, profile_ids, options['payments_per_member'], lambda pk: self.payment(pk, treasurer))
+        self.events(options['events'], options['photos_per_event'], admin)
+        self.announcements(options['announcements'], admin)
+        refresh_summary()
+        bump_all_ledgers() # bulk_create sends no post_save
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded. Log in as '{admin.username}' or '{treasurer.username}' with password '{self.prefix}pass'."
+        ))
+
+    def staff_accounts(self):
+        accounts = []
+        for suffix, role, is_superuser in (('admin', 'ADM', True), ('fs', 'FS', False)):
+            user, created = User.objects.get_or_create(
+                username=f'{self.prefix}_{suffix}',
+                defaults={
+                    'email': f'{self.prefix}_{suffix}@example.com',
+                    'first_name': 'Seed',
+                    'last_name': suffix.upper(),
+                    'is_staff': is_superuser,
+                    'is_superuser': is_superuser,
+                },
+            )
+            if created:
+                user.set_password(f'{self.prefix}pass')
+                user.save()
+            # The post_save signal created the profile; only the role needs setting
+            Profile.objects.filter(user=user).update(role=role, status='ACT')
+            accounts.append(user)
+        return accounts
+
+    def members(self, count):
+        """Create `count` more members and their profiles; returns the new profile ids."""
+        existing = User.objects.filter(username__startswith=f'{self.prefix}_m').count()
+        password = make_password(f'{self.prefix}pass') # Hashed once, shared by every seeded member
+        joined = timezone.now() - timedelta(days=3 * 365)
+
+        def users():
+            for i in range(existing, existing + count):
+                first, last = self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES)
+                yield User(
+                    username=f'{self.prefix}_m{i:07d}',
+                    email=f'{self.prefix}_m{i:07d}@example.com',
+                    first_name=first,
+                    last_name=last,
+                    password=password,
+                    date_joined=joined + timedelta(minutes=i),
+                )
+
+        profile_ids = []
+        for batch in batched(users(), self.batch_size):
+            with transaction.atomic():
+                # bulk_create skips post_save, so profiles are created here in bulk too
+                User.objects.bulk_create(batch)
+                user_ids = list(User.objects.filter(username__in=[u.username for u in batch]).values_list('id', flat=True))
+                Profile.objects.bulk_create([
+                    Profile(
+                        user_id=user_id,
+                        status='ACT' if self.random.random() < 0.9 else self.random.choice(['SUS', 'REM']),
+                        phone_number=f'080{self.random.randrange(10**8):08d}',
+                        city=self.random.choice(CITIES),
+                        country='NG',
+                    )
+                    for user_id in user_ids
+                ])
+                profile_ids += Profile.objects.filter(user_id__in=user_ids).values_list('id', flat=True)
+            self.progress('members', len(profile_ids), count)
+        return profile_ids
+
+    def ledger(self, model, profile_ids, per_member, make_row):
+        total = len(profile_ids) * per_member
+        rows = (make_row(pk) for pk in profile_ids for _ in range(per_member))
+        created = 0
+        for batch in batched(rows, self.batch_size):
+            model.objects.bulk_create(batch)
+            created += len(batch)
+            self.progress(model._meta.verbose_name_plural, created, total)
+
+    def random_date(self, days_back=3 * 365):
+        return date.today() - timedelta(days=self.random.randrange(days_back))
+
+    def due(self, profile_id):
+        return Due(
+            member_id=profile_id,
+            amount_due=Decimal(self.random.choice([2000, 5000, 10000, 25000])),
+            description=self.random.choice(DUE_DESCRIPTIONS),
+            due_date=self.random_date(),
+        )
+
+    def payment(self, profile_id, recorded_by):
+        return Payment(
+            member_id=profile_id,
+            amount_paid=Decimal(self.random.choice([2000, 5000, 10000, 20000])),
+            payment_date=self.random_date(),
+            recorded_by=recorded_by,
+        )
+
+    def photo_pool(self):
+        """
+        A few small JPEGs in storage that the seeded photos share, so seeding
+        writes no per-photo files. Deleting a photo keeps a file other rows
+        still use (gallery.signals).
+        """
+        pool = []
+        for i in range(PHOTO_POOL_SIZE):
+            name = f'gallery/photos/{self.prefix}-{i:02d}.jpg'
+            if not default_storage.exists(name):
+                image = Image.new('RGB', (1600, 1067), (self.random.randrange(256), self.random.randrange(256), 128))
+                image.paste((255, 255, 255), (i * 90, 200, i * 90 + 400, 700)) # Distinct shape per file
+                buffer = io.BytesIO()
+                image.save(buffer, 'JPEG', quality=80)
+                name = default_storage.save(name, ContentFile(buffer.getvalue()))
+            with default_storage.open(name) as f:
+                pool.append((name, compute_dhash(f)))
+        return pool
+
+    def events(self, count, photos_per_event, admin):
+        if not count:
+            return
+        now = timezone.now()
+        events = Event.objects.bulk_create([
+            Event(
+                title=f'Club Event #{i + 1}',
+                description='Synthetic event created by the seed command.',
+                date=now - timedelta(days=self.random.randrange(3 * 365)),
+                location=self.random.choice(CITIES),
+                created_by=admin,
+                is_published=True,
+            )
+            for i in range(count)
+        ], batch_size=self.batch_size)
+        self.progress('events', count, count)
+        if not photos_per_event:
+            return
+
+        event_ids = list(Event.objects.order_by('-id').values_list('id', flat=True)[:len(events)])
+        pool = self.photo_pool()
+
+        def photos():
+            for event_id in event_ids:
+                for i in range(photos_per_event):
+                    name, phash = pool[(event_id + i) % len(pool)]
+                    photo = Photo(event_id=event_id, image=name, caption=f'Photo {i + 1}', uploaded_by=admin, phash=phash)
+                    photo.set_hash_bands() # bulk_create skips Photo.save()
+                    yield photo
+
+        total, created = len(event_ids) * photos_per_event, 0
+        for batch in batched(photos(), self.batch_size):
+            Photo.objects.bulk_create(batch)
+            created += len(batch)
+            self.progress('photos', created, total)
+
+    def announcements(self, count, admin):
+        if not count:
+            return
+        now = timezone.now()
+        content = "Reminder for all members.\n\n- Dues are payable monthly\n- Contact the **financial secretary** with questions"
+        content_html = render_markdown(content) # bulk_create skips Announcement.save()
+        Announcement.objects.bulk_create([
+            Announcement(
+                title=f'Announcement #{i + 1}',
+                content=content,
+                content_html=content_html,
+                publish_date=now - timedelta(days=i, minutes=self.random.randrange(1440)),
+                author=admin,
+            )
+            for i in range(count)
+        ], batch_size=self.batch_size)
+        invalidate_home_announcements() # No post_save signals from bulk_create
+        self.progress('announcements', count, count)
+
+    def progress(self, label, done, total):
+        if self.verbosity >= 1:
+            self.stdout.write(f"{label}: {done:,}/{total:,}")
@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-19 09:40
+
+from django.db import migrations
+
+# Frozen copy of the indexes users.search relies on
+SEARCH_TEXT = "lower(first_name || ' ' || last_name || ' ' || username)"
+
+INDEXES = {
+    'postgresql': [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX users_user_username_prefix_idx ON users_user (lower(username) text_pattern_ops)",
+        "CREATE INDEX users_user_first_name_prefix_idx ON users_user (lower(first_name) text_pattern_ops)",
+        "CREATE INDEX users_user_last_name_prefix_idx ON users_user (lower(last_name) text_pattern_ops)",
+        f"CREATE INDEX users_user_name_trgm_idx ON users_user USING gin (({SEARCH_TEXT}) gin_trgm_ops)",
+    ],
+    'sqlite': [
+        "CREATE INDEX users_user_username_prefix_idx ON users_user (lower(username))",
+        "CREATE INDEX users_user_first_name_prefix_idx ON users_user (lower(first_name))",
+        "CREATE INDEX users_user_last_name_prefix_idx ON users_user (lower(last_name))",
+    ],
+}
+
+
+def create(apps, schema_editor):
+    for statement in INDEXES.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop(apps, schema_editor):
+    # The extension stays: other objects may use it
+    for statement in INDEXES.get(schema_editor.connection.vendor, []):
+        if statement.startswith('CREATE INDEX'):
+            schema_editor.execute(f"DROP INDEX IF EXISTS {statement.split()[2]}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_rename_phone_profile_phone_number_alter_profile_role'),
+    ]
+
+    operations = [
+        # Expression indexes (and pg_trgm on PostgreSQL) for users.search
+        migrations.RunPython(create, drop),
+    ]
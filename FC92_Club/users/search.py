@@ -0,0 +1,89 @@
+# users/search.py
+"""
+Member lookup for autocomplete widgets.
+
+Active members whose username, first or last name starts with the term come
+first. On PostgreSQL, terms of three or more characters also match names
+that merely resemble them (pg_trgm word similarity, so typos still find the
+member). Every condition is backed by an index created in migration 0004,
+so a lookup costs the same with fifty members or fifty thousand, and only
+`limit` rows ever leave the database.
+"""
+from django.db import connection
+
+MIN_TRIGRAM_LENGTH = 3
+
+MAX_CHAR = chr(0x10FFFF)
+
+SEARCH_TEXT = "lower(u.first_name || ' ' || u.last_name || ' ' || u.username)"
+
+PREFIX_COLUMNS = ['lower(u.username)', 'lower(u.first_name)', 'lower(u.last_name)']
+
+PREFIX_MATCH = {
+    # text_pattern_ops indexes serve LIKE 'abc%' whatever the database collation
+    'postgresql': "{column} LIKE %(prefix)s",
+    # A range on the indexed expression; SQLite won't use an index for LIKE here
+    'sqlite': "({column} >= %(low)s AND {column} < %(high)s)",
+}
+# A term of nothing but U+10FFFF has no string after all its extensions
+OPEN_PREFIX_MATCH = "{column} >= %(low)s"
+
+SEARCH_SQL = """
+    SELECT p.id, u.username, u.first_name, u.last_name
+    FROM users_profile p JOIN users_user u ON u.id = p.user_id
+    WHERE p.status = 'ACT' AND ({prefix} {fuzzy})
+    ORDER BY {prefix} DESC, {rank} u.last_name, u.first_name, u.username
+    LIMIT %(limit)s
+"""
+
+
+def prefix_end(term):
+    """The first string after every string starting with `term`, or None if there is none."""
+    term = term.rstrip(MAX_CHAR) # 'a' + MAX_CHAR + anything still sorts before 'b'
+    if not term:
+        return None
+    following = ord(term[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        following = 0xE000 # Surrogates can't be sent to the database
+    return term[:-1] + chr(following)
+
+
+def _search_sql(vendor, fuzzy, bounded=True):
+    match = PREFIX_MATCH.get(vendor, PREFIX_MATCH['postgresql'])
+    if vendor != 'postgresql' and not bounded:
+        match = OPEN_PREFIX_MATCH
+    prefix = '(' + ' OR '.join(match.format(column=column) for column in PREFIX_COLUMNS) + ')'
+    if vendor == 'postgresql' and fuzzy:
+        return SEARCH_SQL.format(
+            prefix=prefix,
+            fuzzy=f"OR %(term)s <%% {SEARCH_TEXT}",
+            rank=f"word_similarity(%(term)s, {SEARCH_TEXT}) DESC,",
+        )
+    return SEARCH_SQL.format(prefix=prefix, fuzzy='', rank='')
+
+
+def search_members(term, limit=10):
+    """Up to `limit` active members matching `term` as dicts with id and label."""
+    term = ' '.join(term.lower().split())
+    if not term:
+        return []
+    params = {
+        'term': term,
+        'prefix': term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%',
+        'low': term,
+        'high': prefix_end(term),
+        'limit': limit,
+    }
+    sql = _search_sql(connection.vendor, len(term) >= MIN_TRIGRAM_LENGTH, bounded=params['high'] is not None)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [
+        {'id': pk, 'label': member_label(username, first_name, last_name)}
+        for pk, username, first_name, last_name in rows
+    ]
+
+
+def member_label(username, first_name, last_name):
+    name = f"{first_name} {last_name}".strip()
+    return f"{name} ({username})" if name else username
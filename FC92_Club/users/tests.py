@@ -1,3 +1,205 @@
-from django.test import TestCase
+from datetime import date
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from FC92_Club.replica import STICKY_COOKIE, replica_reads
+from FC92_Club.testing import QueryBudgetTestCase, make_user
+from finances.models import Payment
+from finances.summary import refresh_summary
+from finances.forms import PaymentForm
+from .models import Profile
+from .search import prefix_end, search_members
+
+
+class UsersQueryBudgetTests(QueryBudgetTestCase):
+    def test_profile_view(self):
+        self.assertQueryBudget(11, reverse('users:profile_view'), self.member)
+        self.assertQueryBudget(13, reverse('users:profile', args=[self.member.username]), self.admin)
+
+    def test_profile_edit(self):
+        self.assertQueryBudget(6, reverse('users:profile_edit'), self.member)
+        self.assertQueryBudget(8, reverse('users:profile_edit_other', args=[self.member.username]), self.admin)
+
+    def test_member_list(self):
+        self.assertQueryBudget(7, reverse('users:member_list'), self.admin)
+
+    def test_member_search(self):
+        self.assertQueryBudget(7, reverse('users:member_search') + '?q=mem', self.fs)
+
+    def test_member_financial_detail(self):
+        self.assertQueryBudget(13, reverse('users:member_financial_detail', args=[self.member.pk]), self.fs)
+
+    def test_update_member_status(self):
+        url = reverse('users:update_member_status', args=[self.member.profile.pk])
+        self.assertQueryBudget(9, url, self.fs, method='post', status=302, grow=False, data={'status': 'SUS'})
+
+    def test_toggle_member_access(self):
+        url = reverse('users:toggle_member_access', args=[self.member.pk])
+        self.assertQueryBudget(11, url, self.admin, method='post', status=302, grow=False)
+
+    def test_delete_member(self):
+        url = reverse('users:delete_member', args=[self.member.pk])
+        # Includes loading the member's dues and payments for their delete signals
+        self.assertQueryBudget(23, url, self.admin, method='post', status=302, grow=False)
+
+    def test_member_management(self):
+        self.assertQueryBudget(6, reverse('users:member_management'), self.fs)
+
+    def test_add_single_member(self):
+        self.assertQueryBudget(13, reverse('users:add_single_member'), self.admin, method='post', status=302, grow=False, data={
+            'first_name': 'New', 'last_name': 'Member', 'email': 'new@example.com', 'role': 'MEM', 'send_invite': 'on',
+        })
+
+    def test_bulk_upload_members(self):
+        csv_file = SimpleUploadedFile('members.csv', b'first_name,last_name,email\nA,One,a1@example.com\nB,Two,b2@example.com\n')
+        self.assertQueryBudget(20, reverse('users:bulk_upload_members'), self.admin, method='post', status=302, grow=False, data={
+            'csv_file': csv_file,
+        })
+
+    def test_send_bulk_invites(self):
+        self.assertQueryBudget(16, reverse('users:send_bulk_invites'), self.fs, method='post', status=302, grow=False, data={
+            'emails': 'x1@example.com\nx2@example.com',
+        })
+
+    def test_financial_report(self):
+        url = reverse('users:financial_report')
+        self.assertQueryBudget(12, url, self.admin)
+        self.assertQueryBudget(12, url + '?status=overdue', self.admin)
+        self.assertQueryBudget(12, url + '?download=1', self.admin)
+        self.assertQueryBudget(11, url + '?live=1', self.admin)
+
+    def test_financial_report_from_summary(self):
+        refresh_summary()
+        url = reverse('users:financial_report')
+        response = self.assertQueryBudget(12, url, self.admin)
+        self.assertContains(response, 'Totals as of')
+        self.assertQueryBudget(12, url + '?download=1', self.admin)
+
+    def test_admin_reset_password(self):
+        url = reverse('users:admin_reset_password', args=[self.member.pk])
+        self.assertQueryBudget(8, url, self.admin)
+        self.assertQueryBudget(11, url, self.admin, method='post', status=302, grow=False)
+
+    def test_accept_invitation(self):
+        invited = make_user('invited', is_active=False)
+        invited.profile.invitation_token = 'a' * 32
+        invited.profile.invitation_sent_at = timezone.now()
+        invited.profile.save()
+        self.assertQueryBudget(2, reverse('users:accept_invitation', args=['a' * 32]))
+
+
+# The stand-in replica from FC92_Club.settings_local; a test mirror of 'default' would not do
+STANDIN_REPLICA = 'replica' in settings.DATABASES and not settings.DATABASES['replica'].get('TEST', {}).get('MIRROR')
+
+
+@skipUnless(STANDIN_REPLICA, "needs DJANGO_SETTINGS_MODULE=FC92_Club.settings_local")
+@override_settings(REPLICA_DATABASE='replica')
+class ReplicaRoutingTests(TestCase):
+    """The 'replica' alias is a second, empty SQLite database: anything read from it is missing."""
+    databases = {'default', 'replica'} if STANDIN_REPLICA else {'default'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fs = make_user('treasurer', role='FS')
+        cls.member = make_user('member', first_name='Replica', last_name='Tester')
+
+    def setUp(self):
+        self.client.force_login(self.fs)
+
+    def get_report(self, url):
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(replica_queries)
+
+    def test_reports_read_from_replica(self):
+        for url in (reverse('users:financial_report'), reverse('users:financial_report') + '?download=1', reverse('users:member_list')):
+            response, replica_queries = self.get_report(url)
+            self.assertGreater(replica_queries, 0, url)
+            self.assertNotContains(response, 'Tester', msg_prefix=url)
+
+    def test_primary_after_post(self):
+        response = self.client.post(reverse('finances:record_payment'), {
+            'member': self.member.profile.pk, 'amount_paid': '100.00', 'payment_date': date.today().isoformat(),
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        response, replica_queries = self.get_report(reverse('users:financial_report'))
+        self.assertEqual(replica_queries, 0)
+        self.assertContains(response, 'Tester')
+
+    def test_other_views_read_from_primary(self):
+        self.client.force_login(self.member)
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.client.get(reverse('finances:my_financial_status'))
+        self.assertContains(response, 'Replica Tester')
+        self.assertEqual(len(replica_queries), 0)
+
+    def test_writes_go_to_primary(self):
+        profile = self.member.profile
+        with replica_reads():
+            self.assertFalse(Profile.objects.filter(pk=profile.pk).exists())
+            Payment.objects.create(member=profile, amount_paid=5, payment_date=date.today(), recorded_by=self.fs)
+        self.assertEqual(Payment.objects.using('default').count(), 1)
+        self.assertEqual(Payment.objects.using('replica').count(), 0)
+
+
+class MemberSearchTests(TestCase):
+    def setUp(self):
+        self.fs = make_user('treasurer', role='FS')
+        make_user('okafor1', first_name='Chidi', last_name='Okafor')
+        make_user('ngozi', first_name='Ngozi', last_name='Okonkwo')
+        make_user('bello', first_name='Ade', last_name='Bello')
+        gone = make_user('okoro', first_name='Obi', last_name='Okoro')
+        Profile.objects.filter(user=gone).update(status='REM')
+
+    def labels(self, term, limit=10):
+        return [member['label'] for member in search_members(term, limit)]
+
+    def test_prefix_on_any_name(self):
+        self.assertEqual(self.labels('ok'), ['Chidi Okafor (okafor1)', 'Ngozi Okonkwo (ngozi)'])
+        self.assertEqual(self.labels('  NGO '), ['Ngozi Okonkwo (ngozi)'])
+        self.assertEqual(self.labels('ok', limit=1), ['Chidi Okafor (okafor1)'])
+        self.assertEqual(self.labels('%'), [])
+        self.assertEqual(self.labels(''), [])
+
+    def test_terms_ending_in_the_last_code_point(self):
+        self.assertEqual(prefix_end('ok'), 'ol')
+        self.assertEqual(prefix_end('o\U0010ffff'), 'p')
+        self.assertEqual(prefix_end('\ud7ff'), '\ue000')
+        self.assertIsNone(prefix_end('\U0010ffff\U0010ffff'))
+        self.assertEqual(self.labels('ok\U0010ffff'), [])
+        self.assertEqual(self.labels('\U0010ffff'), [])
+
+    def test_endpoint_limits_and_permissions(self):
+        url = reverse('users:member_search')
+        self.client.force_login(self.fs)
+        response = self.client.get(url, {'q': 'o', 'limit': 'many'})
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertEqual(len(self.client.get(url, {'q': 'o', 'limit': 1}).json()['results']), 1)
+
+        self.client.force_login(make_user('member'))
+        self.assertEqual(self.client.get(url, {'q': 'o'}).status_code, 302)
+
+    def test_form_renders_no_roster_and_validates_the_id(self):
+        chidi = Profile.objects.get(user__username='okafor1')
+        html = str(PaymentForm()['member'])
+        self.assertNotIn('<option', html)
+
+        data = {'amount_paid': '10.00', 'payment_date': date.today(), 'notes': ''}
+        with CaptureQueriesContext(connections['default']) as queries:
+            form = PaymentForm({**data, 'member': chidi.pk})
+            self.assertTrue(form.is_valid())
+        # The field's lookup and the model's foreign key check, both by id
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(all('"users_profile"."id" =' in query['sql'] for query in queries.captured_queries))
+        removed = Profile.objects.get(user__username='okoro')
+        self.assertFalse(PaymentForm({**data, 'member': removed.pk}).is_valid())
+        self.assertIn('Chidi Okafor (okafor1)', str(PaymentForm({**data, 'member': chidi.pk})['member']))
@@ -13,6 +13,7 @@ urlpatterns = [
 
     # Admin/FS URLs
     path('admin/members/', views.member_list, name='member_list'),
+    path('admin/members/search/', views.member_search, name='member_search'),
     path('admin/members/<int:user_id>/financial/', views.member_financial_detail, name='member_financial_detail'),
     path('admin/members/<int:profile_id>/status/', views.update_member_status, name='update_member_status'),
     path('admin/members/<int:user_id>/toggle/', views.toggle_member_access, name='toggle_member_access'),
@@ -12,7 +12,10 @@ import csv
 from io import StringIO
 from .forms import ProfileUpdateForm, AdminProfileUpdateForm, ProfileCompletionForm
 from .models import Profile, User
+from .search import search_members
 from finances.models import Payment, Due
+from finances.ledger import member_totals
+from finances.summary import summary_as_of, with_totals
 from django.db.models import Sum, F, DecimalField
 from django.db.models.functions import Coalesce
 from decimal import Decimal
@@ -35,6 +38,7 @@ from django.contrib.auth.mixins import UserPassesTestMixin
 from django.views import View
 from .decorators import admin_required, financial_secretary_required
 from .mixins import AdminRequiredMixin, FinancialSecretaryRequiredMixin
+from FC92_Club.replica import read_from_replica
 
 # --- Permission Helper Functions ---
 def is_admin(user):
@@ -64,9 +68,9 @@ def profile_view(request, username=None):
     payments = Payment.objects.filter(member=user_profile)
     dues = Due.objects.filter(member=user_profile)
 
-    total_paid = payments.aggregate(total=Coalesce(Sum('amount_paid'), 0, output_field=DecimalField()))['total']
-    total_due = dues.aggregate(total=Coalesce(Sum('amount_due'), 0, output_field=DecimalField()))['total']
-    balance = total_paid - total_due  # Positive balance means overpaid, negative means owing
+    totals = member_totals(user_profile) # Archived years are in brought_forward
+    total_paid, total_due = totals['payments_total'], totals['dues_total']
+    balance = -totals['balance']  # Positive balance means overpaid, negative means owing
 
     context = {
         'profile': user_profile,
@@ -117,32 +121,30 @@ def profile_edit(request, username=None):
 # --- Admin/FS Views ---
 
 @user_passes_test(is_financial_secretary_or_admin)
+@read_from_replica
 def member_list(request):
     """Admin/FS view to list all members with their financial balance."""
-    # First get all non-superuser profiles
-    profiles = Profile.objects.select_related('user') \
-        .exclude(user__is_superuser=True) \
-        .filter(user__is_superuser=False) \
-        .annotate(
-            total_dues=Coalesce(
-                Sum('dues__amount_due', distinct=True),
-                Decimal('0.00'),
-                output_field=DecimalField()
-            ),
-            total_payments=Coalesce(
-                Sum('payments__amount_paid', distinct=True),
-                Decimal('0.00'),
-                output_field=DecimalField()
-            )
-        ) \
-        .annotate(
-            balance=F('total_dues') - F('total_payments') # Dues - Payments (Positive = Owed)
-        ) \
-        .order_by('user__last_name', 'user__first_name')
+    # All non-superuser profiles; balance is dues - payments (positive = owed), archived years included
+    profiles = with_totals(
+        Profile.objects.select_related('user').filter(user__is_superuser=False), live=True
+    ).order_by('user__last_name', 'user__first_name')
 
     context = {'profiles': profiles}
     return render(request, 'users/member_list_admin.html', context)
 
+MEMBER_SEARCH_LIMIT = 10
+MEMBER_SEARCH_MAX_LIMIT = 50
+
+@user_passes_test(is_financial_secretary_or_admin)
+@read_from_replica
+def member_search(request):
+    """JSON for the member autocomplete widget: active members matching ?q=, at most ?limit= of them."""
+    try:
+        limit = min(max(int(request.GET.get('limit', MEMBER_SEARCH_LIMIT)), 1), MEMBER_SEARCH_MAX_LIMIT)
+    except ValueError:
+        limit = MEMBER_SEARCH_LIMIT
+    return JsonResponse({'results': search_members(request.GET.get('q', ''), limit)})
+
 @login_required
 @user_passes_test(lambda u: u.profile.role == 'ADM')
 def toggle_member_access(request, user_id):
@@ -170,11 +172,11 @@ def member_financial_detail(request, user_id):
     target_user = get_object_or_404(User, pk=user_id)
     profile = target_user.profile
 
-    payments = Payment.objects.filter(member=profile)
+    payments = Payment.objects.filter(member=profile).select_related('recorded_by')
     dues = Due.objects.filter(member=profile)
-    total_paid = payments.aggregate(total=Coalesce(Sum('amount_paid'), 0, output_field=DecimalField()))['total']
-    total_due = dues.aggregate(total=Coalesce(Sum('amount_due'), 0, output_field=DecimalField()))['total']
-    balance = total_paid - total_due
+    totals = member_totals(profile) # Archived years are in brought_forward
+    total_paid, total_due = totals['payments_total'], totals['dues_total']
+    balance = -totals['balance']
 
     context = {
         'member_profile': profile,
@@ -198,14 +200,14 @@ def update_member_status(request, profile_id):
             profile.save()
             messages.success(request, f"{profile.user.username}'s status updated to {profile.get_status_display()}.")
             # Redirect to the financial detail page or member list
-            return redirect('member_financial_detail_fs', user_id=profile.user.id)
+            return redirect('users:member_financial_detail', user_id=profile.user.id)
         else:
             messages.error(request, "Invalid status selected.")
 
     # Typically this would be part of another view (like member_financial_detail_fs)
     # or handled via Django Admin. Adding a dedicated page might be overkill.
     # Redirect if accessed via GET.
-    return redirect('member_financial_detail_fs', user_id=profile.user.id)
+    return redirect('users:member_financial_detail', user_id=profile.user.id)
 
 @user_passes_test(is_financial_secretary_or_admin)
 @csrf_protect
@@ -491,28 +493,19 @@ def delete_member(request, user_id):
         return redirect('users:member_list')
 
 @user_passes_test(is_financial_secretary_or_admin)
+@read_from_replica
 def financial_report(request):
     # Get filter status from request
     filter_status = request.GET.get('status', '')
     download = request.GET.get('download', False)
 
+    # Totals come from the precomputed summary unless it was never refreshed or ?live=1
+    as_of = None if request.GET.get('live') else summary_as_of()
+
     # Get all profiles excluding admins and superusers
-    profiles = Profile.objects.filter(
-        user__is_superuser=False,
-        user__is_staff=False
-    ).select_related('user').annotate(
-        total_dues=Coalesce(
-            Sum('dues__amount_due', distinct=True),
-            Decimal('0.00'),
-            output_field=DecimalField()
-        ),
-        total_payments=Coalesce(
-            Sum('payments__amount_paid', distinct=True),
-            Decimal('0.00'),
-            output_field=DecimalField()
-        )
-    ).annotate(
-        balance=F('total_dues') - F('total_payments')
+    profiles = with_totals(
+        Profile.objects.filter(user__is_superuser=False, user__is_staff=False).select_related('user'),
+        live=as_of is None,
     ).order_by('user__last_name', 'user__first_name')
 
     # Apply filter if specified
@@ -539,6 +532,7 @@ def financial_report(request):
         'up_to_date_count': up_to_date_count,
         'total_members': total_members,
         'filter_status': filter_status,
+        'as_of': as_of,
     }
 
     # Handle download request
@@ -581,6 +575,7 @@ def financial_report(request):
         writer.writerow(['Total Payments:', total_payments])
         writer.writerow(['Total Balance:', total_balance])
         writer.writerow(['Up to Date Members:', f'{up_to_date_count}/{total_members}'])
+        writer.writerow(['As of:', as_of.isoformat(timespec='seconds') if as_of else 'Live'])
 
         response.write(csv_buffer.getvalue())
         return response
@@ -644,7 +639,7 @@ def accept_invitation(request, token):
         # If user is already active, redirect to login
         if user.is_active:
             messages.info(request, 'This invitation has already been used.')
-            return redirect('users:login')
+            return redirect('login')
 
         if request.method == 'POST':
             form = ProfileCompletionForm(
@@ -678,7 +673,7 @@ def accept_invitation(request, token):
                         login(request, user)
                         
                         messages.success(request, 'Welcome! Your profile has been created successfully.')
-                        return redirect('users:dashboard')
+                        return redirect('pages:home')
 
                 except Exception as e:
                     messages.error(request, f'Error updating profile: {str(e)}')
@@ -696,4 +691,4 @@ def accept_invitation(request, token):
 
     except Profile.DoesNotExist:
         messages.error(request, 'Invalid or expired invitation token.')
-        return redirect('users:login')
+        return redirect('login')
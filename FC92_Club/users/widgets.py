@@ -0,0 +1,26 @@
+# users/widgets.py
+from django import forms
+from django.urls import reverse_lazy
+
+from .models import Profile
+from .search import member_label
+
+
+class MemberAutocomplete(forms.Widget):
+    """
+    Search box for a member field, filled from users:member_search as the user
+    types. Submits only the profile id, and never renders the roster: the one
+    query it runs is for the label of an already chosen member.
+    """
+    template_name = 'users/widgets/member_autocomplete.html'
+    search_url = reverse_lazy('users:member_search')
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        label = ''
+        if value not in (None, ''):
+            user = Profile.objects.filter(pk=value).values('user__username', 'user__first_name', 'user__last_name').first()
+            if user:
+                label = member_label(user['user__username'], user['user__first_name'], user['user__last_name'])
+        context['widget'].update(label=label, search_url=self.search_url)
+        return context